@@ -1,11 +1,21 @@
-from flask import Flask, g
+import time
+from flask import Flask, g, request
 from flask_cors import CORS
 from config import get_config
+from metrics import HTTP_REQUEST_DURATION, REGISTRY
+from profiling import RequestProfiler
 from models.database import Database
 from services.thread_service import ThreadService
 from services.summary_service import SummaryService
 from services.nlp_service import NLPService
+from services.summary_cache import SummaryCache
 from services.analytics_service import AnalyticsService
+from services.batch_service import BatchSummaryService
+from services.job_service import JobService
+from services.rollup_service import RollupService
+from services.export_service import ExportService
+from services.audit_writer import AuditWriter
+from services.audit_service import AuditService
 from routes import register_blueprints
 
 
@@ -18,7 +28,8 @@ def create_app(config_name=None):
     app.config.from_object(config)
     
     # Initialize CORS
-    CORS(app, resources={r"/api/*": {"origins": config.CORS_ORIGINS}})
+    CORS(app, resources={r"/api/*": {"origins": config.CORS_ORIGINS}},
+         expose_headers=['ETag'])
     
     # Initialize database and services
     init_services(app, config)
@@ -26,6 +37,10 @@ def create_app(config_name=None):
     # Register blueprints
     register_blueprints(app)
     
+    # Request metrics and profiling
+    register_metrics(app, config)
+    register_profiling(app, config)
+    
     # Error handlers
     register_error_handlers(app)
     
@@ -38,25 +53,150 @@ def create_app(config_name=None):
 def init_services(app, config):
     """Initialize all service instances and store in app context"""
     # Initialize database
-    db = Database(config.DATABASE_PATH)
+    db = Database(
+        config.DATABASE_PATH,
+        pool_size=config.DB_POOL_SIZE,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pragmas={
+            'journal_mode': config.SQLITE_JOURNAL_MODE,
+            'synchronous': config.SQLITE_SYNCHRONOUS,
+            'cache_size': config.SQLITE_CACHE_SIZE,
+            'mmap_size': config.SQLITE_MMAP_SIZE,
+            'busy_timeout': config.SQLITE_BUSY_TIMEOUT
+        }
+    )
+    app.db = db
     print(f"Database initialized: {config.DATABASE_PATH}")
     
     # Initialize services
-    app.thread_service = ThreadService(db)
-    app.summary_service = SummaryService(db)
+    app.audit_writer = AuditWriter(
+        db,
+        mode=config.AUDIT_MODE,
+        max_entries=config.AUDIT_BUFFER_SIZE,
+        flush_interval=config.AUDIT_FLUSH_INTERVAL,
+        max_buffered=config.AUDIT_BUFFER_LIMIT or None
+    )
+    app.thread_service = ThreadService(db, import_chunk_size=config.IMPORT_CHUNK_SIZE,
+                                       audit=app.audit_writer)
+    app.summary_service = SummaryService(db, bulk_max_summaries=config.BULK_MAX_SUMMARIES,
+                                         audit=app.audit_writer)
+    app.summary_cache = None
+    if config.SUMMARY_CACHE_ENABLED:
+        app.summary_cache = SummaryCache(
+            db,
+            max_entries=config.SUMMARY_CACHE_MAX_ENTRIES,
+            ttl_seconds=config.SUMMARY_CACHE_TTL_SECONDS
+        )
     app.nlp_service = NLPService(
         openai_api_key=config.OPENAI_API_KEY,
         model=config.OPENAI_MODEL,
         temperature=config.OPENAI_TEMPERATURE,
-        max_tokens=config.OPENAI_MAX_TOKENS
+        max_tokens=config.OPENAI_MAX_TOKENS,
+        cache=app.summary_cache,
+        api_base=config.OPENAI_API_BASE,
+        request_timeout=config.OPENAI_REQUEST_TIMEOUT,
+        pack_max_threads=config.OPENAI_PACK_MAX_THREADS,
+        pack_token_budget=config.OPENAI_PACK_TOKEN_BUDGET,
+        input_token_budget=config.OPENAI_INPUT_TOKEN_BUDGET,
+        context_tokens=config.OPENAI_CONTEXT_TOKENS
     )
     app.analytics_service = AnalyticsService(db)
+    app.rollup_service = RollupService(db, batch_size=config.ROLLUP_BATCH_SIZE,
+                                       audit=app.audit_writer)
+    app.export_service = ExportService(db, settle_seconds=config.EXPORT_SETTLE_SECONDS)
+    app.audit_service = AuditService(
+        db,
+        archive_dir=config.AUDIT_ARCHIVE_DIR,
+        archive_after_days=config.AUDIT_ARCHIVE_AFTER_DAYS,
+        batch_size=config.AUDIT_ARCHIVE_BATCH_SIZE,
+        audit=app.audit_writer,
+        rollup_service=app.rollup_service
+    )
+    app.batch_summary_service = BatchSummaryService(
+        app.thread_service,
+        app.summary_service,
+        app.nlp_service,
+        max_workers=config.BATCH_MAX_WORKERS,
+        executor=config.BATCH_EXECUTOR,
+        commit_size=config.BATCH_COMMIT_SIZE
+    )
+    app.job_service = JobService(
+        db,
+        max_attempts=config.JOB_MAX_ATTEMPTS,
+        lease_seconds=config.JOB_LEASE_SECONDS,
+        retry_backoff_seconds=config.JOB_RETRY_BACKOFF_SECONDS
+    )
     
     # Log NLP method
     nlp_method = "OpenAI " + config.OPENAI_MODEL if config.OPENAI_API_KEY else "Rule-based"
     print(f"NLP Method: {nlp_method}")
 
 
+def register_metrics(app, config):
+    """Time every request by route and periodically publish this process's metrics"""
+    REGISTRY.configure(
+        enabled=config.METRICS_ENABLED,
+        directory=config.METRICS_DIR,
+        flush_interval=config.METRICS_FLUSH_INTERVAL
+    )
+    if not config.METRICS_ENABLED:
+        return
+    
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            # Route templates (not raw paths) keep label cardinality bounded
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, request.method, route, response.status_code
+            )
+        try:
+            REGISTRY.maybe_flush()
+        except OSError:
+            # Metrics must never fail a response; the next request retries
+            app.logger.exception("Failed to write the metrics snapshot")
+        return response
+
+
+def register_profiling(app, config):
+    """Profile requests that ask for it (or are sampled) when profiling is enabled"""
+    app.profiler = None
+    if not config.PROFILING_ENABLED:
+        return
+    app.profiler = RequestProfiler(
+        config.PROFILING_DIR,
+        sample_rate=config.PROFILING_SAMPLE_RATE,
+        max_profiles=config.PROFILING_MAX_PROFILES,
+        token=config.PROFILING_TOKEN
+    )
+    
+    @app.before_request
+    def start_profile():
+        trigger = app.profiler.wanted(request.headers)
+        if trigger:
+            g.profile = (app.profiler.start(), trigger, time.perf_counter())
+    
+    @app.after_request
+    def save_profile(response):
+        profile, trigger, started = g.pop('profile', (None, None, None))
+        if profile:
+            profile_id = app.profiler.finish(profile, {
+                "method": request.method,
+                "path": request.full_path.rstrip('?'),
+                "route": request.url_rule.rule if request.url_rule else None,
+                "status": response.status_code,
+                "trigger": trigger,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+            })
+            response.headers['X-Profile-Id'] = profile_id
+        return response
+
+
 def register_error_handlers(app):
     """Register error handlers"""
     
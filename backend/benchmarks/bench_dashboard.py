@@ -0,0 +1,114 @@
+"""
+Benchmark: dashboard analytics latency as tables grow
+
+Grows a scratch database step by step and, at each size, times the
+counter-backed AnalyticsService against the COUNT(*) queries it replaced.
+
+    python benchmarks/bench_dashboard.py --sizes 10000,100000,1000000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import Database
+from services.analytics_service import AnalyticsService
+
+STATUSES = ['pending', 'edited', 'approved', 'rejected']
+TYPES = ['openai', 'rule_based']
+
+
+def scan_dashboard(db: Database):
+    """The dashboard as computed before counters: one scan per number"""
+    with db.get_db() as conn:
+        total_threads = conn.execute('SELECT COUNT(*) FROM threads').fetchone()[0]
+        total_summaries = conn.execute('SELECT COUNT(*) FROM summaries').fetchone()[0]
+        pending = conn.execute(
+            "SELECT COUNT(*) FROM summaries WHERE status = 'pending' OR status = 'edited'"
+        ).fetchone()[0]
+        approved = conn.execute(
+            "SELECT COUNT(*) FROM summaries WHERE status = 'approved'"
+        ).fetchone()[0]
+    return {
+        "total_threads": total_threads,
+        "total_summaries": total_summaries,
+        "pending_summaries": pending,
+        "approved_summaries": approved,
+        "approval_rate": round(approved / total_summaries * 100, 2) if total_summaries else 0
+    }
+
+
+def grow(db: Database, start: int, stop: int, rng: random.Random, batch: int = 50000):
+    """Insert threads and summaries start..stop (triggers keep counters current)"""
+    for offset in range(start, stop, batch):
+        ids = range(offset, min(offset + batch, stop))
+        with db.get_db() as conn:
+            conn.executemany(
+                "INSERT INTO threads (thread_id, topic, product, order_id, messages) VALUES (?, ?, ?, ?, '[]')",
+                [(f"BENCH-{i}", 'Bench', 'Widget', str(i)) for i in ids]
+            )
+            conn.executemany(
+                "INSERT INTO summaries (thread_id, original_summary, edited_summary, status, summary_type) "
+                "VALUES (?, '{}', '{}', ?, ?)",
+                [(f"BENCH-{i}", rng.choice(STATUSES), rng.choice(TYPES)) for i in ids]
+            )
+
+
+def timed(fn, repeat: int):
+    """Median wall time of fn in milliseconds, and its last result"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='Comma-separated row counts for threads and summaries')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    rng = random.Random(42)
+    report = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        analytics = AnalyticsService(db)
+        rows = 0
+
+        for size in sizes:
+            start = time.perf_counter()
+            grow(db, rows, size, rng)
+            insert_seconds = time.perf_counter() - start
+            rows = size
+
+            counter_ms, from_counters = timed(analytics.get_dashboard_analytics, args.repeat)
+            scan_ms, from_scans = timed(lambda: scan_dashboard(db), args.repeat)
+
+            report.append({
+                "rows": size,
+                "insert_seconds": round(insert_seconds, 2),
+                "counters_ms": round(counter_ms, 3),
+                "count_scans_ms": round(scan_ms, 3),
+                "consistent": from_counters == from_scans
+            })
+            print(json.dumps(report[-1]), file=sys.stderr)
+
+        db.close_all()
+
+    print(json.dumps(report, indent=2))
+    return 0 if all(entry['consistent'] for entry in report) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Benchmark: prompt tokens before and after compaction
+
+Generates threads and dresses their messages up as real email replies
+(greeting, signature, agent boilerplate, the previous message quoted
+below), then reports the estimated message tokens per thread as sent
+before and after PromptBuilder compaction.
+
+    python benchmarks/bench_prompt.py --threads 1000 --min-messages 10 --max-messages 40
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate_dataset import DatasetGenerator
+from services.prompt_builder import PromptBuilder
+
+AGENT_BOILERPLATE = ("We apologize for any inconvenience this may have caused. "
+                     "Your satisfaction is our top priority and we appreciate your patience.")
+SIGNATURES = {
+    'customer': "Thanks,\nJordan\n\nSent from my iPhone",
+    'company': "Best regards,\nSam\nCustomer Experience Team\n--\nACME Store | support@example.com"
+}
+
+
+def as_email(thread, rng: random.Random):
+    """The thread with every message written like an email reply"""
+    messages = []
+    previous = None
+    for msg in thread['messages']:
+        body = msg['body']
+        if msg['sender'] == 'company':
+            body = f"Hello,\n\n{body} {AGENT_BOILERPLATE}"
+        body = f"{body}\n\n{SIGNATURES.get(msg['sender'], SIGNATURES['customer'])}"
+        if previous and rng.random() < 0.8:
+            quoted = '\n'.join(f'> {line}' for line in previous['body'].splitlines())
+            body += f"\n\nOn {previous['timestamp']} {previous['sender']} wrote:\n{quoted}"
+        previous = {**msg, "body": body}
+        messages.append(previous)
+    return {**thread, "messages": messages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=1000)
+    parser.add_argument('--min-messages', type=int, default=10)
+    parser.add_argument('--max-messages', type=int, default=40)
+    parser.add_argument('--budget', type=int, default=2800,
+                        help='Message token budget (OPENAI_INPUT_TOKEN_BUDGET less the prompt frame)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    generator = DatasetGenerator(seed=args.seed, min_messages=args.min_messages,
+                                 max_messages=args.max_messages)
+    rng = random.Random(args.seed)
+    threads = [as_email(thread, rng) for thread in generator.threads(args.threads)]
+
+    builder = PromptBuilder()
+    start = time.perf_counter()
+    built = [builder.build(thread['messages'], args.budget) for thread in threads]
+    seconds = time.perf_counter() - start
+
+    original = [b.original_tokens for b in built]
+    sent = [b.tokens for b in built]
+    saved = [b.saved_tokens for b in built]
+    print(json.dumps({
+        "threads": len(threads),
+        "budget": args.budget,
+        "original_tokens": {"total": sum(original), "mean": round(statistics.mean(original), 1),
+                            "max": max(original)},
+        "sent_tokens": {"total": sum(sent), "mean": round(statistics.mean(sent), 1),
+                        "max": max(sent)},
+        "saved_per_thread": {"mean": round(statistics.mean(saved), 1),
+                             "median": statistics.median(saved), "max": max(saved)},
+        "saved_fraction": round(1 - sum(sent) / sum(original), 3),
+        "over_budget": sum(1 for tokens in sent if tokens > args.budget),
+        "threads_with_omissions": sum(1 for b in built if b.omitted),
+        "build_ms_per_thread": round(seconds / len(threads) * 1000, 3)
+    }, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Benchmark: scalar vs batched rule-based summarization
+
+    python benchmarks/bench_rule_batch.py --threads 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.nlp_service import NLPService
+
+SAMPLE_PATH = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'frontend-react', 'public', 'ce_exercise_threads UPDATED.txt'
+)
+
+
+def make_threads(count: int, seed: int = 42):
+    """Synthetic threads built from the sample dataset's vocabulary"""
+    with open(SAMPLE_PATH) as f:
+        sample = json.load(f)['threads']
+    words = [w for t in sample for m in t['messages'] for w in m['body'].split()]
+    rng = random.Random(seed)
+
+    threads = []
+    for i in range(count):
+        base = sample[i % len(sample)]
+        messages = [
+            {
+                "id": f"m{j + 1}",
+                "sender": 'customer' if j % 2 == 0 else 'company',
+                "timestamp": f"2025-09-12T06:{j:02d}:00",
+                "body": ' '.join(rng.choices(words, k=rng.randint(1, 50)))
+            }
+            for j in range(rng.randint(1, 10))
+        ]
+        threads.append({**base, "thread_id": f"BENCH-{i}", "messages": messages})
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=100000)
+    args = parser.parse_args()
+
+    nlp = NLPService()
+    threads = make_threads(args.threads)
+
+    start = time.perf_counter()
+    scalar = []
+    for thread in threads:
+        summary = nlp._summarize_with_rules(thread)
+        summary['summary_type'] = 'rule_based'
+        scalar.append(summary)
+    scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = nlp.summarize_batch_rules(threads)
+    batch_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(scalar, batch) if a != b)
+
+    print(json.dumps({
+        "threads": args.threads,
+        "scalar_seconds": round(scalar_seconds, 3),
+        "batch_seconds": round(batch_seconds, 3),
+        "speedup": round(scalar_seconds / batch_seconds, 2) if batch_seconds else None,
+        "mismatches": mismatches
+    }, indent=2))
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
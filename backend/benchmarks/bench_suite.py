@@ -0,0 +1,242 @@
+"""
+Benchmark suite: end-to-end API latency and throughput as the dataset grows
+
+Runs the app in-process (Flask test client, scratch database, rule-based
+summaries) and grows a synthetic dataset to each size in turn. At every
+size it measures streaming import, list pages, get-by-id, single and batch
+summarization, approval, the dashboard and the analytics timeseries, and
+writes one JSON report. Pass a previous report as --baseline to fail on
+regressions.
+
+    python benchmarks/bench_suite.py --sizes 1000,100000,1000000 -o report.json
+    python benchmarks/bench_suite.py --sizes 1000,100000 --baseline report.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate_dataset import DatasetGenerator
+
+THREAD_LIST_FIELDS = 'thread_id,topic,subject,initiated_by,order_id,product,message_count'
+SUMMARY_LIST_FIELDS = 'id,thread_id,edited_summary,status,summary_type,created_at'
+
+
+def create_app(database_path: str):
+    """The app on a scratch database, without an OpenAI key"""
+    # Config reads the environment when it is first imported
+    os.environ['DATABASE_PATH'] = database_path
+    os.environ['OPENAI_API_KEY'] = ''
+    os.environ.setdefault('FLASK_DEBUG', 'true')
+    os.environ.setdefault('SUMMARY_CACHE_ENABLED', 'false')
+    from app import create_app as app_factory
+
+    with contextlib.redirect_stdout(sys.stderr):
+        return app_factory('development')
+
+
+def latency(samples_ms):
+    """Median and p95 of millisecond samples"""
+    ordered = sorted(samples_ms)
+    return {
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3)
+    }
+
+
+def timed_requests(call, args_list):
+    """Run call(*args) for each args, checking the status; returns latency stats and responses
+
+    The timing includes reading the whole body: list endpoints stream, so
+    the call itself returns once the headers are ready. Closing the response
+    ends its request context before the next request starts.
+    """
+    samples = []
+    responses = []
+    for args in args_list:
+        start = time.perf_counter()
+        response = call(*args)
+        response.get_data()
+        response.close()
+        samples.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"{args}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+        responses.append(response)
+    return latency(samples), responses
+
+
+def run_size(client, app, generator, rows, size, rng, args, summarized):
+    """Grow the dataset to size and measure every operation"""
+    result = {"threads": size}
+
+    # Import the new threads as one NDJSON stream
+    with tempfile.TemporaryFile('w+') as f:
+        generator.write(f, size - rows, offset=rows, fmt='ndjson')
+        f.seek(0)
+        start = time.perf_counter()
+        response = client.post('/api/threads/import-stream', data=f.buffer,
+                               content_type='application/x-ndjson')
+        seconds = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"import: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+    result["import"] = {
+        "threads": response.json['imported'],
+        "seconds": round(seconds, 3),
+        "threads_per_second": round(response.json['imported'] / seconds, 1)
+    }
+
+    repeat = [()] * args.samples
+    result["list_threads"], _ = timed_requests(
+        lambda: client.get(f'/api/threads?limit=100&fields={THREAD_LIST_FIELDS}'), repeat
+    )
+    result["list_threads_by_topic"], _ = timed_requests(
+        lambda: client.get(f'/api/threads?limit=100&topic=Refund+request&fields={THREAD_LIST_FIELDS}'),
+        repeat
+    )
+
+    ids = [f"SYN-{i:07d}" for i in rng.sample(range(size), min(size, args.samples))]
+    result["get_thread"], _ = timed_requests(lambda tid: client.get(f'/api/threads/{tid}'),
+                                             [(tid,) for tid in ids])
+
+    # Summarize threads that have no summary yet, then approve those summaries
+    fresh = [f"SYN-{i:07d}" for i in range(size) if i not in summarized]
+    picked = rng.sample(fresh, min(len(fresh), args.samples + args.batch_threads))
+    single, batch = picked[:args.samples], picked[args.samples:]
+    summarized.update(int(tid[4:]) for tid in picked)
+
+    result["summarize"], responses = timed_requests(
+        lambda tid: client.post(f'/api/threads/{tid}/summarize'), [(tid,) for tid in single]
+    )
+    summary_ids = [response.json['summary_id'] for response in responses]
+
+    if batch:
+        start = time.perf_counter()
+        response = client.post('/api/threads/summarize-batch', json={"thread_ids": batch})
+        seconds = time.perf_counter() - start
+        result["summarize_batch"] = {
+            "threads": response.json['succeeded'],
+            "seconds": round(seconds, 3),
+            "threads_per_second": round(response.json['succeeded'] / seconds, 1)
+        }
+
+    result["approve"], _ = timed_requests(
+        lambda sid: client.post(f'/api/summaries/{sid}/approve', json={"user": "bench"}),
+        [(sid,) for sid in summary_ids]
+    )
+    result["list_summaries"], _ = timed_requests(
+        lambda: client.get(f'/api/summaries?limit=100&status=pending,edited&fields={SUMMARY_LIST_FIELDS}'),
+        repeat
+    )
+    result["analytics"], _ = timed_requests(lambda: client.get('/api/analytics'), repeat)
+
+    start = time.perf_counter()
+    rollup = app.rollup_service.rollup()
+    result["rollup"] = {"events": rollup['events'], "seconds": round(time.perf_counter() - start, 3)}
+    result["analytics_timeseries"], _ = timed_requests(
+        lambda: client.get('/api/analytics/timeseries?granularity=hour'), repeat[:20]
+    )
+    return result
+
+
+def compare(report, baseline, tolerance):
+    """Regressions of report against baseline: slower latencies, lower throughput"""
+    regressions = []
+    previous = {entry['threads']: entry for entry in baseline['results']}
+    for entry in report['results']:
+        old = previous.get(entry['threads'])
+        if not old:
+            continue
+        for name, metrics in entry.items():
+            if not isinstance(metrics, dict) or not isinstance(old.get(name), dict):
+                continue
+            for key, value in metrics.items():
+                before = old[name].get(key)
+                if not before:
+                    continue
+                if key.endswith('_ms') and value > before * (1 + tolerance):
+                    regressions.append(f"{entry['threads']} threads: {name}.{key} {before} -> {value}")
+                elif key.endswith('_per_second') and value < before / (1 + tolerance):
+                    regressions.append(f"{entry['threads']} threads: {name}.{key} {before} -> {value}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,100000,1000000',
+                        help='Comma-separated thread counts to grow the dataset to')
+    parser.add_argument('--samples', type=int, default=200,
+                        help='Requests per latency measurement')
+    parser.add_argument('--batch-threads', type=int, default=5000,
+                        help='Threads per summarize-batch measurement')
+    parser.add_argument('--distribution', choices=('uniform', 'geometric'), default='uniform')
+    parser.add_argument('--max-messages', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', help='Write the JSON report here (default: stdout)')
+    parser.add_argument('--baseline', help='Earlier report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown before a metric counts as a regression')
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    generator = DatasetGenerator(seed=args.seed, max_messages=args.max_messages,
+                                 distribution=args.distribution)
+    rng = random.Random(args.seed)
+    report = {
+        "benchmark": "bench_suite",
+        "created_at": datetime.utcnow().isoformat(timespec='seconds'),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": vars(args),
+        "results": []
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(os.path.join(tmp, 'bench.db'))
+        client = app.test_client()
+        rows = 0
+        summarized = set()
+        for size in sizes:
+            result = run_size(client, app, generator, rows, size, rng, args, summarized)
+            rows = size
+            report['results'].append(result)
+            print(json.dumps(result), file=sys.stderr)
+        app.db.close_all()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+Local stand-in for the OpenAI ChatCompletion API
+
+Answers POST /v1/chat/completions with a deterministic summary JSON
+(derived from a hash of the prompt; a keyed array of them for packed
+prompts listing several threads) after a configurable latency, and
+injects server errors (500) and rate limiting (429) at configurable rates.
+Point the app at it with OPENAI_API_BASE=http://127.0.0.1:8765/v1 and any
+OPENAI_API_KEY.
+
+    python benchmarks/fake_openai.py --latency-ms 800 --distribution lognormal \\
+        --error-rate 0.02 --rate-limit-rps 20
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+DISTRIBUTIONS = ('fixed', 'uniform', 'exponential', 'lognormal')
+
+# Section header of each thread in a packed prompt (NLPService.summarize_packed)
+THREAD_KEY_RE = re.compile(r'^=== Thread key: (\S+) ===$', re.MULTILINE)
+
+
+class FakeOpenAI:
+    """Latency, failure and rate-limit model of the fake server"""
+
+    STATUSES = ['resolved', 'pending', 'escalated']
+    SENTIMENTS = ['positive', 'neutral', 'negative', 'frustrated']
+    PRIORITIES = ['low', 'medium', 'high', 'urgent']
+    TAGS = ['damaged', 'delivery', 'wrong item', 'refund', 'address']
+
+    def __init__(self, latency_ms: float = 500, distribution: str = 'lognormal',
+                 sigma: float = 0.5, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 rate_limit_rps: float = 0.0, seed: int = 42):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {', '.join(DISTRIBUTIONS)}")
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rate_limit_rps = rate_limit_rps
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit_rps
+        self._refilled_at = time.monotonic()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0}
+
+    def latency(self) -> float:
+        """Seconds to wait before answering (the mean is latency_ms)"""
+        mean = self.latency_ms / 1000
+        with self._lock:
+            if self.distribution == 'fixed':
+                return mean
+            if self.distribution == 'uniform':
+                return self._rng.uniform(0, 2 * mean)
+            if self.distribution == 'exponential':
+                return self._rng.expovariate(1 / mean) if mean else 0.0
+            # lognormal with the given mean: a long right tail, like real completions
+            return self._rng.lognormvariate(math.log(mean) - self.sigma ** 2 / 2, self.sigma) if mean else 0.0
+
+    def outcome(self) -> int:
+        """HTTP status for the next request: 200, 429 or 500"""
+        with self._lock:
+            self.stats['requests'] += 1
+            if self.rate_limit_rps > 0:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit_rps,
+                                   self._tokens + (now - self._refilled_at) * self.rate_limit_rps)
+                self._refilled_at = now
+                if self._tokens < 1:
+                    self.stats['rate_limited'] += 1
+                    return 429
+                self._tokens -= 1
+            draw = self._rng.random()
+            if draw < self.rate_limit_rate:
+                self.stats['rate_limited'] += 1
+                return 429
+            if draw < self.rate_limit_rate + self.error_rate:
+                self.stats['errors'] += 1
+                return 500
+            self.stats['ok'] += 1
+            return 200
+
+    @classmethod
+    def summary(cls, prompt: str) -> Dict:
+        """Deterministic summary for a prompt, with the fields NLPService asks for"""
+        digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+        return {
+            "issue_summary": f"Synthetic summary {digest[:4].hex()}",
+            "key_actions": [f"Action {digest[4] % 10}", f"Action {digest[5] % 10}"],
+            "resolution_status": cls.STATUSES[digest[6] % len(cls.STATUSES)],
+            "sentiment": cls.SENTIMENTS[digest[7] % len(cls.SENTIMENTS)],
+            "priority": cls.PRIORITIES[digest[8] % len(cls.PRIORITIES)],
+            "next_steps": "Follow up with the customer",
+            "tags": [cls.TAGS[digest[9] % len(cls.TAGS)]]
+        }
+
+    @classmethod
+    def reply(cls, prompt: str) -> str:
+        """Completion text: one summary, or a keyed array of them for a packed prompt"""
+        sections = THREAD_KEY_RE.split(prompt)
+        if len(sections) == 1:
+            return json.dumps(cls.summary(prompt))
+        # [preamble, key, text, key, text, ...]
+        return json.dumps([
+            {"thread_key": key, **cls.summary(text)}
+            for key, text in zip(sections[1::2], sections[2::2])
+        ])
+
+
+def make_handler(fake: FakeOpenAI):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                return self._reply(404, {"error": {"message": "Unknown endpoint", "type": "invalid_request_error"}})
+            try:
+                request = json.loads(body)
+                prompt = request['messages'][-1]['content']
+            except (ValueError, KeyError, IndexError, TypeError):
+                return self._reply(400, {"error": {"message": "Invalid request", "type": "invalid_request_error"}})
+
+            time.sleep(fake.latency())
+            status = fake.outcome()
+            if status == 429:
+                return self._reply(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                                   {'Retry-After': '1'})
+            if status == 500:
+                return self._reply(500, {"error": {"message": "The server had an error", "type": "server_error"}})
+
+            content = fake.reply(prompt)
+            self._reply(200, {
+                "id": "chatcmpl-" + hashlib.sha256(body).hexdigest()[:24],
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get('model', 'gpt-4'),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": len(prompt) // 4,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": (len(prompt) + len(content)) // 4
+                }
+            })
+
+        def do_GET(self):
+            if self.path.rstrip('/').endswith('/stats'):
+                with fake._lock:
+                    return self._reply(200, dict(fake.stats))
+            self._reply(404, {"error": {"message": "Unknown endpoint"}})
+
+        def _reply(self, status: int, payload: Dict, headers: Dict = None):
+            encoded = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(encoded)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, *args):
+            pass    # one line per request would dominate a load test's output
+
+    return Handler
+
+
+def serve(fake: FakeOpenAI, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Start the fake server on a background thread; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Options describing the fake server's behaviour (shared with load_llm.py)"""
+    parser.add_argument('--latency-ms', type=float, default=500, help='Mean response latency')
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='lognormal')
+    parser.add_argument('--sigma', type=float, default=0.5, help='Spread of the lognormal latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction answered with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help='Fraction answered with 429 regardless of load')
+    parser.add_argument('--rate-limit-rps', type=float, default=0.0,
+                        help='Token-bucket limit; requests beyond it get 429 (0 = unlimited)')
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def from_arguments(args) -> FakeOpenAI:
+    return FakeOpenAI(
+        latency_ms=args.latency_ms,
+        distribution=args.distribution,
+        sigma=args.sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        rate_limit_rps=args.rate_limit_rps,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = serve(from_arguments(args), args.host, args.port)
+    print(f"Fake OpenAI listening on http://{args.host}:{server.server_address[1]}/v1", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Synthetic CE thread dataset generator
+
+Produces threads in the sample dataset's `version: v2` schema, either as a
+{"version": "v2", "threads": [...]} document (importable through
+/api/threads/import or /import-stream) or as NDJSON, one thread per line.
+Threads are generated and written one at a time, so memory use does not
+depend on the thread count.
+
+    python benchmarks/generate_dataset.py --threads 100000 --format ndjson -o threads.ndjson
+"""
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+# topic -> (subject template, opening line, extra words likely in the thread)
+TOPICS = {
+    'Damaged product on arrival': (
+        'Order {order_id}: Damaged item received',
+        'Hello, my item arrived damaged.',
+        ['damaged', 'broken', 'defective', 'photos', 'packaging']
+    ),
+    'Delivery delay': (
+        'Order {order_id}: Where is my package?',
+        'Hi, my order has not arrived yet.',
+        ['delayed', 'late', 'where', 'tracking', 'stuck', 'carrier']
+    ),
+    'Wrong item received': (
+        'Order {order_id}: Wrong item in the box',
+        'I received the wrong item.',
+        ['wrong', 'color', 'size', 'return', 'exchange']
+    ),
+    'Refund request': (
+        'Order {order_id}: Refund request',
+        'I would like a refund for my order.',
+        ['refund', 'return', 'credit', 'card', 'policy']
+    ),
+    'Address change': (
+        'Order {order_id}: Please update my delivery address',
+        'I need to change the delivery address.',
+        ['address', 'reroute', 'routing', 'warehouse']
+    )
+}
+
+PRODUCTS = [
+    'LED Monitor', 'Wireless Mouse', 'Mechanical Keyboard', 'USB-C Hub', 'Laptop Stand',
+    'Noise Cancelling Headphones', 'Webcam', 'Desk Lamp', 'External SSD', 'Smart Speaker'
+]
+
+# Filler words, including every rule-based keyword so summaries vary
+VOCABULARY = [
+    'hello', 'please', 'order', 'item', 'arrived', 'today', 'tomorrow', 'when', 'why',
+    'help', 'update', 'status', 'number', 'ticket', 'response', 'question', 'summary',
+    'stock', 'warehouse', 'delivery', 'carrier', 'packaging', 'photos', 'policy', 'card',
+    'decline', 'approve', 'resolved', 'thanks', 'appreciate', 'sorry', 'urgent', 'issue',
+    'problem', 'lost', 'partial', 'damaged', 'broken', 'defective', 'delayed', 'late',
+    'where', 'tracking', 'stuck', 'wrong', 'color', 'size', 'refund', 'return', 'credit',
+    'address', 'reroute', 'routing'
+]
+
+DISTRIBUTIONS = ('uniform', 'geometric')
+
+
+class DatasetGenerator:
+    """Deterministic (per seed) generator of synthetic threads"""
+
+    def __init__(self, seed: int = 42, min_messages: int = 1, max_messages: int = 10,
+                 distribution: str = 'uniform', min_words: int = 1, max_words: int = 50,
+                 vocabulary: Optional[Sequence[str]] = None,
+                 topics: Optional[Sequence[str]] = None,
+                 start: datetime = datetime(2025, 1, 1)):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {', '.join(DISTRIBUTIONS)}")
+        if not 1 <= min_messages <= max_messages:
+            raise ValueError("Need 1 <= min_messages <= max_messages")
+        if not 1 <= min_words <= max_words:
+            raise ValueError("Need 1 <= min_words <= max_words")
+        unknown = set(topics or ()) - set(TOPICS)
+        if unknown:
+            raise ValueError(f"Unknown topics: {', '.join(sorted(unknown))}")
+
+        self.seed = seed
+        self.min_messages = min_messages
+        self.max_messages = max_messages
+        self.distribution = distribution
+        self.min_words = min_words
+        self.max_words = max_words
+        self.vocabulary = list(vocabulary or VOCABULARY)
+        self.topics = list(topics or TOPICS)
+        self.start = start
+
+    def _message_count(self, rng: random.Random) -> int:
+        if self.distribution == 'uniform':
+            return rng.randint(self.min_messages, self.max_messages)
+        # Many short threads and a long tail, mean ~ a quarter of the range
+        mean = max(1.0, (self.max_messages - self.min_messages) / 4)
+        extra = int(rng.expovariate(1 / mean))
+        return min(self.max_messages, self.min_messages + extra)
+
+    def thread(self, index: int) -> Dict:
+        """The index-th thread; the same index and seed always give the same thread"""
+        rng = random.Random(self.seed * 1000003 + index)
+        topic = self.topics[index % len(self.topics)]
+        subject, opening, topic_words = TOPICS[topic]
+        words = self.vocabulary + topic_words * 3
+        product = rng.choice(PRODUCTS)
+        order_id = f'{100000 + index % 900000}-{index // 900000 % 1000:03d}'
+        initiated_by = 'customer' if rng.random() < 0.9 else 'company'
+        at = self.start + timedelta(minutes=index)
+
+        messages = []
+        senders = ('customer', 'company') if initiated_by == 'customer' else ('company', 'customer')
+        for j in range(self._message_count(rng)):
+            body = ' '.join(rng.choices(words, k=rng.randint(self.min_words, self.max_words)))
+            if j == 0:
+                body = f'{opening} Order {order_id} {product}. {body}'
+            messages.append({
+                "id": f"m{j + 1}",
+                "sender": senders[j % 2],
+                "timestamp": (at + timedelta(minutes=10 * j)).isoformat(timespec='seconds'),
+                "body": body[0].upper() + body[1:] + '.'
+            })
+
+        return {
+            "thread_id": f"SYN-{index:07d}",
+            "topic": topic,
+            "subject": subject.format(order_id=order_id),
+            "initiated_by": initiated_by,
+            "order_id": order_id,
+            "product": product,
+            "messages": messages
+        }
+
+    def threads(self, count: int, offset: int = 0) -> Iterator[Dict]:
+        """Threads offset .. offset + count - 1"""
+        for index in range(offset, offset + count):
+            yield self.thread(index)
+
+    def write(self, f, count: int, offset: int = 0, fmt: str = 'json'):
+        """Stream count threads to a text file as a v2 document or NDJSON"""
+        if fmt == 'ndjson':
+            for thread in self.threads(count, offset):
+                f.write(json.dumps(thread) + '\n')
+            return
+
+        header = json.dumps({
+            "version": "v2",
+            "generated_at": datetime.utcnow().isoformat(timespec='seconds'),
+            "description": f"Synthetic CE threads (seed {self.seed}, {self.distribution} "
+                           f"{self.min_messages}-{self.max_messages} messages)"
+        })
+        f.write(header[:-1] + ', "threads": [')
+        for i, thread in enumerate(self.threads(count, offset)):
+            f.write((',\n' if i else '\n') + json.dumps(thread))
+        f.write('\n]}\n')
+
+
+def load_vocabulary(path: str) -> List[str]:
+    """Whitespace-separated words from a text file"""
+    with open(path) as f:
+        return f.read().split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=1000)
+    parser.add_argument('--offset', type=int, default=0, help='Index of the first thread')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--min-messages', type=int, default=1)
+    parser.add_argument('--max-messages', type=int, default=10)
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='uniform',
+                        help='Messages per thread; geometric gives mostly short threads')
+    parser.add_argument('--min-words', type=int, default=1)
+    parser.add_argument('--max-words', type=int, default=50)
+    parser.add_argument('--vocabulary', help='Text file of words to draw message bodies from')
+    parser.add_argument('--topics', help=f"Comma-separated subset of: {', '.join(TOPICS)}")
+    parser.add_argument('--format', choices=('json', 'ndjson'), default='json')
+    parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    args = parser.parse_args()
+
+    try:
+        generator = DatasetGenerator(
+            seed=args.seed,
+            min_messages=args.min_messages,
+            max_messages=args.max_messages,
+            distribution=args.distribution,
+            min_words=args.min_words,
+            max_words=args.max_words,
+            vocabulary=load_vocabulary(args.vocabulary) if args.vocabulary else None,
+            topics=[t.strip() for t in args.topics.split(',')] if args.topics else None
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            generator.write(f, args.threads, args.offset, args.format)
+    else:
+        generator.write(sys.stdout, args.threads, args.offset, args.format)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
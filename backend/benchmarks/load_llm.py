@@ -0,0 +1,218 @@
+"""
+Load test of the OpenAI summarization path against a fake OpenAI server
+
+Starts benchmarks/fake_openai.py in-process (or uses --openai-base), runs
+the app in-process pointed at it (or targets a running app with --url),
+imports generated threads and fires concurrent forced summarize requests.
+Reports throughput, latency percentiles, the rule-based fallback rate and
+what the fake server saw, as JSON.
+
+    python benchmarks/load_llm.py --concurrency 32 --requests 2000 \\
+        --latency-ms 800 --rate-limit-rps 20 --error-rate 0.01
+
+Against gunicorn (started with OPENAI_API_BASE pointing at a fake server):
+
+    python benchmarks/load_llm.py --url http://127.0.0.1:5000 --openai-base http://127.0.0.1:8765/v1
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fake_openai
+from benchmarks.generate_dataset import DatasetGenerator
+
+
+def create_app(database_path: str, openai_base: str, args):
+    """The app on a scratch database, pointed at the fake server"""
+    # Config reads the environment when it is first imported
+    os.environ.update({
+        'DATABASE_PATH': database_path,
+        'OPENAI_API_KEY': 'sk-fake',
+        'OPENAI_API_BASE': openai_base,
+        'OPENAI_REQUEST_TIMEOUT': str(args.request_timeout),
+        'DB_POOL_SIZE': str(max(10, args.concurrency + 2)),
+        'SUMMARY_CACHE_ENABLED': 'false'
+    })
+    os.environ.setdefault('FLASK_DEBUG', 'true')
+    from app import create_app as app_factory
+
+    with contextlib.redirect_stdout(sys.stderr):
+        return app_factory('development')
+
+
+class InProcessClient:
+    """Requests through Flask test clients, one per load thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def post(self, path: str, body: bytes = b'', content_type: str = 'application/json'):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.post(path, data=body, content_type=content_type)
+        return response.status_code, response.get_data()
+
+
+class HTTPClient:
+    """Requests to a running server"""
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def post(self, path: str, body: bytes = b'', content_type: str = 'application/json'):
+        request = urllib.request.Request(self.base_url + path, data=body, method='POST',
+                                         headers={'Content-Type': content_type})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+        except OSError as e:
+            return 0, str(e).encode('utf-8')
+
+
+def percentile(ordered, fraction: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def run_load(client, thread_ids, concurrency: int, total: int):
+    """Send total summarize requests from concurrency threads; returns per-request results"""
+    counter = itertools.count()
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            n = next(counter)
+            if n >= total:
+                return
+            thread_id = thread_ids[n % len(thread_ids)]
+            start = time.perf_counter()
+            status, body = client.post(f'/api/threads/{thread_id}/summarize?force=true')
+            elapsed = time.perf_counter() - start
+            summary_type = None
+            if status == 200:
+                summary_type = json.loads(body).get('summary_type')
+            with lock:
+                results.append((elapsed, status, summary_type))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    return results
+
+
+def fake_stats(openai_base: str):
+    """Counters of an external fake_openai.py server (None for anything else)"""
+    try:
+        with urllib.request.urlopen(openai_base.rstrip('/') + '/stats', timeout=5) as response:
+            return json.loads(response.read())
+    except (OSError, ValueError):
+        return None
+
+
+def summarize_results(results, seconds: float):
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in results)
+    ok = [summary_type for _, status, summary_type in results if status == 200]
+    fallbacks = sum(1 for summary_type in ok if summary_type != 'openai')
+    return {
+        "requests": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(results) / seconds, 2) if seconds else 0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0
+        },
+        "fallback_rate": round(fallbacks / len(ok), 4) if ok else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Base URL of a running app (default: run it in-process)')
+    parser.add_argument('--openai-base',
+                        help='Use this OpenAI-compatible endpoint instead of starting a fake one')
+    parser.add_argument('--threads', type=int, default=500, help='Threads to import and summarize')
+    parser.add_argument('--requests', type=int, default=500, help='Summarize requests to send')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--request-timeout', type=float, default=60,
+                        help='OPENAI_REQUEST_TIMEOUT for the in-process app')
+    parser.add_argument('-o', '--output', help='Write the JSON report here (default: stdout)')
+    fake_openai.add_arguments(parser)
+    args = parser.parse_args()
+    if args.url and not args.openai_base:
+        parser.error('--url needs --openai-base (the endpoint the running app was started with)')
+
+    fake = server = None
+    openai_base = args.openai_base
+    if not openai_base:
+        fake = fake_openai.from_arguments(args)
+        server = fake_openai.serve(fake)
+        openai_base = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            client = HTTPClient(args.url, timeout=args.request_timeout * 2)
+        else:
+            client = InProcessClient(create_app(os.path.join(tmp, 'load.db'), openai_base, args))
+
+        # Threads are summarized by id, so a running app gets its own copy of them
+        dataset = io.StringIO()
+        DatasetGenerator(seed=args.seed).write(dataset, args.threads, fmt='ndjson')
+        status, body = client.post('/api/threads/import-stream', dataset.getvalue().encode('utf-8'),
+                                   'application/x-ndjson')
+        if status != 200:
+            print(f"Import failed: HTTP {status} {body[:200]!r}", file=sys.stderr)
+            return 1
+        thread_ids = [f"SYN-{i:07d}" for i in range(args.threads)]
+
+        start = time.perf_counter()
+        # Fallbacks print "OpenAI API error: ..."; keep stdout for the report
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run_load(client, thread_ids, args.concurrency, args.requests)
+        report = summarize_results(results, time.perf_counter() - start)
+
+    report = {
+        "benchmark": "load_llm",
+        "target": args.url or 'in-process',
+        "openai_base": openai_base,
+        "settings": vars(args),
+        **report,
+        "fake_openai": dict(fake.stats) if fake else fake_stats(openai_base)
+    }
+    if server:
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -15,12 +15,89 @@ class Config:
     
     # Database
     DATABASE_PATH: str = os.environ.get('DATABASE_PATH', 'ce_threads.db')
+    DB_POOL_SIZE: int = int(os.environ.get('DB_POOL_SIZE', '10'))
+    DB_POOL_TIMEOUT: float = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+    SQLITE_JOURNAL_MODE: str = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS: str = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE: int = int(os.environ.get('SQLITE_CACHE_SIZE', '-20000'))
+    SQLITE_MMAP_SIZE: int = int(os.environ.get('SQLITE_MMAP_SIZE', '268435456'))
+    SQLITE_BUSY_TIMEOUT: int = int(os.environ.get('SQLITE_BUSY_TIMEOUT', '5000'))
     
     # OpenAI
     OPENAI_API_KEY: str = os.environ.get('OPENAI_API_KEY', '')
     OPENAI_MODEL: str = os.environ.get('OPENAI_MODEL', 'gpt-4')
     OPENAI_TEMPERATURE: float = float(os.environ.get('OPENAI_TEMPERATURE', '0.3'))
     OPENAI_MAX_TOKENS: int = int(os.environ.get('OPENAI_MAX_TOKENS', '500'))
+    OPENAI_API_BASE: str = os.environ.get('OPENAI_API_BASE', '')  # default: api.openai.com
+    OPENAI_REQUEST_TIMEOUT: float = float(os.environ.get('OPENAI_REQUEST_TIMEOUT', '60'))
+    # Batch summarization packs up to this many threads into one request (1 = off),
+    # within an estimated prompt size
+    OPENAI_PACK_MAX_THREADS: int = int(os.environ.get('OPENAI_PACK_MAX_THREADS', '8'))
+    OPENAI_PACK_TOKEN_BUDGET: int = int(os.environ.get('OPENAI_PACK_TOKEN_BUDGET', '3000'))
+    # Thread messages are compacted (quotes, signatures and repeats removed, the
+    # middle of long threads shortened) to keep a prompt within this many tokens
+    OPENAI_INPUT_TOKEN_BUDGET: int = int(os.environ.get('OPENAI_INPUT_TOKEN_BUDGET', '3000'))
+    OPENAI_CONTEXT_TOKENS: int = int(os.environ.get('OPENAI_CONTEXT_TOKENS', '8192'))
+    
+    # Summary cache
+    SUMMARY_CACHE_ENABLED: bool = os.environ.get('SUMMARY_CACHE_ENABLED', 'True').lower() == 'true'
+    SUMMARY_CACHE_MAX_ENTRIES: int = int(os.environ.get('SUMMARY_CACHE_MAX_ENTRIES', '1024'))
+    SUMMARY_CACHE_TTL_SECONDS: int = int(os.environ.get('SUMMARY_CACHE_TTL_SECONDS', '604800'))
+    
+    # Streamed list responses (gzip/deflate when the client accepts it)
+    STREAM_COMPRESSION: bool = os.environ.get('STREAM_COMPRESSION', 'True').lower() == 'true'
+    STREAM_COMPRESSION_LEVEL: int = int(os.environ.get('STREAM_COMPRESSION_LEVEL', '6'))
+    
+    # Audit log: 'buffered' writes entries in batches after the change commits;
+    # 'strict' writes each one in the same transaction as the change
+    AUDIT_MODE: str = os.environ.get('AUDIT_MODE', 'buffered')
+    AUDIT_BUFFER_SIZE: int = int(os.environ.get('AUDIT_BUFFER_SIZE', '1000'))
+    AUDIT_FLUSH_INTERVAL: float = float(os.environ.get('AUDIT_FLUSH_INTERVAL', '1.0'))
+    # Hard cap on waiting entries (default 10x AUDIT_BUFFER_SIZE); newer ones are dropped
+    AUDIT_BUFFER_LIMIT: int = int(os.environ.get('AUDIT_BUFFER_LIMIT', '0'))
+    
+    # Audit archive: entries older than this many days move to per-month files
+    AUDIT_ARCHIVE_DIR: str = os.environ.get('AUDIT_ARCHIVE_DIR', 'audit_archive')
+    AUDIT_ARCHIVE_AFTER_DAYS: int = int(os.environ.get('AUDIT_ARCHIVE_AFTER_DAYS', '90'))
+    AUDIT_ARCHIVE_BATCH_SIZE: int = int(os.environ.get('AUDIT_ARCHIVE_BATCH_SIZE', '5000'))
+    
+    # Bulk approve/reject/edit: most summaries changed in one transaction
+    BULK_MAX_SUMMARIES: int = int(os.environ.get('BULK_MAX_SUMMARIES', '10000'))
+    
+    # Bulk CRM export (GET /api/export, manage.py export)
+    EXPORT_DIR: str = os.environ.get('EXPORT_DIR', 'exports')
+    EXPORT_SETTLE_SECONDS: float = float(os.environ.get('EXPORT_SETTLE_SECONDS', '5'))
+    
+    # Import
+    IMPORT_CHUNK_SIZE: int = int(os.environ.get('IMPORT_CHUNK_SIZE', '1000'))
+    
+    # Batch summarization
+    BATCH_MAX_WORKERS: int = int(os.environ.get('BATCH_MAX_WORKERS', '8'))
+    BATCH_EXECUTOR: str = os.environ.get('BATCH_EXECUTOR', 'thread')  # 'thread' or 'process'
+    BATCH_COMMIT_SIZE: int = int(os.environ.get('BATCH_COMMIT_SIZE', '50'))
+    
+    # Job queue
+    JOB_MAX_ATTEMPTS: int = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+    JOB_LEASE_SECONDS: int = int(os.environ.get('JOB_LEASE_SECONDS', '300'))
+    JOB_RETRY_BACKOFF_SECONDS: int = int(os.environ.get('JOB_RETRY_BACKOFF_SECONDS', '30'))
+    JOB_POLL_INTERVAL: float = float(os.environ.get('JOB_POLL_INTERVAL', '1.0'))
+    JOB_WORKER_CONCURRENCY: int = int(os.environ.get('JOB_WORKER_CONCURRENCY', '4'))
+    
+    # Analytics rollups (run by the worker every interval; 0 disables)
+    ROLLUP_BATCH_SIZE: int = int(os.environ.get('ROLLUP_BATCH_SIZE', '10000'))
+    ROLLUP_INTERVAL_SECONDS: float = float(os.environ.get('ROLLUP_INTERVAL_SECONDS', '60'))
+    
+    # Metrics (GET /api/metrics); set METRICS_DIR to merge gunicorn/worker processes
+    METRICS_ENABLED: bool = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_DIR: str = os.environ.get('METRICS_DIR', '')
+    METRICS_FLUSH_INTERVAL: float = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+    
+    # Request profiling (X-Profile header or sampling; profiles at /api/admin/profiles)
+    PROFILING_ENABLED: bool = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILING_DIR: str = os.environ.get('PROFILING_DIR', 'profiles')
+    PROFILING_SAMPLE_RATE: float = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+    PROFILING_MAX_PROFILES: int = int(os.environ.get('PROFILING_MAX_PROFILES', '50'))
+    PROFILING_TOKEN: str = os.environ.get('PROFILING_TOKEN', '')
     
     # CORS
     CORS_ORIGINS: str = os.environ.get('CORS_ORIGINS', '*')
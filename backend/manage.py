@@ -0,0 +1,83 @@
+"""
+Maintenance Commands
+
+    python manage.py check-counters            # compare analytics counters with a recount
+    python manage.py check-counters --repair   # ...and rebuild them if they drifted
+    python manage.py rollup                    # fold new audit events into analytics rollups
+    python manage.py export                    # write approvals since the last export to a .ndjson.gz
+    python manage.py archive-audit             # move old audit entries into per-month archive files
+"""
+import argparse
+import json
+import os
+import sys
+from app import create_app
+
+
+def check_counters(app, args) -> int:
+    """Verify (and optionally rebuild) the trigger-maintained analytics counters"""
+    result = app.analytics_service.check_counters(repair=args.repair)
+    print(json.dumps(result, indent=2))
+    return 0 if result['consistent'] or result['repaired'] else 1
+
+
+def rollup(app, args) -> int:
+    """Fold audit events past the watermark into the hourly/daily rollups"""
+    result = app.rollup_service.rollup(max_batches=args.max_batches)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+def export(app, args) -> int:
+    """Write summaries approved since the last export to a gzipped NDJSON file"""
+    result = app.export_service.export_file(args.output_dir or app.config['EXPORT_DIR'],
+                                            limit=args.limit, cursor=args.cursor)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+def archive_audit(app, args) -> int:
+    """Move audit entries older than AUDIT_ARCHIVE_AFTER_DAYS into per-month archive files"""
+    result = app.audit_service.archive(older_than_days=args.older_than_days)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+COMMANDS = {
+    'check-counters': check_counters,
+    'rollup': rollup,
+    'export': export,
+    'archive-audit': archive_audit
+}
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Maintenance commands')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    counters = subparsers.add_parser('check-counters', help=check_counters.__doc__)
+    counters.add_argument('--repair', action='store_true',
+                          help='Rebuild the counters from the base tables if they drifted')
+
+    rollups = subparsers.add_parser('rollup', help=rollup.__doc__)
+    rollups.add_argument('--max-batches', type=int, default=None,
+                         help='Stop after this many batches instead of catching up fully')
+
+    exports = subparsers.add_parser('export', help=export.__doc__)
+    exports.add_argument('--output-dir', help='Directory for the export file (default: EXPORT_DIR)')
+    exports.add_argument('--limit', type=int, default=None,
+                         help='At most this many records; run again for the rest')
+    exports.add_argument('--cursor', help='Start after this cursor instead of the stored watermark')
+
+    archives = subparsers.add_parser('archive-audit', help=archive_audit.__doc__)
+    archives.add_argument('--older-than-days', type=int, default=None,
+                          help='Override AUDIT_ARCHIVE_AFTER_DAYS')
+
+    args = parser.parse_args()
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    sys.exit(COMMANDS[args.command](app, args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+"""
+In-Process Metrics with Prometheus Text Exposition
+
+Counters and histograms live in plain dicts behind one lock, so recording
+costs a dict update and nothing runs while the app is idle. Under
+gunicorn each worker process keeps its own values; when a metrics
+directory is configured, every process periodically snapshots them to
+<dir>/metrics-<pid>.json and a scrape of any worker merges all snapshots
+(the same approach as prometheus_client's multiprocess mode). Files of
+exited processes are kept so counters stay monotonic; empty the
+directory on deploy.
+"""
+import bisect
+import functools
+import glob
+import inspect
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Registry:
+    """Holds every metric's values for this process"""
+    
+    def __init__(self):
+        self.enabled = True
+        self.directory = None
+        self.flush_interval = 5.0
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, 'Metric'] = {}
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            # A forked worker must not re-report what its parent already recorded
+            os.register_at_fork(after_in_child=self._reset)
+    
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counters: Dict[Tuple, float] = {}
+        self._histograms: Dict[Tuple, List[float]] = {}
+        self._dirty = False
+        self._last_flush = 0.0
+    
+    def configure(self, enabled: bool = True, directory: Optional[str] = None,
+                  flush_interval: float = 5.0):
+        """Turn recording on/off and set the multi-process snapshot directory"""
+        self.enabled = enabled
+        self.directory = directory or None
+        self.flush_interval = flush_interval
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+    
+    def register(self, metric: 'Metric'):
+        self._metrics[metric.name] = metric
+    
+    def inc(self, name: str, labels: Tuple, amount: float = 1.0):
+        with self._lock:
+            key = (name, labels)
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+            self._dirty = True
+    
+    def observe(self, name: str, labels: Tuple, value: float, buckets: Sequence[float]):
+        with self._lock:
+            key = (name, labels)
+            series = self._histograms.get(key)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), then sum
+                series = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            series[bisect.bisect_left(buckets, value)] += 1
+            series[-1] += value
+            self._dirty = True
+    
+    def snapshot(self) -> Dict:
+        """This process's values in a JSON-serializable form"""
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value]
+                             for (name, labels), value in self._counters.items()],
+                "histograms": [[name, list(labels), list(series)]
+                               for (name, labels), series in self._histograms.items()]
+            }
+    
+    def maybe_flush(self, force: bool = False):
+        """Write this process's snapshot if something changed since the last one
+        
+        One thread writes at a time; others skip unless force=True, in which
+        case they wait. Raises OSError if the snapshot can't be written.
+        """
+        if not self.directory:
+            return
+        if not self._flush_lock.acquire(blocking=force):
+            return    # another thread is writing the same snapshot
+        try:
+            now = time.monotonic()
+            if not self._dirty or (not force and now - self._last_flush < self.flush_interval):
+                return
+            self._last_flush = now
+            self._dirty = False
+            
+            pid = os.getpid()
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(prefix=f'metrics-{pid}.', suffix='.tmp',
+                                                dir=self.directory)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(tmp_path, os.path.join(self.directory, f'metrics-{pid}.json'))
+            except BaseException:
+                self._dirty = True
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        finally:
+            self._flush_lock.release()
+    
+    def _collect(self) -> Dict:
+        """Values of this process merged with the snapshots of all others"""
+        snapshots = [self.snapshot()]
+        if self.directory:
+            own = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+                if path == own:
+                    continue
+                try:
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue    # being replaced, or unreadable
+        
+        counters: Dict[Tuple, float] = {}
+        histograms: Dict[Tuple, List[float]] = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(labels))
+                counters[key] = counters.get(key, 0.0) + value
+            for name, labels, series in snapshot['histograms']:
+                key = (name, tuple(labels))
+                merged = histograms.get(key)
+                histograms[key] = series if merged is None else [a + b for a, b in zip(merged, series)]
+        return {"counters": counters, "histograms": histograms}
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        values = self._collect()
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            if metric.kind == 'counter':
+                for (name, labels), value in sorted(values['counters'].items()):
+                    if name == metric.name:
+                        lines.append(f'{name}{_labels(metric.labels, labels)} {_number(value)}')
+            else:
+                for (name, labels), series in sorted(values['histograms'].items()):
+                    if name != metric.name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(list(metric.buckets) + ['+Inf'], series[:-1]):
+                        cumulative += count
+                        le = bound if bound == '+Inf' else _number(bound)
+                        lines.append(f'{name}_bucket{_labels(metric.labels, labels, le=le)} {_number(cumulative)}')
+                    lines.append(f'{name}_sum{_labels(metric.labels, labels)} {_number(series[-1])}')
+                    lines.append(f'{name}_count{_labels(metric.labels, labels)} {_number(cumulative)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Iterable, le: Optional[str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    """A named metric with a fixed set of label names"""
+    kind = ''
+    
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 registry: Registry = REGISTRY):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.registry = registry
+        registry.register(self)
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+    kind = 'counter'
+    
+    def inc(self, *labels, amount: float = 1.0):
+        if self.registry.enabled:
+            self.registry.inc(self.name, labels, amount)
+
+
+class Histogram(Metric):
+    """Distribution of observed values (e.g. seconds) over fixed buckets"""
+    kind = 'histogram'
+    
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Registry = REGISTRY):
+        super().__init__(name, help, labels, registry)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, *labels):
+        if self.registry.enabled:
+            self.registry.observe(self.name, labels, value, self.buckets)
+
+
+# Metrics shared across layers
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Flask request latency by route',
+    ('method', 'route', 'status')
+)
+SERVICE_CALL_DURATION = Histogram(
+    'service_call_duration_seconds', 'Latency of public service methods',
+    ('service', 'method')
+)
+SERVICE_ERRORS = Counter(
+    'service_errors_total', 'Exceptions raised by public service methods',
+    ('service', 'method', 'error')
+)
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds', 'SQLite statement execution time by operation',
+    ('operation',)
+)
+DB_CONNECTION_HOLD = Histogram(
+    'db_connection_hold_seconds', 'Time a pooled connection is held by Database.get_db'
+)
+DB_POOL_WAIT = Histogram(
+    'db_pool_wait_seconds', 'Time spent waiting for a pooled connection when the pool is exhausted'
+)
+NLP_SUMMARIES = Counter(
+    'nlp_summaries_total', 'Summaries produced by strategy',
+    ('strategy', 'mode')
+)
+NLP_OPENAI_DURATION = Histogram(
+    'nlp_openai_request_duration_seconds', 'OpenAI completion latency by outcome',
+    ('outcome',)
+)
+NLP_FALLBACKS = Counter(
+    'nlp_fallbacks_total', 'Summaries that fell back to rules after an OpenAI failure'
+)
+NLP_PACK_RETRIES = Counter(
+    'nlp_pack_retries_total', 'Threads of a packed OpenAI request retried on their own'
+)
+NLP_PROMPT_TOKENS = Counter(
+    'nlp_prompt_tokens_total', 'Estimated thread message tokens in OpenAI prompts, before and after compaction',
+    ('stage',)
+)
+NLP_PROMPT_TOKENS_SAVED = Histogram(
+    'nlp_prompt_tokens_saved', 'Estimated prompt tokens saved per thread by compaction',
+    buckets=(0, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+)
+SUMMARY_CACHE_LOOKUPS = Counter(
+    'summary_cache_lookups_total', 'Summary cache lookups by result',
+    ('result',)
+)
+AUDIT_ENTRIES_WRITTEN = Counter(
+    'audit_entries_written_total', 'Buffered audit_log entries written by the audit writer'
+)
+AUDIT_FLUSH_DURATION = Histogram(
+    'audit_flush_duration_seconds', 'Time to write one batch of buffered audit entries'
+)
+AUDIT_FLUSH_ERRORS = Counter(
+    'audit_flush_errors_total', 'Failed audit flushes (the entries are kept and retried)'
+)
+AUDIT_ENTRIES_DROPPED = Counter(
+    'audit_entries_dropped_total', 'Buffered audit entries dropped because the buffer was at its limit'
+)
+
+
+def instrumented(service: str):
+    """Class decorator timing every public method of a service
+    
+    Wraps methods on the class (not the instance), so instances still
+    pickle for process pools. Generator methods are timed until exhausted.
+    """
+    def decorate(cls):
+        for attr, fn in list(vars(cls).items()):
+            if attr.startswith('_') or not inspect.isfunction(fn):
+                continue
+            setattr(cls, attr, _timed(fn, service, attr))
+        return cls
+    return decorate
+
+
+def _timed(fn, service: str, method: str):
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generator_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                yield from fn(*args, **kwargs)
+            except Exception as e:
+                SERVICE_ERRORS.inc(service, method, type(e).__name__)
+                raise
+            finally:
+                SERVICE_CALL_DURATION.observe(time.perf_counter() - start, service, method)
+        return generator_wrapper
+    
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not REGISTRY.enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            SERVICE_ERRORS.inc(service, method, type(e).__name__)
+            raise
+        finally:
+            SERVICE_CALL_DURATION.observe(time.perf_counter() - start, service, method)
+    return wrapper
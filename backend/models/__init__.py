@@ -5,6 +5,7 @@ from .database import Database
 from .thread import Thread
 from .summary import Summary
 from .audit_log import AuditLog
+from .job import Job
 
-__all__ = ['Database', 'Thread', 'Summary', 'AuditLog']
+__all__ = ['Database', 'Thread', 'Summary', 'AuditLog', 'Job']
 
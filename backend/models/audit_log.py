@@ -1,7 +1,7 @@
 """
 Audit Log Model
 """
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 
@@ -24,6 +24,17 @@ class AuditLog:
         self.details = details
         self.timestamp = timestamp or datetime.now().isoformat()
     
+    def to_dict(self) -> Dict:
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'thread_id': self.thread_id,
+            'action': self.action,
+            'user': self.user,
+            'details': self.details,
+            'timestamp': self.timestamp
+        }
+    
     @classmethod
     def from_row(cls, row) -> 'AuditLog':
         """Create from database row"""
@@ -1,18 +1,137 @@
 """
 Database Connection and Management
 """
+import logging
+import os
+import queue
 import sqlite3
-from typing import Optional
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
 from contextlib import contextmanager
+from metrics import DB_CONNECTION_HOLD, DB_POOL_WAIT, DB_QUERY_DURATION, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,       # negative = KiB, so ~20MB page cache
+    'mmap_size': 268435456,     # 256MB
+    'busy_timeout': 5000,       # ms
+    'temp_store': 'MEMORY'
+}
+
+# Statement keywords reported as their own db_query_duration_seconds operation
+_TIMED_OPERATIONS = frozenset({'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'BEGIN', 'PRAGMA'})
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection that records how long each statement takes to execute
+    
+    after_commit holds callables that Database.get_db runs once the
+    transaction has committed (and drops on rollback).
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.after_commit = []
+    
+    def execute(self, sql, *args):
+        if not REGISTRY.enabled:
+            return super().execute(sql, *args)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, *args)
+        finally:
+            DB_QUERY_DURATION.observe(time.perf_counter() - start, _operation(sql))
+    
+    def executemany(self, sql, *args):
+        if not REGISTRY.enabled:
+            return super().executemany(sql, *args)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, *args)
+        finally:
+            DB_QUERY_DURATION.observe(time.perf_counter() - start, _operation(sql))
+
+
+def _operation(sql: str) -> str:
+    keyword = sql.lstrip()[:7].split(None, 1)
+    keyword = keyword[0].upper() if keyword else ''
+    return keyword if keyword in _TIMED_OPERATIONS else 'OTHER'
 
 
 class Database:
-    """Database connection manager"""
+    """Database connection manager with a bounded connection pool"""
+    
+    # Expands a thread's messages JSON into rows of the messages table
+    _EXPLODE_MESSAGES_SQL = '''
+        INSERT INTO messages (thread_id, message_id, position, sender, timestamp, body)
+        SELECT {thread}.thread_id, json_extract(value, '$.id'), key,
+               json_extract(value, '$.sender'), json_extract(value, '$.timestamp'),
+               json_extract(value, '$.body')
+        FROM json_each({thread}.messages)
+        WHERE json_valid({thread}.messages);
+    '''
+    
+    # Current value of every analytics counter, computed from the base tables
+    COUNTERS_SQL = '''
+        SELECT 'threads' AS metric, '' AS dimension, COUNT(*) AS value FROM threads
+        UNION ALL
+        SELECT 'summaries', '', COUNT(*) FROM summaries
+        UNION ALL
+        SELECT 'summaries_by_status', ifnull(status, ''), COUNT(*) FROM summaries GROUP BY ifnull(status, '')
+        UNION ALL
+        SELECT 'summaries_by_type', ifnull(summary_type, ''), COUNT(*) FROM summaries GROUP BY ifnull(summary_type, '')
+    '''
     
-    def __init__(self, database_path: str):
+    # Columns added after their table first shipped; ALTERed into older databases
+    _ADDED_COLUMNS = {
+        'summaries': {
+            'message_count': 'INTEGER',     # messages the summary covers
+            'rule_state': 'TEXT',           # rule counters, for incremental updates
+            'stale': 'INTEGER DEFAULT 0'    # thread changed since the summary
+        },
+        'watermarks': {
+            'cursor': 'TEXT'                # position of stages keyed by more than an id
+        }
+    }
+    
+    def __init__(self, database_path: str, pool_size: int = 10,
+                 pool_timeout: float = 30.0, pragmas: Optional[Dict] = None):
         self.database_path = database_path
+        self.pool_size = max(1, pool_size)
+        self.pool_timeout = pool_timeout
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self._init_pool()
         self._init_schema()
     
+    def _init_pool(self):
+        """Reset pool state (also used after fork and unpickling)"""
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+    
+    def __getstate__(self):
+        # Connections and locks can't cross process boundaries
+        return {
+            'database_path': self.database_path,
+            'pool_size': self.pool_size,
+            'pool_timeout': self.pool_timeout,
+            'pragmas': self.pragmas,
+            'fts_enabled': self.fts_enabled
+        }
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_pool()
+    
     def _init_schema(self):
         """Initialize database schema"""
         conn = self.get_connection()
@@ -45,9 +164,13 @@ class Database:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 approved_at TIMESTAMP,
                 approved_by TEXT,
+                message_count INTEGER,
+                rule_state TEXT,
+                stale INTEGER DEFAULT 0,
                 FOREIGN KEY (thread_id) REFERENCES threads (thread_id)
             )
         ''')
+        self._add_missing_columns(c, 'summaries', self._ADDED_COLUMNS['summaries'])
         
         # Audit log table
         c.execute('''
@@ -61,31 +184,495 @@ class Database:
             )
         ''')
         
+        # Jobs table (durable async work queue)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_type TEXT NOT NULL,
+                payload TEXT,
+                status TEXT DEFAULT 'queued',
+                attempts INTEGER DEFAULT 0,
+                max_attempts INTEGER DEFAULT 3,
+                result TEXT,
+                error TEXT,
+                lease_owner TEXT,
+                lease_expires_at REAL,
+                run_after REAL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        ''')
+        
+        # Summary cache table (persistent tier of NLP summary cache)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS summary_cache (
+                cache_key TEXT PRIMARY KEY,
+                summary TEXT,
+                model TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expires_at REAL
+            )
+        ''')
+        
+        # Time-bucketed analytics, folded in incrementally from audit_log
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS analytics_rollups (
+                granularity TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                dimension TEXT NOT NULL DEFAULT '',
+                count INTEGER NOT NULL DEFAULT 0,
+                total_seconds REAL,
+                PRIMARY KEY (granularity, bucket, metric, dimension)
+            )
+        ''')
+        
+        # Progress markers of incremental background stages (e.g. rollups)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS watermarks (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self._add_missing_columns(c, 'watermarks', self._ADDED_COLUMNS['watermarks'])
+        
         # Create indexes
         c.execute('CREATE INDEX IF NOT EXISTS idx_threads_order_id ON threads(order_id)')
         c.execute('CREATE INDEX IF NOT EXISTS idx_summaries_thread_id ON summaries(thread_id)')
         c.execute('CREATE INDEX IF NOT EXISTS idx_summaries_status ON summaries(status)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_threads_created_at ON threads(created_at, thread_id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_summaries_created_at ON summaries(created_at, id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_summaries_status_created_at ON summaries(status, created_at, id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_summaries_status_approved_at ON summaries(status, approved_at, id)')
         c.execute('CREATE INDEX IF NOT EXISTS idx_audit_thread_id ON audit_log(thread_id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_log(user)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_audit_action ON audit_log(action)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_log(timestamp)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs(status, run_after)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_summary_cache_expires_at ON summary_cache(expires_at)')
+        
+        self._init_messages_schema(c)
+        self._init_counters_schema(c)
+        self._init_versions_schema(c)
         
         conn.commit()
         conn.close()
     
+    @staticmethod
+    def _add_missing_columns(c, table: str, columns: Dict[str, str]):
+        """ALTER TABLE ADD COLUMN for any of the columns the table lacks"""
+        existing = {row[1] for row in c.execute(f'PRAGMA table_info({table})')}
+        for name, declaration in columns.items():
+            if name not in existing:
+                c.execute(f'ALTER TABLE {table} ADD COLUMN {name} {declaration}')
+    
+    def _init_messages_schema(self, c):
+        """Normalized messages table and full-text index
+        
+        threads.messages stays the document the API reads; triggers mirror
+        it into one row per message (and into FTS5) on every insert, update
+        and delete, so every write path keeps the index in sync.
+        """
+        backfill = not c.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages'"
+        ).fetchone()
+        
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                thread_id TEXT NOT NULL,
+                message_id TEXT,
+                position INTEGER,
+                sender TEXT,
+                timestamp TEXT,
+                body TEXT
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_messages_thread_id ON messages(thread_id, position)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_messages_sender_timestamp ON messages(sender, timestamp)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp)')
+        
+        # INSERT OR REPLACE doesn't fire delete triggers, so clear old rows before insert.
+        # A replaced thread may differ anywhere, so its summaries can't be updated
+        # incrementally any more: mark them stale and forget what they covered.
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS threads_messages_before_insert
+            BEFORE INSERT ON threads BEGIN
+                DELETE FROM messages WHERE thread_id = NEW.thread_id;
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS threads_summaries_before_insert
+            BEFORE INSERT ON threads BEGIN
+                UPDATE summaries SET stale = 1, message_count = NULL
+                WHERE thread_id = NEW.thread_id;
+            END
+        ''')
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS threads_messages_after_insert
+            AFTER INSERT ON threads BEGIN
+                {self._EXPLODE_MESSAGES_SQL.format(thread='NEW')}
+            END
+        ''')
+        # Updates are diffed by position: rows (and FTS entries) of unchanged
+        # messages are kept, so appending only indexes the new messages
+        c.execute('DROP TRIGGER IF EXISTS threads_messages_after_update')
+        c.execute('''
+            CREATE TRIGGER threads_messages_after_update
+            AFTER UPDATE OF messages ON threads BEGIN
+                DELETE FROM messages
+                WHERE thread_id = OLD.thread_id AND CASE
+                    WHEN NEW.thread_id IS NOT OLD.thread_id OR NOT json_valid(NEW.messages) THEN 1
+                    WHEN position >= json_array_length(NEW.messages) THEN 1
+                    ELSE json_extract(NEW.messages, '$[' || position || '].id') IS NOT message_id
+                        OR json_extract(NEW.messages, '$[' || position || '].sender') IS NOT sender
+                        OR json_extract(NEW.messages, '$[' || position || '].timestamp') IS NOT timestamp
+                        OR json_extract(NEW.messages, '$[' || position || '].body') IS NOT body
+                END;
+                INSERT INTO messages (thread_id, message_id, position, sender, timestamp, body)
+                SELECT NEW.thread_id, json_extract(value, '$.id'), key,
+                       json_extract(value, '$.sender'), json_extract(value, '$.timestamp'),
+                       json_extract(value, '$.body')
+                FROM json_each(NEW.messages)
+                WHERE json_valid(NEW.messages) AND key NOT IN (
+                    SELECT position FROM messages WHERE thread_id = NEW.thread_id
+                );
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS threads_messages_after_delete
+            AFTER DELETE ON threads BEGIN
+                DELETE FROM messages WHERE thread_id = OLD.thread_id;
+            END
+        ''')
+        
+        try:
+            c.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                    body, content='messages', content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            ''')
+            self.fts_enabled = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5; search falls back to LIKE scans
+            self.fts_enabled = False
+        
+        if self.fts_enabled:
+            c.execute('''
+                CREATE TRIGGER IF NOT EXISTS messages_fts_after_insert
+                AFTER INSERT ON messages BEGIN
+                    INSERT INTO messages_fts (rowid, body) VALUES (NEW.id, NEW.body);
+                END
+            ''')
+            c.execute('''
+                CREATE TRIGGER IF NOT EXISTS messages_fts_after_delete
+                AFTER DELETE ON messages BEGIN
+                    INSERT INTO messages_fts (messages_fts, rowid, body) VALUES ('delete', OLD.id, OLD.body);
+                END
+            ''')
+            c.execute('''
+                CREATE TRIGGER IF NOT EXISTS messages_fts_after_update
+                AFTER UPDATE ON messages BEGIN
+                    INSERT INTO messages_fts (messages_fts, rowid, body) VALUES ('delete', OLD.id, OLD.body);
+                    INSERT INTO messages_fts (rowid, body) VALUES (NEW.id, NEW.body);
+                END
+            ''')
+        
+        if backfill:
+            # Databases created before the messages table existed
+            c.execute('''
+                INSERT INTO messages (thread_id, message_id, position, sender, timestamp, body)
+                SELECT t.thread_id, json_extract(m.value, '$.id'), m.key,
+                       json_extract(m.value, '$.sender'), json_extract(m.value, '$.timestamp'),
+                       json_extract(m.value, '$.body')
+                FROM threads t, json_each(t.messages) m
+                WHERE json_valid(t.messages)
+            ''')
+    
+    def _init_counters_schema(self, c):
+        """Analytics counters kept current by triggers on threads and summaries
+        
+        Dashboard numbers become reads of a handful of rows instead of
+        COUNT(*) scans. (metric, dimension) is e.g. ('summaries_by_status',
+        'approved'); NULL statuses/types use the '' dimension.
+        """
+        backfill = not c.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'analytics_counters'"
+        ).fetchone()
+        
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS analytics_counters (
+                metric TEXT NOT NULL,
+                dimension TEXT NOT NULL DEFAULT '',
+                value INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (metric, dimension)
+            )
+        ''')
+        
+        increment = '''
+            INSERT INTO analytics_counters (metric, dimension, value) VALUES {rows}
+            ON CONFLICT (metric, dimension) DO UPDATE SET value = value + 1;
+        '''
+        decrement = '''
+            UPDATE analytics_counters SET value = value - 1
+            WHERE metric = '{metric}' AND dimension = {dimension};
+        '''
+        
+        # INSERT OR REPLACE doesn't fire delete triggers, so undo the count of
+        # the row it is about to replace
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS counters_threads_before_insert
+            BEFORE INSERT ON threads
+            WHEN EXISTS (SELECT 1 FROM threads WHERE thread_id = NEW.thread_id) BEGIN
+                UPDATE analytics_counters SET value = value - 1
+                WHERE metric = 'threads' AND dimension = '';
+            END
+        ''')
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS counters_threads_after_insert
+            AFTER INSERT ON threads BEGIN
+                {increment.format(rows="('threads', '', 1)")}
+            END
+        ''')
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS counters_threads_after_delete
+            AFTER DELETE ON threads BEGIN
+                {decrement.format(metric='threads', dimension="''")}
+            END
+        ''')
+        
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS counters_summaries_after_insert
+            AFTER INSERT ON summaries BEGIN
+                {increment.format(rows="""('summaries', '', 1),
+                    ('summaries_by_status', ifnull(NEW.status, ''), 1),
+                    ('summaries_by_type', ifnull(NEW.summary_type, ''), 1)""")}
+            END
+        ''')
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS counters_summaries_after_delete
+            AFTER DELETE ON summaries BEGIN
+                {decrement.format(metric='summaries', dimension="''")}
+                {decrement.format(metric='summaries_by_status', dimension="ifnull(OLD.status, '')")}
+                {decrement.format(metric='summaries_by_type', dimension="ifnull(OLD.summary_type, '')")}
+            END
+        ''')
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS counters_summaries_after_update_status
+            AFTER UPDATE OF status ON summaries
+            WHEN OLD.status IS NOT NEW.status BEGIN
+                {decrement.format(metric='summaries_by_status', dimension="ifnull(OLD.status, '')")}
+                {increment.format(rows="('summaries_by_status', ifnull(NEW.status, ''), 1)")}
+            END
+        ''')
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS counters_summaries_after_update_type
+            AFTER UPDATE OF summary_type ON summaries
+            WHEN OLD.summary_type IS NOT NEW.summary_type BEGIN
+                {decrement.format(metric='summaries_by_type', dimension="ifnull(OLD.summary_type, '')")}
+                {increment.format(rows="('summaries_by_type', ifnull(NEW.summary_type, ''), 1)")}
+            END
+        ''')
+        
+        if backfill:
+            # Databases created before the counters existed
+            c.execute(f'INSERT INTO analytics_counters (metric, dimension, value) {self.COUNTERS_SQL}')
+    
+    # Tables whose changes are tracked in table_versions
+    VERSIONED_TABLES = ('threads', 'summaries')
+    
+    def _init_versions_schema(self, c):
+        """Per-table change counters, bumped by triggers on every write
+        
+        Readers use them as cheap validators (ETags) instead of re-running
+        queries. The 'epoch' row is random per database, so versions of a
+        recreated database never collide with ones handed out before.
+        """
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS table_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        c.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES ('epoch', abs(random()) % 1000000000)")
+        
+        for table in self.VERSIONED_TABLES:
+            c.execute('INSERT OR IGNORE INTO table_versions (name) VALUES (?)', (table,))
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                c.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS versions_{table}_after_{event.lower()}
+                    AFTER {event} ON {table} BEGIN
+                        UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                    END
+                ''')
+    
+    def get_table_versions(self, tables) -> Dict[str, int]:
+        """Current change counters of the given tables, plus the database epoch"""
+        names = ('epoch', *tables)
+        with self.get_db() as conn:
+            rows = conn.execute(
+                f"SELECT name, version FROM table_versions WHERE name IN ({', '.join('?' * len(names))})",
+                names
+            ).fetchall()
+        return {row['name']: row['version'] for row in rows}
+    
     def get_connection(self):
-        """Get database connection with row factory"""
-        conn = sqlite3.connect(self.database_path)
+        """Get a new database connection with row factory and PRAGMAs applied"""
+        conn = sqlite3.connect(self.database_path, check_same_thread=False, factory=TimedConnection)
         conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+    
+    def _acquire(self):
+        """Borrow a connection, opening one if the pool has room"""
+        if self._pid != os.getpid():
+            # Forked (e.g. gunicorn preload); never share parent connections
+            self._init_pool()
+        
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.pool_size
+                if create:
+                    self._created += 1
+            
+            if create:
+                try:
+                    conn = self.get_connection()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                with self._lock:
+                    self._waits += 1
+                waited_from = time.perf_counter()
+                try:
+                    conn = self._idle.get(timeout=self.pool_timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise TimeoutError(
+                        f"No database connection available within {self.pool_timeout}s"
+                    )
+                finally:
+                    DB_POOL_WAIT.observe(time.perf_counter() - waited_from)
+        
+        with self._lock:
+            self._checkouts += 1
         return conn
     
+    def _release(self, conn, discard: bool = False):
+        """Return a connection to the pool, or close it if it is unusable"""
+        if not discard and conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+        
+        if discard or self._pid != os.getpid():
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        
+        self._idle.put(conn)
+    
     @contextmanager
     def get_db(self):
-        """Context manager for database connections"""
-        conn = self.get_connection()
+        """Context manager for pooled database connections"""
+        conn = self._acquire()
+        acquired_at = time.perf_counter()
+        discard = False
+        callbacks = []
         try:
             yield conn
             conn.commit()
-        except Exception:
-            conn.rollback()
+            callbacks = conn.after_commit[:]
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
             raise
         finally:
+            conn.after_commit.clear()
+            self._release(conn, discard)
+            DB_CONNECTION_HOLD.observe(time.perf_counter() - acquired_at)
+        
+        # Outside the pool, so callbacks may use the database themselves. The
+        # transaction has committed: a failing callback must not fail the caller
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("after_commit callback failed")
+    
+    def iter_keyset(self, select: str, conditions: List[str], params: List,
+                    order: Sequence[str], descending: bool = True,
+                    after: Optional[Sequence] = None, limit: Optional[int] = None,
+                    batch_size: int = 500):
+        """Yield the rows of select (a SELECT ... FROM ...) in order, batch_size per query
+        
+        Each batch is read on a pooled connection that is released before
+        its rows are yielded; the next batch resumes after the last row's
+        order key. So memory stays bounded for any result size, and a slow
+        consumer (a streamed response) never holds a connection. order must
+        be unique per row and selected under its column names; after resumes
+        past a key, limit caps the rows read. Batches are separate reads:
+        rows written meanwhile may or may not appear, but none repeat.
+        """
+        direction = 'DESC' if descending else 'ASC'
+        order_by = ', '.join(f'{column} {direction}' for column in order)
+        keyset = f"({', '.join(order)}) {'<' if descending else '>'} ({', '.join('?' * len(order))})"
+        names = [column.split('.')[-1] for column in order]
+        
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            where = conditions + ([keyset] if after is not None else [])
+            query = select
+            if where:
+                query += ' WHERE ' + ' AND '.join(where)
+            query += f' ORDER BY {order_by} LIMIT ?'
+            
+            with self.get_db() as conn:
+                rows = conn.execute(query, [*params, *(after or ()), size]).fetchall()
+            yield from rows
+            
+            if len(rows) < size:
+                return
+            if remaining is not None:
+                remaining -= len(rows)
+            after = [rows[-1][name] for name in names]
+    
+    def close_all(self):
+        """Close every idle pooled connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
             conn.close()
-
+            with self._lock:
+                self._created -= 1
+    
+    def get_pool_stats(self) -> Dict:
+        """Get connection pool statistics"""
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                "pool_size": self.pool_size,
+                "open_connections": self._created,
+                "idle": idle,
+                "in_use": self._created - idle,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "journal_mode": self.pragmas.get('journal_mode')
+            }
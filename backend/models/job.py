@@ -0,0 +1,77 @@
+"""
+Job Model
+"""
+import json
+from typing import Dict, Optional
+
+
+class Job:
+    """Asynchronous job model"""
+
+    def __init__(
+        self,
+        job_type: str,
+        payload: Dict,
+        status: str = 'queued',
+        attempts: int = 0,
+        max_attempts: int = 3,
+        result: Optional[Dict] = None,
+        error: Optional[str] = None,
+        lease_owner: Optional[str] = None,
+        lease_expires_at: Optional[float] = None,
+        run_after: float = 0,
+        id: Optional[int] = None,
+        created_at: Optional[str] = None,
+        updated_at: Optional[str] = None,
+        finished_at: Optional[str] = None
+    ):
+        self.id = id
+        self.job_type = job_type
+        self.payload = payload
+        self.status = status
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.result = result
+        self.error = error
+        self.lease_owner = lease_owner
+        self.lease_expires_at = lease_expires_at
+        self.run_after = run_after
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.finished_at = finished_at
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'payload': self.payload,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'finished_at': self.finished_at
+        }
+
+    @classmethod
+    def from_row(cls, row) -> 'Job':
+        """Create from database row"""
+        return cls(
+            id=row['id'],
+            job_type=row['job_type'],
+            payload=json.loads(row['payload']) if row['payload'] else {},
+            status=row['status'],
+            attempts=row['attempts'],
+            max_attempts=row['max_attempts'],
+            result=json.loads(row['result']) if row['result'] else None,
+            error=row['error'],
+            lease_owner=row['lease_owner'],
+            lease_expires_at=row['lease_expires_at'],
+            run_after=row['run_after'],
+            created_at=row['created_at'],
+            updated_at=row['updated_at'],
+            finished_at=row['finished_at']
+        )
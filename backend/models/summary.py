@@ -2,7 +2,7 @@
 Summary Model
 """
 import json
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -20,7 +20,10 @@ class Summary:
         id: Optional[int] = None,
         created_at: Optional[str] = None,
         approved_at: Optional[str] = None,
-        approved_by: Optional[str] = None
+        approved_by: Optional[str] = None,
+        message_count: Optional[int] = None,
+        rule_state: Optional[Dict] = None,
+        stale: bool = False
     ):
         self.id = id
         self.thread_id = thread_id
@@ -32,9 +35,14 @@ class Summary:
         self.created_at = created_at or datetime.now().isoformat()
         self.approved_at = approved_at
         self.approved_by = approved_by
+        self.message_count = message_count
+        self.rule_state = rule_state
+        self.stale = stale
     
-    def to_dict(self) -> Dict:
-        """Convert to dictionary"""
+    def to_dict(self, fields: Optional[List[str]] = None) -> Dict:
+        """Convert to dictionary, optionally limited to the given fields"""
+        if fields:
+            return {field: getattr(self, field) for field in fields}
         return {
             'id': self.id,
             'thread_id': self.thread_id,
@@ -45,23 +53,68 @@ class Summary:
             'crm_context': self.crm_context,
             'created_at': self.created_at,
             'approved_at': self.approved_at,
-            'approved_by': self.approved_by
+            'approved_by': self.approved_by,
+            'message_count': self.message_count,
+            'stale': self.stale
         }
     
+    @classmethod
+    def for_thread(cls, thread, summary_data: Dict, message_count: Optional[int] = None,
+                   rule_state: Optional[Dict] = None) -> 'Summary':
+        """Create a pending summary for a thread with default CRM context
+        
+        message_count records how many of the thread's messages the summary
+        covers (all of them unless given), so later appends can be
+        summarized incrementally.
+        """
+        if message_count is None and thread.messages is not None:
+            message_count = len(thread.messages)
+        
+        crm_context = {
+            "order_id": thread.order_id,
+            "product": thread.product,
+            "customer_lifetime_value": "N/A",
+            "previous_interactions": 0,
+            "order_value": "N/A"
+        }
+
+        return cls(
+            thread_id=thread.thread_id,
+            original_summary=summary_data,
+            edited_summary=summary_data,
+            status='pending',
+            summary_type=summary_data.get('summary_type', 'unknown'),
+            crm_context=crm_context,
+            message_count=message_count,
+            rule_state=rule_state
+        )
+
     @classmethod
     def from_row(cls, row) -> 'Summary':
-        """Create from database row"""
+        """Create from database row (partial rows leave missing columns as None)"""
+        columns = row.keys()
+        
+        def get(column):
+            return row[column] if column in columns else None
+        
+        def get_json(column):
+            value = get(column)
+            return json.loads(value) if value else None
+        
         return cls(
             id=row['id'],
-            thread_id=row['thread_id'],
-            original_summary=json.loads(row['original_summary']),
-            edited_summary=json.loads(row['edited_summary']),
-            status=row['status'],
-            summary_type=row['summary_type'],
-            crm_context=json.loads(row['crm_context']) if row['crm_context'] else None,
-            created_at=row['created_at'],
-            approved_at=row['approved_at'],
-            approved_by=row['approved_by']
+            thread_id=get('thread_id'),
+            original_summary=get_json('original_summary'),
+            edited_summary=get_json('edited_summary'),
+            status=get('status'),
+            summary_type=get('summary_type'),
+            crm_context=get_json('crm_context'),
+            created_at=get('created_at'),
+            approved_at=get('approved_at'),
+            approved_by=get('approved_by'),
+            message_count=get('message_count'),
+            rule_state=get_json('rule_state'),
+            stale=bool(get('stale'))
         )
     
     def approve(self, user: str):
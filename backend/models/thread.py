@@ -9,6 +9,9 @@ from datetime import datetime
 class Thread:
     """Email thread model"""
     
+    REQUIRED_FIELDS = ('thread_id', 'topic', 'subject', 'initiated_by',
+                       'order_id', 'product', 'messages')
+    
     def __init__(
         self,
         thread_id: str,
@@ -17,8 +20,9 @@ class Thread:
         initiated_by: str,
         order_id: str,
         product: str,
-        messages: List[Dict],
-        created_at: Optional[str] = None
+        messages: Optional[List[Dict]],
+        created_at: Optional[str] = None,
+        message_count: Optional[int] = None
     ):
         self.thread_id = thread_id
         self.topic = topic
@@ -28,9 +32,12 @@ class Thread:
         self.product = product
         self.messages = messages
         self.created_at = created_at or datetime.now().isoformat()
+        self.message_count = len(messages) if messages is not None else message_count
     
-    def to_dict(self) -> Dict:
-        """Convert to dictionary"""
+    def to_dict(self, fields: Optional[List[str]] = None) -> Dict:
+        """Convert to dictionary, optionally limited to the given fields"""
+        if fields:
+            return {field: getattr(self, field) for field in fields}
         return {
             'thread_id': self.thread_id,
             'topic': self.topic,
@@ -58,15 +65,21 @@ class Thread:
     
     @classmethod
     def from_row(cls, row) -> 'Thread':
-        """Create from database row"""
+        """Create from database row (partial rows leave missing columns as None)"""
+        columns = row.keys()
+        
+        def get(column):
+            return row[column] if column in columns else None
+        
         return cls(
             thread_id=row['thread_id'],
-            topic=row['topic'],
-            subject=row['subject'],
-            initiated_by=row['initiated_by'],
-            order_id=row['order_id'],
-            product=row['product'],
-            messages=json.loads(row['messages']),
-            created_at=row['created_at']
+            topic=get('topic'),
+            subject=get('subject'),
+            initiated_by=get('initiated_by'),
+            order_id=get('order_id'),
+            product=get('product'),
+            messages=json.loads(row['messages']) if 'messages' in columns else None,
+            created_at=get('created_at'),
+            message_count=get('message_count')
         )
 
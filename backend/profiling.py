@@ -0,0 +1,172 @@
+"""
+On-Demand Request Profiling
+
+Requests are profiled with cProfile when they carry the profiling header
+or are picked by the sampling rate. Each profile is stored in the profile
+directory as <id>.prof (pstats), <id>.folded (collapsed stacks, for
+flamegraph.pl / speedscope) and <id>.json (request metadata). Only the
+newest max_profiles are kept.
+"""
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+PROFILE_ID_RE = re.compile(r'^\d{8}T\d{12}-[0-9a-f]{8}$')
+
+PROFILE_FORMATS = {
+    'pstats': ('.prof', 'application/octet-stream'),
+    'collapsed': ('.folded', 'text/plain')
+}
+
+
+class RequestProfiler:
+    """Profiles selected requests and keeps a bounded ring of profiles on disk
+
+    cProfile only sees the request's own thread; work handed to the batch
+    summarizer's pools shows up as time spent waiting on futures.
+    """
+
+    HEADER = 'X-Profile'
+
+    def __init__(self, directory: str, sample_rate: float = 0.0,
+                 max_profiles: int = 50, token: str = ''):
+        self.directory = os.path.abspath(directory)
+        self.sample_rate = sample_rate
+        self.max_profiles = max(1, max_profiles)
+        self.token = token
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def wanted(self, headers) -> Optional[str]:
+        """Why a request should be profiled ('header' or 'sampled'), or None"""
+        value = headers.get(self.HEADER)
+        if value and (not self.token or value == self.token):
+            return 'header'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Start profiling the current thread"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already active (e.g. a debugger)
+            return None
+        return profile
+
+    def finish(self, profile: cProfile.Profile, metadata: Dict) -> str:
+        """Stop a profile, store it and trim the ring; returns the profile id"""
+        profile.disable()
+        profile_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+        base = os.path.join(self.directory, profile_id)
+
+        profile.dump_stats(base + '.prof')
+        stats = pstats.Stats(profile)
+        with open(base + '.folded', 'w') as f:
+            f.writelines(f'{stack} {weight}\n' for stack, weight in collapse(stats))
+
+        metadata = dict(metadata, id=profile_id, created_at=datetime.utcnow().isoformat(),
+                        total_seconds=round(stats.total_tt, 6))
+        with open(base + '.json', 'w') as f:
+            json.dump(metadata, f)
+
+        self._trim()
+        return profile_id
+
+    def _trim(self):
+        with self._lock:
+            for profile_id in self._ids()[self.max_profiles:]:
+                for suffix in ('.json', '.prof', '.folded'):
+                    try:
+                        os.remove(os.path.join(self.directory, profile_id + suffix))
+                    except FileNotFoundError:
+                        pass
+
+    def _ids(self) -> List[str]:
+        """Stored profile ids, newest first"""
+        return sorted(
+            (name[:-5] for name in os.listdir(self.directory)
+             if name.endswith('.json') and PROFILE_ID_RE.match(name[:-5])),
+            reverse=True
+        )
+
+    def list_profiles(self) -> List[Dict]:
+        """Metadata of stored profiles, newest first"""
+        profiles = []
+        for profile_id in self._ids():
+            profile = self.get_profile(profile_id)
+            if profile:
+                profiles.append(profile)
+        return profiles
+
+    def get_profile(self, profile_id: str) -> Optional[Dict]:
+        """Metadata of one profile"""
+        if not PROFILE_ID_RE.match(profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, profile_id + '.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def profile_path(self, profile_id: str, fmt: str) -> Optional[str]:
+        """Path of a stored profile file in the given format"""
+        if fmt not in PROFILE_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(PROFILE_FORMATS)}")
+        if not PROFILE_ID_RE.match(profile_id):
+            return None
+        path = os.path.join(self.directory, profile_id + PROFILE_FORMATS[fmt][0])
+        return path if os.path.exists(path) else None
+
+
+def collapse(stats: pstats.Stats, max_depth: int = 64):
+    """Approximate collapsed stacks ("a;b;c <microseconds>") from a cProfile run
+
+    cProfile records caller -> callee edges rather than whole stacks, so a
+    function's own time is split across the paths reaching it in proportion
+    to the time each caller spent in it.
+    """
+    entries = stats.stats
+    callees: Dict = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    def label(func) -> str:
+        filename, line, name = func
+        if filename == '~':
+            return name     # built-ins, e.g. <built-in method json.loads>
+        return f'{name} ({os.path.basename(filename)}:{line})'
+
+    weights: Dict[str, float] = {}
+
+    def walk(func, path, share):
+        _, _, tottime, cumtime, _ = entries[func]
+        path = path + (label(func),)
+        stack = ';'.join(path)
+        weights[stack] = weights.get(stack, 0.0) + tottime * share
+        if len(path) >= max_depth or not cumtime:
+            return
+        for callee, edge_cumtime in callees.get(func, ()):
+            if label(callee) in path:
+                continue    # recursion is folded into the outer frame
+            walk(callee, path, share * edge_cumtime / entries[callee][3]
+                 if entries[callee][3] else 0.0)
+
+    for func, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(func, (), 1.0)
+
+    for stack, seconds in sorted(weights.items()):
+        microseconds = int(round(seconds * 1e6))
+        if microseconds > 0:
+            yield stack, microseconds
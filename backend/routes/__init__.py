@@ -5,8 +5,13 @@ from .thread_routes import thread_bp
 from .summary_routes import summary_bp
 from .analytics_routes import analytics_bp
 from .health_routes import health_bp
+from .job_routes import job_bp
+from .metrics_routes import metrics_bp
+from .profile_routes import profile_bp
+from .audit_routes import audit_bp
 
-__all__ = ['thread_bp', 'summary_bp', 'analytics_bp', 'health_bp']
+__all__ = ['thread_bp', 'summary_bp', 'analytics_bp', 'health_bp', 'job_bp', 'metrics_bp', 'profile_bp',
+           'audit_bp']
 
 
 def register_blueprints(app):
@@ -15,4 +20,8 @@ def register_blueprints(app):
     app.register_blueprint(thread_bp, url_prefix='/api/threads')
     app.register_blueprint(summary_bp, url_prefix='/api/summaries')
     app.register_blueprint(analytics_bp, url_prefix='/api')
+    app.register_blueprint(job_bp, url_prefix='/api/jobs')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+    app.register_blueprint(profile_bp, url_prefix='/api/admin/profiles')
+    app.register_blueprint(audit_bp, url_prefix='/api/audit')
 
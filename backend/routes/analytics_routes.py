@@ -1,12 +1,15 @@
 """
 Analytics API Routes
 """
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app
+from routes.conditional import conditional_get
+from routes.streaming import stream_list
 
 analytics_bp = Blueprint('analytics', __name__)
 
 
 @analytics_bp.route('/analytics', methods=['GET'])
+@conditional_get('threads', 'summaries')
 def get_analytics():
     """Get analytics dashboard data"""
     analytics_service = current_app.analytics_service
@@ -14,6 +17,51 @@ def get_analytics():
     return jsonify(analytics_service.get_dashboard_analytics())
 
 
+@analytics_bp.route('/analytics/timeseries', methods=['GET'])
+def get_analytics_timeseries():
+    """Get bucketed summary activity from the pre-aggregated rollups
+    
+    Optional: granularity=hour|day (default day), start= and end= ISO
+    timestamps in UTC (default: the last 7 days / 48 hours).
+    """
+    rollup_service = current_app.rollup_service
+    
+    try:
+        return jsonify(rollup_service.get_timeseries(
+            granularity=request.args.get('granularity', 'day'),
+            start=request.args.get('start'),
+            end=request.args.get('end')
+        ))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@analytics_bp.route('/export', methods=['GET'])
+def export_approved():
+    """Stream approved summaries for CRM sync, oldest approval first
+    
+    NDJSON by default (format=json for a {"items": [...]} document): one
+    export record per line, then {"next_cursor": ..., "has_more": ...}.
+    Pass next_cursor back as cursor= to get only later approvals;
+    approved_after= starts from a timestamp instead, limit= caps the rows.
+    """
+    export_service = current_app.export_service
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+    
+    try:
+        page = export_service.iter_approved(cursor, request.args.get('approved_after'), limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return stream_list(page, trailer=lambda: {
+        "next_cursor": page.last_cursor or cursor,
+        "has_more": page.next_cursor is not None
+    }, ndjson=request.args.get('format', 'ndjson') == 'ndjson')
+
+
 @analytics_bp.route('/export/<int:summary_id>', methods=['GET'])
 def export_summary(summary_id):
     """Export approved summary for CRM/downstream use"""
@@ -0,0 +1,49 @@
+"""
+Audit Log API Routes
+"""
+from flask import Blueprint, request, jsonify, current_app
+from services.pagination import split_args
+from routes.streaming import stream_list
+
+audit_bp = Blueprint('audit', __name__)
+
+
+@audit_bp.route('', methods=['GET'])
+def get_audit_log():
+    """Get a page of audit entries, newest first
+    
+    Optional filters: thread_id, user, action (comma-separated lists),
+    start= and end= UTC timestamps; month=YYYY-MM reads that month's
+    archive instead of the live log. limit= (default 100) and cursor= as
+    for the other list endpoints; the response is {"items": [...], "next_cursor": ...}.
+    """
+    audit_service = current_app.audit_service
+    
+    filters = {
+        column: split_args(request.args.getlist(column))
+        for column in ('thread_id', 'user', 'action')
+    }
+    filters['start'] = request.args.get('start')
+    filters['end'] = request.args.get('end')
+    
+    try:
+        page = audit_service.iter_entries(
+            filters,
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            month=request.args.get('month')
+        )
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return stream_list((entry.to_dict() for entry in page), page)
+
+
+@audit_bp.route('/archives', methods=['GET'])
+def get_audit_archives():
+    """List the monthly audit archive files"""
+    audit_service = current_app.audit_service
+    
+    return jsonify(audit_service.list_archives())
@@ -0,0 +1,34 @@
+"""
+Conditional GET Support
+"""
+import functools
+from flask import request, current_app, make_response
+
+
+def conditional_get(*tables):
+    """Tag GET responses with an ETag built from the tables' change counters
+    
+    A request whose If-None-Match still matches is answered 304 before the
+    view runs, so no query or serialization happens. The versions are read
+    before the view, so a write racing with it can only make the ETag
+    older than the body (the next request refetches), never newer.
+    """
+    def decorate(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = current_app.db.get_table_versions(tables)
+            etag = '.'.join(str(versions.get(name, 0)) for name in ('epoch', *tables))
+            
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            # Weak: equal content, not necessarily byte-identical (e.g. compression)
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorate
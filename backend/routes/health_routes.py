@@ -14,9 +14,13 @@ def health_check():
     
     nlp_method = "openai" if nlp_service.openai_api_key else "rule_based"
     
+    summary_cache = nlp_service.cache
+    
     return jsonify({
         "status": "healthy",
         "nlp_method": nlp_method,
+        "summary_cache": summary_cache.get_stats() if summary_cache else None,
+        "database_pool": current_app.db.get_pool_stats(),
         "timestamp": datetime.now().isoformat()
     })
 
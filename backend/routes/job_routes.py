@@ -0,0 +1,30 @@
+"""
+Job API Routes
+"""
+from flask import Blueprint, request, jsonify, current_app
+
+job_bp = Blueprint('jobs', __name__)
+
+
+@job_bp.route('', methods=['GET'])
+def get_jobs():
+    """Get recent jobs"""
+    job_service = current_app.job_service
+    
+    status = request.args.get('status')
+    limit = request.args.get('limit', 100, type=int)
+    jobs = job_service.get_jobs(status, limit)
+    
+    return jsonify([job.to_dict() for job in jobs])
+
+
+@job_bp.route('/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get job status and result"""
+    job_service = current_app.job_service
+    
+    job = job_service.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    
+    return jsonify(job.to_dict())
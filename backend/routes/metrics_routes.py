@@ -0,0 +1,13 @@
+"""
+Metrics Routes
+"""
+from flask import Blueprint, Response
+from metrics import REGISTRY
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Request, service, database and NLP metrics in Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
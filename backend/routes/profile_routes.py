@@ -0,0 +1,49 @@
+"""
+Profile Admin Routes
+"""
+from flask import Blueprint, request, jsonify, current_app, send_file
+from profiling import PROFILE_FORMATS
+
+profile_bp = Blueprint('profiles', __name__)
+
+
+@profile_bp.before_request
+def require_profiling():
+    """Profiles are only exposed while profiling is enabled"""
+    profiler = current_app.profiler
+    if not profiler:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    if profiler.token and request.headers.get('X-Profile-Token') != profiler.token:
+        return jsonify({"error": "Invalid profiling token"}), 403
+
+
+@profile_bp.route('', methods=['GET'])
+def list_profiles():
+    """List stored profiles, newest first"""
+    return jsonify(current_app.profiler.list_profiles())
+
+
+@profile_bp.route('/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Get a profile's request metadata"""
+    profile = current_app.profiler.get_profile(profile_id)
+    if not profile:
+        return jsonify({"error": "Profile not found"}), 404
+    
+    return jsonify(profile)
+
+
+@profile_bp.route('/<profile_id>/download', methods=['GET'])
+def download_profile(profile_id):
+    """Download a profile as pstats (default) or collapsed stacks"""
+    fmt = request.args.get('format', 'pstats')
+    try:
+        path = current_app.profiler.profile_path(profile_id, fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not path:
+        return jsonify({"error": "Profile not found"}), 404
+    
+    suffix, mimetype = PROFILE_FORMATS[fmt]
+    return send_file(path, mimetype=mimetype, as_attachment=True,
+                     download_name=f'{profile_id}{suffix}')
@@ -0,0 +1,91 @@
+"""
+Streaming List Responses
+"""
+import zlib
+from typing import Callable, Dict, Iterable, Optional
+from flask import Response, request, current_app, stream_with_context
+
+# Serialized items are buffered into chunks of about this size before they
+# are handed to the server (and the compressor)
+CHUNK_SIZE = 64 * 1024
+
+ENCODINGS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS
+}
+
+
+def stream_list(items: Iterable, page=None, trailer: Optional[Callable[[], Dict]] = None,
+                ndjson: Optional[bool] = None) -> Response:
+    """Stream dicts as a JSON array, serializing each as it is produced
+    
+    With a page (a KeysetPage) the body is {"items": [...], "next_cursor": ...}
+    instead, the cursor being known once the items are exhausted; a trailer
+    callable supplies other keys to follow the items the same way. NDJSON
+    (?format=ndjson unless ndjson is given) writes one item per line,
+    followed by the trailer as a last line. The body is gzip/deflate
+    compressed when the client accepts it and STREAM_COMPRESSION is on.
+    Errors after the first chunk can't change the status, so callers
+    validate their arguments before streaming.
+    """
+    if ndjson is None:
+        ndjson = request.args.get('format') == 'ndjson'
+    if page is not None and trailer is None:
+        trailer = lambda: {"next_cursor": page.next_cursor}
+    dumps = current_app.json.dumps
+    
+    def encode(value) -> str:
+        return dumps(value, separators=(',', ':'))
+    
+    def pieces():
+        if ndjson:
+            for item in items:
+                yield encode(item) + '\n'
+            if trailer is not None:
+                yield encode(trailer()) + '\n'
+            return
+        
+        yield '{"items":[' if trailer is not None else '['
+        separator = ''
+        for item in items:
+            yield separator + encode(item)
+            separator = ','
+        if trailer is not None:
+            # Splice the trailer's keys in after the items
+            yield '],' + encode(trailer())[1:]
+        else:
+            yield ']'
+    
+    def chunks():
+        buffer = []
+        size = 0
+        for piece in pieces():
+            buffer.append(piece)
+            size += len(piece)
+            if size >= CHUNK_SIZE:
+                yield ''.join(buffer).encode('utf-8')
+                buffer = []
+                size = 0
+        yield ''.join(buffer).encode('utf-8')
+    
+    body = chunks()
+    headers = {'Vary': 'Accept-Encoding'}
+    encoding = None
+    if current_app.config.get('STREAM_COMPRESSION', True):
+        encoding = request.accept_encodings.best_match(list(ENCODINGS))
+    if encoding:
+        body = _compress(body, encoding, current_app.config.get('STREAM_COMPRESSION_LEVEL', 6))
+        headers['Content-Encoding'] = encoding
+    
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
+
+
+def _compress(chunks: Iterable[bytes], encoding: str, level: int):
+    """Compress a chunk stream incrementally, flushing once at the end"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, ENCODINGS[encoding])
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
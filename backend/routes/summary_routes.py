@@ -2,22 +2,47 @@
 Summary API Routes
 """
 from flask import Blueprint, request, jsonify, current_app
+from services.pagination import split_args
+from routes.conditional import conditional_get
+from routes.streaming import stream_list
 
 summary_bp = Blueprint('summaries', __name__)
 
 
 @summary_bp.route('', methods=['GET'])
+@conditional_get('summaries', 'threads')
 def get_summaries():
-    """Get all summaries"""
+    """Get summaries
+    
+    Optional filters: status, summary_type, thread_id, topic, product,
+    order_id (comma-separated lists), created_after, created_before,
+    stale=true|false; fields= for a sparse selection. With limit= the response is a page
+    {"items": [...], "next_cursor": ...}; pass next_cursor back as cursor=.
+    The body is streamed; format=ndjson gives one summary per line.
+    """
     summary_service = current_app.summary_service
     
-    status = request.args.get('status')
-    summaries = summary_service.get_all_summaries(status)
+    filters = {
+        column: split_args(request.args.getlist(column))
+        for column in ('status', 'summary_type', 'thread_id', 'topic', 'product', 'order_id')
+    }
+    filters['created_after'] = request.args.get('created_after')
+    filters['created_before'] = request.args.get('created_before')
+    if request.args.get('stale'):
+        filters['stale'] = request.args['stale'].lower() in ('1', 'true', 'yes')
+    fields = split_args(request.args.getlist('fields')) or None
+    limit = request.args.get('limit', type=int)
+    
+    try:
+        page = summary_service.iter_summaries(filters, fields, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    return jsonify([summary.to_dict() for summary in summaries])
+    return stream_list((summary.to_dict(fields) for summary in page), page if limit else None)
 
 
 @summary_bp.route('/<int:summary_id>', methods=['GET'])
+@conditional_get('summaries', 'threads')
 def get_summary(summary_id):
     """Get specific summary"""
     summary_service = current_app.summary_service
@@ -87,3 +112,88 @@ def reject_summary(summary_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+# Filters of the bulk endpoints; the list-valued ones also take comma-separated strings
+BULK_LIST_FILTERS = ('status', 'summary_type', 'thread_id', 'topic', 'product', 'order_id')
+BULK_FILTERS = BULK_LIST_FILTERS + ('created_after', 'created_before', 'stale')
+
+
+def _bulk_filters(filters):
+    """Validate and normalize the "filter" object of a bulk request"""
+    if not isinstance(filters, dict):
+        raise ValueError("filter must be an object")
+    unknown = set(filters) - set(BULK_FILTERS)
+    if unknown:
+        raise ValueError(f"Unsupported filter fields: {', '.join(sorted(unknown))}")
+    
+    normalized = dict(filters)
+    for column in BULK_LIST_FILTERS:
+        if column in filters:
+            values = filters[column]
+            values = values if isinstance(values, list) else [values]
+            normalized[column] = split_args(str(value) for value in values)
+    return normalized
+
+
+@summary_bp.route('/approve-batch', methods=['POST'])
+def approve_batch():
+    """Approve many summaries in one transaction
+    
+    Body: {"summary_ids": [...]} or {"filter": {...}} (the list filters of
+    GET /api/summaries), plus "user". Returns per-id results.
+    """
+    return _bulk_transition('approve')
+
+
+@summary_bp.route('/reject-batch', methods=['POST'])
+def reject_batch():
+    """Reject many summaries in one transaction (body as approve-batch, plus "reason")"""
+    return _bulk_transition('reject')
+
+
+def _bulk_transition(action):
+    summary_service = current_app.summary_service
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        summary_ids = data.get('summary_ids')
+        if summary_ids is not None and not isinstance(summary_ids, list):
+            return jsonify({"error": "summary_ids must be a list"}), 400
+        
+        result = summary_service.bulk_transition(
+            action,
+            data.get('user', 'anonymous'),
+            summary_ids=summary_ids,
+            filters=_bulk_filters(data.get('filter') or {}),
+            reason=data.get('reason', '')
+        )
+        
+        return jsonify({"success": True, **result})
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@summary_bp.route('/edit-batch', methods=['POST'])
+def edit_batch():
+    """Save many edited summaries in one transaction
+    
+    Body: {"edits": {"<summary id>": {...edited summary...}, ...}, "user": ...}
+    """
+    summary_service = current_app.summary_service
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        edits = data.get('edits')
+        if not isinstance(edits, dict) or not edits:
+            return jsonify({"error": "edits must be a non-empty object"}), 400
+        
+        result = summary_service.bulk_edit(edits, data.get('user', 'anonymous'))
+        
+        return jsonify({"success": True, **result})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
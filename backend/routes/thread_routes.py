@@ -1,7 +1,12 @@
 """
 Thread API Routes
 """
-from flask import Blueprint, request, jsonify, current_app
+import json
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from services.import_stream import iter_ndjson, iter_envelope_threads
+from services.pagination import split_args
+from routes.conditional import conditional_get
+from routes.streaming import stream_list
 
 thread_bp = Blueprint('threads', __name__)
 
@@ -14,28 +19,110 @@ def import_threads():
     try:
         data = request.json
         threads = data.get('threads', [])
+        chunk_size = request.args.get('chunk_size', type=int)
         
-        imported, total = thread_service.import_threads(threads)
+        result = thread_service.bulk_import_threads(threads, chunk_size=chunk_size)
         
         return jsonify({
             "success": True,
-            "imported": imported,
-            "total": total
+            **result
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@thread_bp.route('/import-stream', methods=['POST'])
+def import_threads_stream():
+    """Import threads by streaming the request body
+    
+    Accepts NDJSON (one thread per line; Content-Type application/x-ndjson
+    or ?format=ndjson) or a {"threads": [...]} envelope / bare JSON array.
+    With ?progress=true the response is NDJSON with one report per chunk.
+    """
+    thread_service = current_app.thread_service
+    
+    chunk_size = request.args.get('chunk_size', type=int)
+    ndjson = (request.args.get('format') == 'ndjson'
+              or request.mimetype in ('application/x-ndjson', 'application/jsonl'))
+    parse = iter_ndjson if ndjson else iter_envelope_threads
+    reports = thread_service.iter_stream_import(parse(request.stream), chunk_size=chunk_size)
+    
+    if request.args.get('progress', 'false').lower() == 'true':
+        def generate():
+            for report in reports:
+                yield json.dumps(report) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    try:
+        for result in reports:
+            pass
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    if result["aborted"]:
+        return jsonify({"success": False, "error": result["aborted"], **result}), 400
+    return jsonify({"success": True, **result})
+
+
 @thread_bp.route('', methods=['GET'])
+@conditional_get('threads')
 def get_threads():
-    """Get all threads"""
+    """Get threads
+    
+    Optional filters: topic, product, order_id (comma-separated lists),
+    created_after, created_before; fields= for a sparse selection. With
+    limit= the response is a page {"items": [...], "next_cursor": ...};
+    pass next_cursor back as cursor= to get the following page. The body
+    is streamed; format=ndjson gives one thread per line.
+    """
     thread_service = current_app.thread_service
     
-    threads = thread_service.get_all_threads()
-    return jsonify([thread.to_dict() for thread in threads])
+    filters = {
+        column: split_args(request.args.getlist(column))
+        for column in ('topic', 'product', 'order_id')
+    }
+    filters['created_after'] = request.args.get('created_after')
+    filters['created_before'] = request.args.get('created_before')
+    fields = split_args(request.args.getlist('fields')) or None
+    limit = request.args.get('limit', type=int)
+    
+    try:
+        page = thread_service.iter_threads(filters, fields, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return stream_list((thread.to_dict(fields) for thread in page), page if limit else None)
+
+
+@thread_bp.route('/search', methods=['GET'])
+def search_threads():
+    """Full-text search over thread messages
+    
+    ?q= terms (matched as phrases), optional sender=, limit=, and raw=true
+    to use FTS5 query syntax.
+    """
+    thread_service = current_app.thread_service
+    
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    
+    try:
+        hits = thread_service.search_messages(
+            query,
+            limit=request.args.get('limit', 20, type=int),
+            sender=request.args.get('sender'),
+            raw=request.args.get('raw', 'false').lower() == 'true'
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({"query": query, "hits": hits})
 
 
 @thread_bp.route('/<thread_id>', methods=['GET'])
+@conditional_get('threads')
 def get_thread(thread_id):
     """Get specific thread"""
     thread_service = current_app.thread_service
@@ -47,51 +134,118 @@ def get_thread(thread_id):
     return jsonify(thread.to_dict())
 
 
+@thread_bp.route('/<thread_id>/messages', methods=['POST'])
+def append_messages(thread_id):
+    """Append new messages to a thread
+    
+    Body: {"messages": [...]}. Only the new messages are stored; the
+    thread's summaries are marked stale so the next /summarize updates
+    the latest one from the new messages alone.
+    """
+    thread_service = current_app.thread_service
+    
+    data = request.get_json(silent=True) or {}
+    if 'messages' not in data:
+        return jsonify({"error": "messages is required"}), 400
+    
+    try:
+        result = thread_service.append_messages(thread_id, data['messages'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    if result is None:
+        return jsonify({"error": "Thread not found"}), 404
+    return jsonify({"success": True, **result})
+
+
 @thread_bp.route('/<thread_id>/summarize', methods=['POST'])
 def summarize_thread(thread_id):
-    """Generate summary for a thread"""
+    """Generate summary for a thread
+    
+    If messages were appended since the latest summary, only those are
+    summarized on top of it ("incremental": true); force=true bypasses
+    both that and the summary cache.
+    """
+    batch_summary_service = current_app.batch_summary_service
+    
+    try:
+        result = batch_summary_service.summarize_thread(thread_id, force=_force_requested())
+        if result is None:
+            return jsonify({"error": "Thread not found"}), 404
+        
+        return jsonify({
+            "success": True,
+            **result
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@thread_bp.route('/<thread_id>/summarize-async', methods=['POST'])
+def summarize_thread_async(thread_id):
+    """Queue summary generation for a thread and return the job immediately"""
     thread_service = current_app.thread_service
-    summary_service = current_app.summary_service
-    nlp_service = current_app.nlp_service
+    job_service = current_app.job_service
     
     try:
-        # Get thread data
-        thread = thread_service.get_thread_by_id(thread_id)
-        if not thread:
+        if not thread_service.get_thread_by_id(thread_id):
             return jsonify({"error": "Thread not found"}), 404
         
-        # Generate summary
-        summary_data = nlp_service.summarize(thread.to_dict())
+        job = job_service.enqueue('summarize_thread', {
+            "thread_id": thread_id,
+            "force": _force_requested()
+        })
         
-        # Add CRM context
-        from models.summary import Summary
-        crm_context = {
-            "order_id": thread.order_id,
-            "product": thread.product,
-            "customer_lifetime_value": "N/A",
-            "previous_interactions": 0,
-            "order_value": "N/A"
-        }
+        return jsonify({
+            "success": True,
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/jobs/{job.id}"
+        }), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# Thread fields summarize-batch can select on (exact match)
+BATCH_FILTERS = ('topic', 'product', 'order_id')
+
+
+@thread_bp.route('/summarize-batch', methods=['POST'])
+def summarize_batch():
+    """Generate summaries for many threads over a worker pool"""
+    batch_summary_service = current_app.batch_summary_service
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        thread_ids = data.get('thread_ids')
+        filters = data.get('filter', data.get('filters')) or {}
+        max_workers = data.get('max_workers')
+        force = _force_requested()
         
-        # Create summary object
-        summary = Summary(
-            thread_id=thread_id,
-            original_summary=summary_data,
-            edited_summary=summary_data,
-            status='pending',
-            summary_type=summary_data.get('summary_type', 'unknown'),
-            crm_context=crm_context
-        )
+        if thread_ids is not None and not isinstance(thread_ids, list):
+            return jsonify({"error": "thread_ids must be a list"}), 400
         
-        # Save summary
-        summary_id = summary_service.create_summary(summary)
-        summary.id = summary_id
+        if not isinstance(filters, dict):
+            return jsonify({"error": "filter must be an object"}), 400
+        unknown = set(filters) - set(BATCH_FILTERS)
+        if unknown:
+            return jsonify({"error": f"Unsupported filter fields: {', '.join(sorted(unknown))}"}), 400
+        invalid = [field for field, value in filters.items() if not isinstance(value, str)]
+        if invalid:
+            return jsonify({"error": f"Filter values must be strings: {', '.join(sorted(invalid))}"}), 400
         
-        return jsonify({
-            "success": True,
-            "summary_id": summary_id,
-            "summary": summary_data
-        })
+        result = batch_summary_service.summarize_batch(
+            thread_ids=thread_ids,
+            filters=filters,
+            max_workers=max_workers,
+            force=force
+        )
+        
+        return jsonify({"success": True, **result})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -106,3 +260,9 @@ def delete_thread(thread_id):
         return jsonify({"success": True})
     return jsonify({"error": "Thread not found"}), 404
 
+
+def _force_requested() -> bool:
+    """Whether the caller asked to bypass the summary cache"""
+    data = request.get_json(silent=True) or {}
+    force = request.args.get('force', str(data.get('force', False)))
+    return force.lower() in ('1', 'true', 'yes')
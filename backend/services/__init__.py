@@ -4,7 +4,13 @@ Business Logic Services Package
 from .thread_service import ThreadService
 from .summary_service import SummaryService
 from .nlp_service import NLPService
+from .summary_cache import SummaryCache
+from .keyword_matcher import KeywordMatcher
 from .analytics_service import AnalyticsService
+from .batch_service import BatchSummaryService
+from .job_service import JobService
 
-__all__ = ['ThreadService', 'SummaryService', 'NLPService', 'AnalyticsService']
+__all__ = ['ThreadService', 'SummaryService', 'NLPService', 'AnalyticsService',
+           'BatchSummaryService', 'JobService', 'SummaryCache',
+           'KeywordMatcher']
 
@@ -2,67 +2,113 @@
 Analytics Business Logic Service
 """
 from typing import Dict
+from metrics import instrumented
 from models.database import Database
 
 
+@instrumented('analytics')
 class AnalyticsService:
-    """Business logic for analytics operations"""
+    """Business logic for analytics operations
+    
+    Counts are read from the trigger-maintained analytics_counters table
+    (see Database._init_counters_schema), so they cost the same however
+    large threads and summaries grow.
+    """
     
     def __init__(self, db: Database):
         self.db = db
     
-    def get_dashboard_analytics(self) -> Dict:
-        """Get dashboard analytics"""
+    def get_counters(self) -> Dict[tuple, int]:
+        """All analytics counters keyed by (metric, dimension)"""
         with self.db.get_db() as conn:
-            # Summary statistics
-            total_threads = conn.execute(
-                'SELECT COUNT(*) as count FROM threads'
-            ).fetchone()['count']
-            
-            total_summaries = conn.execute(
-                'SELECT COUNT(*) as count FROM summaries'
-            ).fetchone()['count']
-            
-            pending_summaries = conn.execute(
-                'SELECT COUNT(*) as count FROM summaries WHERE status = "pending" OR status = "edited"'
-            ).fetchone()['count']
-            
-            approved_summaries = conn.execute(
-                'SELECT COUNT(*) as count FROM summaries WHERE status = "approved"'
-            ).fetchone()['count']
-            
-            # Calculate approval rate
-            approval_rate = 0
-            if total_summaries > 0:
-                approval_rate = (approved_summaries / total_summaries) * 100
+            rows = conn.execute(
+                'SELECT metric, dimension, value FROM analytics_counters'
+            ).fetchall()
             
-            return {
-                "total_threads": total_threads,
-                "total_summaries": total_summaries,
-                "pending_summaries": pending_summaries,
-                "approved_summaries": approved_summaries,
-                "approval_rate": round(approval_rate, 2)
-            }
+            return {(row['metric'], row['dimension']): row['value'] for row in rows}
+    
+    def get_dashboard_analytics(self) -> Dict:
+        """Get dashboard analytics"""
+        counters = self.get_counters()
+        
+        # Summary statistics
+        total_threads = counters.get(('threads', ''), 0)
+        total_summaries = counters.get(('summaries', ''), 0)
+        pending_summaries = (counters.get(('summaries_by_status', 'pending'), 0)
+                             + counters.get(('summaries_by_status', 'edited'), 0))
+        approved_summaries = counters.get(('summaries_by_status', 'approved'), 0)
+        
+        # Calculate approval rate
+        approval_rate = 0
+        if total_summaries > 0:
+            approval_rate = (approved_summaries / total_summaries) * 100
+        
+        return {
+            "total_threads": total_threads,
+            "total_summaries": total_summaries,
+            "pending_summaries": pending_summaries,
+            "approved_summaries": approved_summaries,
+            "approval_rate": round(approval_rate, 2)
+        }
     
     def get_summary_stats_by_type(self) -> Dict:
         """Get summary statistics by type"""
-        with self.db.get_db() as conn:
-            rows = conn.execute('''
-                SELECT summary_type, COUNT(*) as count
-                FROM summaries
-                GROUP BY summary_type
-            ''').fetchall()
-            
-            return {row['summary_type']: row['count'] for row in rows}
+        return self._breakdown('summaries_by_type')
     
     def get_summary_stats_by_status(self) -> Dict:
         """Get summary statistics by status"""
+        return self._breakdown('summaries_by_status')
+    
+    def _breakdown(self, metric: str) -> Dict:
+        """Non-zero counters of one metric by dimension ('' stands for NULL)"""
+        with self.db.get_db() as conn:
+            rows = conn.execute(
+                'SELECT dimension, value FROM analytics_counters WHERE metric = ? AND value != 0',
+                (metric,)
+            ).fetchall()
+        
+        # NULL and '' share the None key; add them up rather than let one row win
+        breakdown = {}
+        for row in rows:
+            key = row['dimension'] or None
+            breakdown[key] = breakdown.get(key, 0) + row['value']
+        return breakdown
+    
+    def check_counters(self, repair: bool = False) -> Dict:
+        """Compare the counters with a full recount, optionally rebuilding them
+        
+        The recount and the rebuild run in one write transaction, so no
+        trigger update can slip in between them.
+        """
         with self.db.get_db() as conn:
-            rows = conn.execute('''
-                SELECT status, COUNT(*) as count
-                FROM summaries
-                GROUP BY status
-            ''').fetchall()
+            if repair:
+                conn.execute('BEGIN IMMEDIATE')
             
-            return {row['status']: row['count'] for row in rows}
-
+            expected = {
+                (row['metric'], row['dimension']): row['value']
+                for row in conn.execute(Database.COUNTERS_SQL)
+            }
+            stored = {
+                (row['metric'], row['dimension']): row['value']
+                for row in conn.execute('SELECT metric, dimension, value FROM analytics_counters')
+            }
+            
+            mismatches = [
+                {"metric": metric, "dimension": dimension,
+                 "counter": stored.get((metric, dimension), 0),
+                 "actual": expected.get((metric, dimension), 0)}
+                for metric, dimension in sorted(set(expected) | set(stored))
+                if stored.get((metric, dimension), 0) != expected.get((metric, dimension), 0)
+            ]
+            
+            if repair and mismatches:
+                conn.execute('DELETE FROM analytics_counters')
+                conn.execute(
+                    f'INSERT INTO analytics_counters (metric, dimension, value) {Database.COUNTERS_SQL}'
+                )
+            
+            return {
+                "consistent": not mismatches,
+                "mismatches": mismatches,
+                "repaired": bool(repair and mismatches)
+            }
@@ -0,0 +1,234 @@
+"""
+Audit Log Queries and Monthly Archives
+"""
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from metrics import instrumented
+from models.audit_log import AuditLog
+from models.database import Database
+from services.audit_writer import AuditWriter
+from services.pagination import (
+    MAX_PAGE_SIZE, KeysetPage, decode_cursor, normalize_timestamp
+)
+from services.rollup_service import RollupService
+
+MONTH_RE = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+
+@instrumented('audit')
+class AuditService:
+    """Reads audit_log and moves old entries into per-month archive files
+
+    Entries older than archive_after_days go to <archive_dir>/audit-YYYY-MM.db,
+    a SQLite file with the same audit_log table and indexes, and can be
+    listed from there like live entries. Only entries the analytics rollups
+    have already folded in are archived (the rollup runs first).
+    """
+
+    DEFAULT_PAGE_SIZE = 100
+
+    ARCHIVE_SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS {schema}.audit_log (
+            id INTEGER PRIMARY KEY,
+            thread_id TEXT,
+            action TEXT,
+            user TEXT,
+            details TEXT,
+            timestamp TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS {schema}.idx_audit_thread_id ON audit_log(thread_id);
+        CREATE INDEX IF NOT EXISTS {schema}.idx_audit_user ON audit_log(user);
+        CREATE INDEX IF NOT EXISTS {schema}.idx_audit_action ON audit_log(action);
+        CREATE INDEX IF NOT EXISTS {schema}.idx_audit_timestamp ON audit_log(timestamp);
+    '''
+
+    def __init__(self, db: Database, archive_dir: str = 'audit_archive',
+                 archive_after_days: int = 90, batch_size: int = 5000,
+                 audit: Optional[AuditWriter] = None,
+                 rollup_service: Optional[RollupService] = None):
+        self.db = db
+        self.archive_dir = os.path.abspath(archive_dir)
+        self.archive_after_days = archive_after_days
+        self.batch_size = max(1, batch_size)
+        self.audit = audit
+        self.rollup_service = rollup_service
+
+    def iter_entries(self, filters: Optional[Dict] = None, limit: Optional[int] = None,
+                     cursor: Optional[str] = None, month: Optional[str] = None) -> KeysetPage:
+        """A page of audit entries, newest first, from the live table or a month's archive
+
+        filters may hold lists for thread_id/user/action and start / end
+        timestamps (UTC, end exclusive). Arguments are validated up front:
+        ValueError for bad ones, LookupError for a month without an archive.
+        """
+        filters = filters or {}
+        limit = min(limit or self.DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+        conditions = []
+        params = []
+        for column in ('thread_id', 'user', 'action'):
+            values = filters.get(column)
+            if values:
+                conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if filters.get('start'):
+            conditions.append('timestamp >= ?')
+            params.append(normalize_timestamp(filters['start']))
+        if filters.get('end'):
+            conditions.append('timestamp < ?')
+            params.append(normalize_timestamp(filters['end']))
+        after = decode_cursor(cursor, 1) if cursor else None
+
+        if month:
+            if after:
+                conditions.append('id < ?')
+                params.extend(after)
+            query = 'SELECT * FROM audit_log'
+            if conditions:
+                query += ' WHERE ' + ' AND '.join(conditions)
+            query += ' ORDER BY id DESC LIMIT ?'
+            params.append(limit + 1)
+            rows = self._iter_archive(self.archive_path(month), query, params)
+        else:
+            if self.audit:
+                # Read-your-writes within this process
+                self.audit.flush()
+            rows = self.db.iter_keyset('SELECT * FROM audit_log', conditions, params, ('id',),
+                                       after=after, limit=limit + 1)
+        return KeysetPage((AuditLog.from_row(row) for row in rows), limit,
+                          lambda entry: [entry.id])
+
+    def archive_path(self, month: str) -> str:
+        """Path of a month's (YYYY-MM) archive file; LookupError if there is none"""
+        if not MONTH_RE.match(month or ''):
+            raise ValueError("month must be YYYY-MM")
+        path = os.path.join(self.archive_dir, f'audit-{month}.db')
+        if not os.path.exists(path):
+            raise LookupError(f"No audit archive for {month}")
+        return path
+
+    @staticmethod
+    def _iter_archive(path: str, query: str, params: List):
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(500)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def list_archives(self) -> List[Dict]:
+        """Archive files with their entry counts and time range, newest month first"""
+        archives = []
+        if not os.path.isdir(self.archive_dir):
+            return archives
+        for name in sorted(os.listdir(self.archive_dir), reverse=True):
+            match = re.match(r'^audit-(\d{4}-\d{2})\.db$', name)
+            if not match:
+                continue
+            path = os.path.join(self.archive_dir, name)
+            conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+            try:
+                entries, first, last = conn.execute(
+                    'SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM audit_log'
+                ).fetchone()
+            finally:
+                conn.close()
+            archives.append({
+                "month": match.group(1),
+                "entries": entries,
+                "first_timestamp": first,
+                "last_timestamp": last,
+                "bytes": os.path.getsize(path)
+            })
+        return archives
+
+    def archive(self, older_than_days: Optional[int] = None) -> Dict:
+        """Move entries older than the cutoff into their month's archive file
+
+        Entries are copied and deleted batch_size at a time, each batch in
+        one transaction over the live database and the attached archive.
+        Copies are idempotent (by id), so a run interrupted between the two
+        files is completed by the next one.
+        """
+        days = self.archive_after_days if older_than_days is None else older_than_days
+        cutoff = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+        if self.audit:
+            self.audit.flush()
+        if self.rollup_service:
+            self.rollup_service.rollup()
+
+        with self.db.get_db() as conn:
+            row = conn.execute('SELECT value FROM watermarks WHERE name = ?',
+                               (RollupService.WATERMARK,)).fetchone()
+            # The watermark entry itself stays, so the rollup status keeps its timestamp
+            rolled_up = row['value'] if row else 0
+            months = [row[0] for row in conn.execute('''
+                SELECT DISTINCT strftime('%Y-%m', timestamp) FROM audit_log
+                WHERE timestamp < ? AND id < ?
+            ''', (cutoff, rolled_up))]
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archived = {}
+        conn = self.db.get_connection()
+        try:
+            for month in sorted(m for m in months if m):
+                archived[month] = self._archive_month(conn, month, cutoff, rolled_up)
+        finally:
+            conn.close()
+
+        return {
+            "cutoff": cutoff,
+            "archived": sum(archived.values()),
+            "months": archived,
+            "archives": self.list_archives()
+        }
+
+    def _archive_month(self, conn, month: str, cutoff: str, rolled_up: int) -> int:
+        """Move one month's archivable entries, batch by batch"""
+        start = f'{month}-01 00:00:00'
+        year, number = map(int, month.split('-'))
+        end = f'{year + number // 12:04d}-{number % 12 + 1:02d}-01 00:00:00'
+
+        conn.execute('ATTACH DATABASE ? AS archive',
+                     (os.path.join(self.archive_dir, f'audit-{month}.db'),))
+        try:
+            conn.executescript(self.ARCHIVE_SCHEMA.format(schema='archive'))
+            moved = 0
+            while True:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    ids = [row[0] for row in conn.execute('''
+                        SELECT id FROM main.audit_log
+                        WHERE timestamp >= ? AND timestamp < ? AND timestamp < ? AND id < ?
+                        ORDER BY id
+                        LIMIT ?
+                    ''', (start, end, cutoff, rolled_up, self.batch_size))]
+                    if ids:
+                        batch = json.dumps(ids)
+                        conn.execute('''
+                            INSERT OR IGNORE INTO archive.audit_log
+                            SELECT id, thread_id, action, user, details, timestamp
+                            FROM main.audit_log
+                            WHERE id IN (SELECT value FROM json_each(?))
+                        ''', (batch,))
+                        conn.execute('DELETE FROM main.audit_log WHERE id IN (SELECT value FROM json_each(?))',
+                                     (batch,))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                if not ids:
+                    return moved
+                moved += len(ids)
+        finally:
+            conn.execute('DETACH DATABASE archive')
@@ -0,0 +1,167 @@
+"""
+Audit Log Writer
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional
+from metrics import (
+    AUDIT_ENTRIES_DROPPED, AUDIT_ENTRIES_WRITTEN, AUDIT_FLUSH_DURATION, AUDIT_FLUSH_ERRORS
+)
+from models.database import Database
+
+logger = logging.getLogger(__name__)
+
+MODES = ('buffered', 'strict')
+
+
+class AuditWriter:
+    """Writes audit_log entries for the services
+
+    In strict mode an entry is inserted in the caller's transaction, so it
+    commits or rolls back with the change it records. In buffered mode it
+    is queued once that transaction has committed, stamped with the time
+    it was logged, and written in batches by a background thread every
+    flush_interval seconds, when max_entries are waiting, and at exit.
+    Buffered entries are lost if the process dies before a flush, and new
+    ones are dropped (audit_entries_dropped_total) while max_buffered are
+    waiting, e.g. when the database has been locked for a while.
+    """
+
+    INSERT_SQL = '''
+        INSERT INTO audit_log (thread_id, action, user, details)
+        VALUES (?, ?, ?, ?)
+    '''
+    INSERT_STAMPED_SQL = '''
+        INSERT INTO audit_log (thread_id, action, user, details, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+    '''
+
+    def __init__(self, db: Database, mode: str = 'buffered', max_entries: int = 1000,
+                 flush_interval: float = 1.0, max_buffered: Optional[int] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown audit mode '{mode}', expected one of {list(MODES)}")
+        self.db = db
+        self.mode = mode
+        self.max_entries = max(1, max_entries)
+        self.flush_interval = flush_interval
+        self.max_buffered = max(self.max_entries, max_buffered or self.max_entries * 10)
+        self._reset()
+        if mode == 'buffered':
+            atexit.register(self.close)
+
+    def _reset(self):
+        """Fresh buffer and flusher state (also after a fork: the parent flushes its own copy)"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._buffer: List[tuple] = []
+        self._conn = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._retry_at = 0.0
+
+    def log(self, conn, entries: Iterable[tuple]):
+        """Record (thread_id, action, user, details) entries for conn's transaction"""
+        entries = list(entries)
+        if not entries:
+            return
+        if self.mode == 'strict':
+            conn.executemany(self.INSERT_SQL, entries)
+            return
+
+        # Same format as CURRENT_TIMESTAMP, which strict inserts get
+        now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        stamped = [(*entry, now) for entry in entries]
+        conn.after_commit.append(lambda: self._enqueue(stamped))
+
+    def _enqueue(self, entries: List[tuple]):
+        if self._pid != os.getpid():
+            self._reset()
+        with self._lock:
+            self._buffer.extend(entries)
+            self._drop_excess()
+            full = len(self._buffer) >= self.max_entries
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+        if full and time.monotonic() >= self._retry_at:
+            # Backpressure: the caller has committed and released its connection.
+            # A failure is left to the background thread, not the caller
+            try:
+                self.flush()
+            except Exception:
+                self._retry_at = time.monotonic() + self.flush_interval
+                logger.exception("Audit flush failed; %d entries buffered", self.pending())
+
+    def _drop_excess(self):
+        """Drop the newest entries beyond max_buffered (call with _lock held)"""
+        excess = len(self._buffer) - self.max_buffered
+        if excess > 0:
+            del self._buffer[self.max_buffered:]
+            AUDIT_ENTRIES_DROPPED.inc(amount=excess)
+            logger.warning("Audit buffer full; dropped %d entries", excess)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit flush failed; retrying in %ss", self.flush_interval)
+
+    def flush(self) -> int:
+        """Write every buffered entry in one transaction; returns how many were written
+
+        On failure the entries go back to the front of the buffer and the
+        error is raised.
+        """
+        if self._pid != os.getpid():
+            self._reset()
+        with self._flush_lock:
+            with self._lock:
+                entries, self._buffer = self._buffer, []
+            if not entries:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                if self._conn is None:
+                    self._conn = self.db.get_connection()
+                with self._conn:
+                    self._conn.executemany(self.INSERT_STAMPED_SQL, entries)
+            except Exception:
+                AUDIT_FLUSH_ERRORS.inc()
+                with self._lock:
+                    self._buffer[:0] = entries
+                    self._drop_excess()
+                raise
+            AUDIT_FLUSH_DURATION.observe(time.perf_counter() - start)
+            AUDIT_ENTRIES_WRITTEN.inc(amount=len(entries))
+            return len(entries)
+
+    def pending(self) -> int:
+        """Entries waiting to be written"""
+        with self._lock:
+            return len(self._buffer)
+
+    def close(self):
+        """Stop the flusher and write what is left (registered with atexit)"""
+        if self._pid != os.getpid():
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(5.0, self.flush_interval * 2))
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Final audit flush failed; %d entries lost", self.pending())
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,253 @@
+"""
+Batch Summarization Service
+"""
+import itertools
+import time
+from concurrent.futures import (
+    ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+)
+from typing import Dict, Iterator, List, Optional
+from metrics import REGISTRY, instrumented
+from models.summary import Summary
+from services.thread_service import ThreadService
+from services.summary_service import SummaryService
+from services.nlp_service import NLPService
+
+
+def _summarize_threads(nlp_service: NLPService, threads_data: List[Dict],
+                       force: bool = False) -> tuple[List[Dict], float]:
+    """Summarize a pack of threads and time it (module level so process pools can pickle it)"""
+    start = time.perf_counter()
+    summaries = nlp_service.summarize_packed(threads_data, force=force)
+    try:
+        REGISTRY.maybe_flush()    # pool processes report through the metrics directory
+    except OSError:
+        pass    # retried on the next flush; metrics must not fail the batch
+    return summaries, time.perf_counter() - start
+
+
+@instrumented('batch_summary')
+class BatchSummaryService:
+    """Summarizes many threads concurrently over a bounded worker pool"""
+
+    EXECUTORS = {
+        'thread': ThreadPoolExecutor,
+        'process': ProcessPoolExecutor
+    }
+
+    def __init__(self, thread_service: ThreadService, summary_service: SummaryService,
+                 nlp_service: NLPService, max_workers: int = 8,
+                 executor: str = 'thread', commit_size: int = 50):
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', expected one of {list(self.EXECUTORS)}")
+
+        self.thread_service = thread_service
+        self.summary_service = summary_service
+        self.nlp_service = nlp_service
+        self.max_workers = max(1, max_workers)
+        self.executor = executor
+        self.commit_size = max(1, commit_size)
+
+    def summarize_thread(self, thread_id: str, force: bool = False) -> Optional[Dict]:
+        """Summarize one thread, incrementally when only new messages were added
+
+        If the thread's latest summary covers a prefix of its messages, only
+        the messages after it are loaded and summarized on top of it (unless
+        force=True, or the previous summary came from rules while OpenAI is
+        now available). Returns None if the thread doesn't exist.
+        """
+        thread = self.thread_service.get_thread_by_id(thread_id, with_messages=False)
+        if not thread:
+            return None
+
+        previous = None if force else self.summary_service.get_latest_summary(thread_id)
+        incremental = bool(
+            previous and previous.message_count
+            and previous.message_count < thread.message_count
+            and not (self.nlp_service.openai_api_key and previous.summary_type != 'openai')
+        )
+
+        if incremental:
+            new_messages = self.thread_service.get_messages(thread_id, start=previous.message_count)
+            rule_state = previous.rule_state or self.nlp_service.rule_state(
+                self.thread_service.get_messages(thread_id, stop=previous.message_count)
+            )
+            summary_data, rule_state = self.nlp_service.summarize_update(
+                thread.to_dict(), previous.edited_summary, new_messages, rule_state
+            )
+        else:
+            thread = self.thread_service.get_thread_by_id(thread_id)
+            if not thread:
+                return None
+            new_messages = thread.messages
+            rule_state = self.nlp_service.rule_state(thread.messages)
+            summary_data = self.nlp_service.summarize(thread.to_dict(), force=force,
+                                                      rule_state=rule_state)
+
+        summary = Summary.for_thread(thread, summary_data,
+                                     message_count=rule_state['total_messages'],
+                                     rule_state=rule_state)
+        summary.id = self.summary_service.create_summary(summary)
+
+        return {
+            "summary_id": summary.id,
+            "summary": summary_data,
+            "summary_type": summary.summary_type,
+            "incremental": incremental,
+            "messages_summarized": len(new_messages)
+        }
+
+    def summarize_batch(self, thread_ids: Optional[List[str]] = None,
+                        filters: Optional[Dict] = None,
+                        max_workers: Optional[int] = None,
+                        force: bool = False) -> Dict:
+        """Summarize all threads, a list of thread ids, or threads matching filters
+
+        Threads are read from the database in batches as the work proceeds,
+        never all at once. Raises ValueError unless max_workers is None or a
+        positive int.
+        """
+        if max_workers is not None and (isinstance(max_workers, bool)
+                                        or not isinstance(max_workers, int) or max_workers < 1):
+            raise ValueError("max_workers must be a positive integer")
+
+        start = time.perf_counter()
+        workers = min(max_workers or self.max_workers, self.max_workers)
+
+        found = set()
+        threads = self._tracking(
+            self.thread_service.find_threads(thread_ids=thread_ids, **(filters or {})), found
+        )
+        results = []
+
+        if not self.nlp_service.openai_api_key:
+            # Rule-based work is CPU-bound, so a thread pool only adds GIL
+            # contention; summarize each commit-sized chunk in one vectorized call
+            nlp_seconds = self._summarize_rules_inline(threads, results)
+            return self._report(results, thread_ids, found, start, nlp_seconds, 'inline', 1)
+        
+        pending = []
+        nlp_seconds = 0.0
+
+        # Each task is a pack of threads the NLP service may summarize in a
+        # single OpenAI request (one thread per task when packing is off).
+        # Keep a bounded number of packs in flight so huge batches don't
+        # queue every future (and every thread payload) up front
+        pack_size = self.nlp_service.pack_max_threads
+        window = workers * 2
+        remaining = threads
+        in_flight = {}
+
+        with self.EXECUTORS[self.executor](max_workers=workers) as pool:
+            def submit_next():
+                pack = list(itertools.islice(remaining, pack_size))
+                if pack:
+                    future = pool.submit(_summarize_threads, self.nlp_service,
+                                         [thread.to_dict() for thread in pack], force)
+                    in_flight[future] = pack
+
+            for _ in range(window):
+                submit_next()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pack = in_flight.pop(future)
+                    submit_next()
+
+                    try:
+                        summaries, elapsed = future.result()
+                    except Exception as e:
+                        results.extend(
+                            {"thread_id": thread.thread_id, "success": False, "error": str(e)}
+                            for thread in pack
+                        )
+                        continue
+
+                    nlp_seconds += elapsed
+                    pending.extend(
+                        Summary.for_thread(thread, summary_data)
+                        for thread, summary_data in zip(pack, summaries)
+                    )
+                    if len(pending) >= self.commit_size:
+                        results.extend(self._commit(pending))
+                        pending = []
+
+        if pending:
+            results.extend(self._commit(pending))
+
+        return self._report(results, thread_ids, found, start, nlp_seconds, self.executor, workers)
+
+    @staticmethod
+    def _tracking(threads: Iterator, found: set) -> Iterator:
+        """Pass threads through, adding each thread id to found"""
+        for thread in threads:
+            found.add(thread.thread_id)
+            yield thread
+
+    def _summarize_rules_inline(self, threads: Iterator, results: List[Dict]) -> float:
+        """Rule-based batch path without a worker pool; returns the summarizing time"""
+        nlp_seconds = 0.0
+        while True:
+            chunk = list(itertools.islice(threads, self.commit_size))
+            if not chunk:
+                return nlp_seconds
+            chunk_start = time.perf_counter()
+            try:
+                summaries = self.nlp_service.summarize_batch_rules([t.to_dict() for t in chunk])
+            except Exception as e:
+                results.extend(
+                    {"thread_id": thread.thread_id, "success": False, "error": str(e)}
+                    for thread in chunk
+                )
+                continue
+            nlp_seconds += time.perf_counter() - chunk_start
+            results.extend(self._commit([
+                Summary.for_thread(thread, summary_data)
+                for thread, summary_data in zip(chunk, summaries)
+            ]))
+    
+    def _report(self, results: List[Dict], thread_ids: Optional[List[str]], found: set,
+                start: float, nlp_seconds: float, executor: str, workers: int) -> Dict:
+        """Per-thread outcomes (requested ids that don't exist last) plus throughput numbers"""
+        if thread_ids is not None:
+            results.extend(
+                {"thread_id": thread_id, "success": False, "error": "Thread not found"}
+                for thread_id in dict.fromkeys(thread_ids) if thread_id not in found
+            )
+        elapsed = time.perf_counter() - start
+        succeeded = sum(1 for result in results if result['success'])
+        
+        return {
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results,
+            "throughput": {
+                "executor": executor,
+                "workers": workers,
+                "elapsed_seconds": round(elapsed, 3),
+                "threads_per_second": round(len(found) / elapsed, 2) if elapsed > 0 else 0,
+                "avg_summarize_ms": round(nlp_seconds / succeeded * 1000, 2) if succeeded else 0
+            }
+        }
+    
+    def _commit(self, summaries: List[Summary]) -> List[Dict]:
+        """Persist a batch of summaries and report per-thread outcomes"""
+        try:
+            summary_ids = self.summary_service.create_summaries(summaries)
+        except Exception as e:
+            return [
+                {"thread_id": summary.thread_id, "success": False, "error": str(e)}
+                for summary in summaries
+            ]
+
+        return [
+            {
+                "thread_id": summary.thread_id,
+                "success": True,
+                "summary_id": summary_id,
+                "summary_type": summary.summary_type
+            }
+            for summary, summary_id in zip(summaries, summary_ids)
+        ]
@@ -0,0 +1,128 @@
+"""
+Incremental CRM Export Feed
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from metrics import instrumented
+from models.database import Database
+from services.pagination import KeysetPage, decode_cursor
+
+
+@instrumented('export')
+class ExportService:
+    """Approved summaries in approval order, for bulk CRM sync
+
+    The feed is ordered by (approved_at, summary id) and resumes after a
+    cursor holding that pair, so a consumer that stores the last cursor
+    receives every approval exactly once (a re-approval after an edit shows
+    up again, with its new approved_at). Approvals from the last
+    settle_seconds are held back: approved_at is taken before the write
+    commits, so a just-committed row could otherwise be passed by the
+    cursor while an earlier-stamped one is still in flight.
+    """
+
+    WATERMARK = 'crm_export'
+
+    def __init__(self, db: Database, settle_seconds: float = 5):
+        self.db = db
+        self.settle_seconds = settle_seconds
+
+    def iter_approved(self, cursor: Optional[str] = None, approved_after: Optional[str] = None,
+                      limit: Optional[int] = None) -> KeysetPage:
+        """Export records approved after the cursor (or approved_after), oldest first
+
+        Arguments are validated up front (ValueError); rows are read while
+        the page is iterated.
+        """
+        conditions = ["s.status = 'approved'", 's.approved_at < ?']
+        settled = datetime.now() - timedelta(seconds=self.settle_seconds)
+        params = [settled.isoformat()]
+        after = decode_cursor(cursor, 2) if cursor else None
+        if approved_after:
+            # approved_at is stored as datetime.isoformat()
+            conditions.append('s.approved_at >= ?')
+            params.append(approved_after.replace(' ', 'T').rstrip('Z'))
+
+        select = '''
+            SELECT s.id, s.thread_id, s.edited_summary, s.crm_context, s.approved_by,
+                   s.approved_at, t.order_id, t.product, t.topic
+            FROM summaries s
+            JOIN threads t ON t.thread_id = s.thread_id
+        '''
+        rows = self.db.iter_keyset(select, conditions, params, ('s.approved_at', 's.id'),
+                                   descending=False, after=after,
+                                   limit=limit + 1 if limit else None)
+        return KeysetPage((self._record(row) for row in rows), limit,
+                          lambda record: [record['approved_at'], record['summary_id']])
+
+    @staticmethod
+    def _record(row) -> Dict:
+        """The /api/export/<id> document, plus the summary id"""
+        return {
+            "summary_id": row['id'],
+            "thread_id": row['thread_id'],
+            "order_id": row['order_id'],
+            "product": row['product'],
+            "topic": row['topic'],
+            "summary": json.loads(row['edited_summary']),
+            "crm_context": json.loads(row['crm_context']) if row['crm_context'] else None,
+            "approved_by": row['approved_by'],
+            "approved_at": row['approved_at'],
+            "export_timestamp": datetime.now().isoformat()
+        }
+
+    def get_watermark(self) -> Dict:
+        """Cursor of the last exported record and the total exported so far"""
+        with self.db.get_db() as conn:
+            row = conn.execute('SELECT value, cursor, updated_at FROM watermarks WHERE name = ?',
+                               (self.WATERMARK,)).fetchone()
+
+        if not row:
+            return {"cursor": None, "exported": 0, "updated_at": None}
+        return {"cursor": row['cursor'], "exported": row['value'], "updated_at": row['updated_at']}
+
+    def export_file(self, directory: str, limit: Optional[int] = None,
+                    cursor: Optional[str] = None) -> Dict:
+        """Write the records past the watermark to a gzipped NDJSON file
+
+        Starts from cursor if given, else from the stored watermark. The file
+        is written under a temporary name and renamed once complete, and only
+        then does the watermark move, so a failed run is simply repeated.
+        No file is written when nothing is new.
+        """
+        watermark = self.get_watermark()
+        page = self.iter_approved(cursor or watermark['cursor'], limit=limit)
+
+        os.makedirs(directory, exist_ok=True)
+        name = f"approved-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}.ndjson.gz"
+        path = os.path.join(directory, name)
+        rows = 0
+        try:
+            with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f:
+                for record in page:
+                    f.write(json.dumps(record, separators=(',', ':')) + '\n')
+                    rows += 1
+            if rows:
+                os.replace(path + '.tmp', path)
+        finally:
+            if os.path.exists(path + '.tmp'):
+                os.remove(path + '.tmp')
+
+        if rows:
+            with self.db.get_db() as conn:
+                conn.execute('''
+                    INSERT INTO watermarks (name, value, cursor) VALUES (?, ?, ?)
+                    ON CONFLICT (name) DO UPDATE SET
+                        value = value + ?, cursor = excluded.cursor,
+                        updated_at = CURRENT_TIMESTAMP
+                ''', (self.WATERMARK, rows, page.last_cursor, rows))
+
+        return {
+            "rows": rows,
+            "file": path if rows else None,
+            "has_more": page.next_cursor is not None,
+            "watermark": self.get_watermark()
+        }
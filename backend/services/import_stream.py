@@ -0,0 +1,164 @@
+"""
+Incremental Parsers for Streaming Thread Imports
+
+Both parsers read a binary stream in fixed-size chunks and yield one thread
+dict at a time, so memory use is bounded by the largest single thread
+rather than by the size of the upload.
+"""
+import codecs
+import json
+from typing import BinaryIO, Dict, Iterator
+
+
+class StreamParseError(ValueError):
+    """Raised when an import stream is not valid NDJSON / JSON"""
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+def iter_ndjson(stream: BinaryIO, chunk_size: int = 65536,
+                max_record_bytes: int = 10485760) -> Iterator[Dict]:
+    """Yield one JSON object per non-empty line"""
+    buffer = b''
+    line_number = 0
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if chunk:
+            buffer += chunk
+
+        *lines, buffer = buffer.split(b'\n')
+        if not chunk and buffer:
+            lines.append(buffer)
+            buffer = b''
+
+        for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise StreamParseError(f"Invalid JSON on line {line_number}: {e}")
+            except UnicodeDecodeError as e:
+                raise StreamParseError(f"Invalid encoding on line {line_number}: {e}")
+            yield record
+
+        if len(buffer) > max_record_bytes:
+            raise StreamParseError(f"Line {line_number + 1} exceeds {max_record_bytes} bytes")
+        if not chunk:
+            return
+
+
+class _TextReader:
+    """Buffered text view of a byte stream that parses one JSON value at a time"""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int, max_record_bytes: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_record_bytes = max_record_bytes
+        self.decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Read another chunk, discarding consumed text; False at end of stream"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        self.eof = not chunk
+        try:
+            text = self.decoder.decode(chunk, final=self.eof)
+        except UnicodeDecodeError as e:
+            raise StreamParseError(f"Invalid UTF-8: {e}")
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        if len(self.buffer) > self.max_record_bytes:
+            raise StreamParseError(f"JSON value exceeds {self.max_record_bytes} bytes")
+        return not self.eof or bool(self.buffer)
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of stream)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        """Consume one of the given punctuation characters"""
+        char = self.peek()
+        if not char or char not in chars:
+            found = repr(char) if char else 'end of input'
+            raise StreamParseError(f"Expected one of {chars!r}, found {found}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Parse the next complete JSON value, reading more input as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Incomplete values fail too; only give up once input is exhausted
+                if not self._fill():
+                    raise StreamParseError(f"Invalid JSON: {e}")
+                continue
+            # A number cut off at the buffer edge may continue in the next chunk
+            if (isinstance(value, (int, float)) and not self.eof
+                    and (end == len(self.buffer) or self.buffer[end] in _NUMBER_CHARS)):
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_envelope_threads(stream: BinaryIO, chunk_size: int = 65536,
+                          max_record_bytes: int = 10485760) -> Iterator[Dict]:
+    """Yield threads from a {"threads": [...]} envelope or a bare JSON array"""
+    reader = _TextReader(stream, chunk_size, max_record_bytes)
+
+    if reader.peek() == '[':
+        yield from _iter_array(reader)
+        return
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise StreamParseError("Object keys must be strings")
+        reader.expect(':')
+
+        if key == 'threads':
+            if reader.peek() != '[':
+                raise StreamParseError('"threads" must be an array')
+            yield from _iter_array(reader)
+        else:
+            # Envelope metadata (version, description, ...) is skipped
+            reader.value()
+
+        if reader.expect(',}') == '}':
+            return
+
+
+def _iter_array(reader: _TextReader) -> Iterator[Dict]:
+    """Yield the elements of the array at the reader's position"""
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.pos += 1
+        return
+
+    while True:
+        yield reader.value()
+        if reader.expect(',]') == ']':
+            return
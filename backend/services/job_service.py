@@ -0,0 +1,157 @@
+"""
+Job Queue Business Logic Service
+"""
+import json
+import time
+from typing import Dict, List, Optional
+from metrics import instrumented
+from models.database import Database
+from models.job import Job
+
+
+@instrumented('jobs')
+class JobService:
+    """Durable job queue stored in the jobs table"""
+
+    def __init__(self, db: Database, max_attempts: int = 3, lease_seconds: int = 300,
+                 retry_backoff_seconds: int = 30):
+        self.db = db
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+    def enqueue(self, job_type: str, payload: Dict, max_attempts: Optional[int] = None) -> Job:
+        """Add a job to the queue and return it immediately"""
+        with self.db.get_db() as conn:
+            cursor = conn.execute('''
+                INSERT INTO jobs (job_type, payload, max_attempts)
+                VALUES (?, ?, ?)
+            ''', (job_type, json.dumps(payload), max_attempts or self.max_attempts))
+
+            row = conn.execute(
+                'SELECT * FROM jobs WHERE id = ?',
+                (cursor.lastrowid,)
+            ).fetchone()
+
+            return Job.from_row(row)
+
+    def get_job(self, job_id: int) -> Optional[Job]:
+        """Get job by ID"""
+        with self.db.get_db() as conn:
+            row = conn.execute(
+                'SELECT * FROM jobs WHERE id = ?',
+                (job_id,)
+            ).fetchone()
+
+            if row:
+                return Job.from_row(row)
+            return None
+
+    def get_jobs(self, status: Optional[str] = None, limit: int = 100) -> List[Job]:
+        """Get most recent jobs, optionally filtered by status"""
+        with self.db.get_db() as conn:
+            if status:
+                rows = conn.execute(
+                    'SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?',
+                    (status, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    'SELECT * FROM jobs ORDER BY id DESC LIMIT ?',
+                    (limit,)
+                ).fetchall()
+
+            return [Job.from_row(row) for row in rows]
+
+    def claim(self, worker_id: str, lease_seconds: Optional[int] = None) -> Optional[Job]:
+        """Atomically lease the next runnable job to a worker"""
+        now = time.time()
+        lease_expires_at = now + (lease_seconds or self.lease_seconds)
+
+        with self.db.get_db() as conn:
+            # Take the write lock up front so two workers can't pick the same row
+            conn.execute('BEGIN IMMEDIATE')
+
+            # Jobs whose worker died on their final attempt are given up on
+            conn.execute('''
+                UPDATE jobs
+                SET status = 'failed', error = 'Lease expired on final attempt',
+                    lease_owner = NULL, lease_expires_at = NULL,
+                    updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP
+                WHERE status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts
+            ''', (now,))
+
+            row = conn.execute('''
+                UPDATE jobs
+                SET status = 'running', attempts = attempts + 1,
+                    lease_owner = ?, lease_expires_at = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE (status = 'queued' AND run_after <= ?)
+                       OR (status = 'running' AND lease_expires_at < ?)
+                    ORDER BY id
+                    LIMIT 1
+                )
+                RETURNING *
+            ''', (worker_id, lease_expires_at, now, now)).fetchone()
+
+            if row:
+                return Job.from_row(row)
+            return None
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: Optional[int] = None) -> bool:
+        """Extend a running job's lease; False if the worker no longer owns it"""
+        lease_expires_at = time.time() + (lease_seconds or self.lease_seconds)
+
+        with self.db.get_db() as conn:
+            cursor = conn.execute('''
+                UPDATE jobs
+                SET lease_expires_at = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND lease_owner = ? AND status = 'running'
+            ''', (lease_expires_at, job_id, worker_id))
+
+            return cursor.rowcount > 0
+
+    def complete(self, job_id: int, worker_id: str, result: Optional[Dict] = None) -> bool:
+        """Mark a leased job as succeeded"""
+        with self.db.get_db() as conn:
+            cursor = conn.execute('''
+                UPDATE jobs
+                SET status = 'succeeded', result = ?, error = NULL,
+                    lease_owner = NULL, lease_expires_at = NULL,
+                    updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND lease_owner = ? AND status = 'running'
+            ''', (json.dumps(result), job_id, worker_id))
+
+            return cursor.rowcount > 0
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """Record a failed attempt, re-queueing with backoff while attempts remain"""
+        with self.db.get_db() as conn:
+            row = conn.execute(
+                'SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ? AND status = ?',
+                (job_id, worker_id, 'running')
+            ).fetchone()
+
+            if not row:
+                return False
+
+            if row['attempts'] < row['max_attempts']:
+                backoff = self.retry_backoff_seconds * (2 ** (row['attempts'] - 1))
+                conn.execute('''
+                    UPDATE jobs
+                    SET status = 'queued', error = ?, run_after = ?,
+                        lease_owner = NULL, lease_expires_at = NULL,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (error, time.time() + backoff, job_id))
+            else:
+                conn.execute('''
+                    UPDATE jobs
+                    SET status = 'failed', error = ?,
+                        lease_owner = NULL, lease_expires_at = NULL,
+                        updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (error, job_id))
+
+            return True
@@ -0,0 +1,129 @@
+"""
+Compiled Keyword Matcher for Rule-Based Summarization
+"""
+import re
+import string
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+
+class KeywordSpan(NamedTuple):
+    """One keyword occurrence: message index and character offsets in its body"""
+    message: int
+    start: int
+    end: int
+    keyword: str
+
+
+class KeywordMatches(NamedTuple):
+    """Result of scanning a thread"""
+    groups: Dict[str, List[str]]     # group -> distinct keywords found, in rule order
+    spans: List[KeywordSpan]
+
+
+class KeywordMatcher:
+    """Matches whole-word keywords from several groups in one pass over the text
+
+    Text is lowercased and its punctuation turned into spaces, then split
+    into words once and intersected with the set of every keyword form,
+    all in C: one linear pass however many keywords there are. Matching
+    is by whole word, so "address" does not match "addressed" and
+    "resolved" does not match "unresolved". Inflections that should count
+    are listed explicitly as forms of their keyword ("returned" for
+    "return"). scan() walks the same words to report their spans.
+    """
+
+    _PUNCTUATION = string.punctuation + '\u2018\u2019\u201c\u201d\u2013\u2014\u2026'
+    _NORMALIZE = str.maketrans(_PUNCTUATION, ' ' * len(_PUNCTUATION))
+    _WORD_RE = re.compile(r'\S+')
+
+    def __init__(self, groups: Dict[str, Iterable[str]],
+                 forms: Optional[Dict[str, Iterable[str]]] = None):
+        self._lookup: Dict[str, List[str]] = {}
+        self._order: Dict[str, Dict[str, int]] = {}
+
+        for group, keywords in groups.items():
+            self._order[group] = {}
+            for keyword in keywords:
+                keyword = self._check_word(keyword)
+                self._order[group].setdefault(keyword, len(self._order[group]))
+                self._lookup.setdefault(keyword, []).append(group)
+
+        self._keywords = frozenset(self._lookup)
+        # Surface word -> keyword it counts as
+        self._forms: Dict[str, str] = {keyword: keyword for keyword in self._keywords}
+        for keyword, words in (forms or {}).items():
+            if keyword not in self._keywords:
+                raise ValueError(f"Forms given for unknown keyword '{keyword}'")
+            for word in words:
+                self._forms.setdefault(self._check_word(word), keyword)
+        self._words = frozenset(self._forms)
+        self._memberships = tuple(
+            (keyword, group) for group, order in self._order.items() for keyword in order
+        )
+
+    @classmethod
+    def _check_word(cls, word: str) -> str:
+        word = word.lower()
+        if word.translate(cls._NORMALIZE).split() != [word]:
+            raise ValueError(f"Keyword '{word}' must be a single word")
+        return word
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        """text lowercased with punctuation as spaces; words are its whitespace-separated runs"""
+        return text.lower().translate(cls._NORMALIZE)
+
+    def tokenize(self, text: str) -> List[str]:
+        """Lowercased words of text, split on whitespace and punctuation"""
+        return self.normalize(text).split()
+
+    @property
+    def keywords(self) -> List[str]:
+        """All compiled keywords, in a stable order"""
+        return sorted(self._keywords)
+
+    @property
+    def group_names(self) -> List[str]:
+        return list(self._order)
+
+    def groups_for(self, keyword: str) -> List[str]:
+        """Groups a keyword belongs to"""
+        return self._lookup[keyword]
+
+    def present(self, texts: Iterable[str]) -> frozenset:
+        """Distinct keywords present in the texts"""
+        words = self._words.intersection(self.tokenize(' '.join(texts)))
+        return frozenset(map(self._forms.__getitem__, words))
+
+    def find(self, texts: Iterable[str]) -> Dict[str, List[str]]:
+        """Distinct keywords present in the texts, by group"""
+        return self.group(self.present(texts))
+
+    def scan(self, texts: Iterable[str]) -> KeywordMatches:
+        """Like find(), but also report every occurrence's span per message
+
+        Offsets index the lowercased message, which lines up with the
+        message itself unless it holds one of the few characters whose
+        lowercase is longer (e.g. "\u0130").
+        """
+        forms = self._forms
+        spans = [
+            KeywordSpan(index, match.start(), match.end(), forms[match.group()])
+            for index, text in enumerate(texts)
+            for match in self._WORD_RE.finditer(self.normalize(text))
+            if match.group() in forms
+        ]
+        return KeywordMatches(
+            groups=self.group({span.keyword for span in spans}),
+            spans=spans
+        )
+
+    def group(self, present: Iterable[str]) -> Dict[str, List[str]]:
+        """Arrange keywords (e.g. from present()) by group, in rule order"""
+        if not isinstance(present, (set, frozenset)):
+            present = set(present)
+        found: Dict[str, List[str]] = {group: [] for group in self._order}
+        for keyword, group in self._memberships:
+            if keyword in present:
+                found[group].append(keyword)
+        return found
@@ -1,69 +1,366 @@
 """
 NLP Service for Summarization
 """
+import functools
+import itertools
 import json
-from typing import Dict, Optional
+import time
+from typing import Dict, List, Optional
+import numpy as np
 import openai
+from metrics import (
+    NLP_FALLBACKS, NLP_OPENAI_DURATION, NLP_PACK_RETRIES, NLP_PROMPT_TOKENS,
+    NLP_PROMPT_TOKENS_SAVED, NLP_SUMMARIES, instrumented
+)
+from services.prompt_builder import PromptBuilder, estimate_tokens
+from services.summary_cache import SummaryCache
+from services.keyword_matcher import KeywordMatcher, KeywordMatches
 
 
+@instrumented('nlp')
 class NLPService:
     """NLP summarization service with multiple strategies"""
     
+    # Bump whenever the OpenAI prompt changes so cached summaries are not reused
+    PROMPT_VERSION = 3
+    
+    # Rule-based keyword lists (whole-word matches)
+    ISSUE_KEYWORDS = {
+        'damaged': ['damaged', 'broken', 'defective'],
+        'delivery': ['delayed', 'late', 'where', 'tracking', 'stuck'],
+        'wrong_item': ['wrong', 'color', 'size'],
+        'refund': ['refund', 'return', 'credit'],
+        'address': ['address', 'reroute']
+    }
+    NEGATIVE_WORDS = ['broken', 'wrong', 'delayed', 'stuck', 'lost', 'issue', 'problem']
+    POSITIVE_WORDS = ['resolved', 'thanks', 'appreciate', 'approve']
+    # Inflections that count as their keyword ("addressed" and "unresolved" don't)
+    KEYWORD_FORMS = {
+        'refund': ['refunds', 'refunded', 'refunding'],
+        'return': ['returns', 'returned', 'returning'],
+        'credit': ['credits', 'credited'],
+        'reroute': ['rerouted', 'rerouting'],
+        'address': ['addresses'],
+        'color': ['colors', 'colour', 'colours'],
+        'size': ['sizes'],
+        'issue': ['issues'],
+        'problem': ['problems'],
+        'appreciate': ['appreciated'],
+        'approve': ['approved', 'approves'],
+        'urgent': ['urgently']
+    }
+    
+    _rule_matcher = KeywordMatcher({
+        **{f'issue:{issue_type}': keywords for issue_type, keywords in ISSUE_KEYWORDS.items()},
+        'negative': NEGATIVE_WORDS,
+        'positive': POSITIVE_WORDS,
+        'resolved': ['resolved'],
+        'urgent': ['urgent']
+    }, forms=KEYWORD_FORMS)
+    _rule_vocab = None
+    
     def __init__(self, openai_api_key: str = '', model: str = 'gpt-4',
-                 temperature: float = 0.3, max_tokens: int = 500):
+                 temperature: float = 0.3, max_tokens: int = 500,
+                 cache: Optional[SummaryCache] = None, api_base: str = '',
+                 request_timeout: Optional[float] = None, pack_max_threads: int = 8,
+                 pack_token_budget: int = 3000, input_token_budget: int = 3000,
+                 context_tokens: int = 8192):
         self.openai_api_key = openai_api_key
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.cache = cache
+        # e.g. an OpenAI-compatible gateway, or benchmarks/fake_openai.py for load tests
+        self.api_base = api_base
+        self.request_timeout = request_timeout
+        # Packed requests (summarize_packed): threads per request and prompt size
+        self.pack_max_threads = max(1, pack_max_threads)
+        self.pack_token_budget = pack_token_budget
+        # Prompts are compacted to fit the budget, and the model's context window
+        # less the reply
+        self.input_token_budget = input_token_budget
+        self.context_tokens = context_tokens
+        self.prompt_builder = PromptBuilder()
         
         if self.openai_api_key:
             openai.api_key = self.openai_api_key
     
-    def summarize(self, thread_data: Dict) -> Dict:
-        """Main summarization method with fallback"""
+    def summarize(self, thread_data: Dict, force: bool = False,
+                  rule_state: Optional[Dict] = None) -> Dict:
+        """Main summarization method with fallback
+        
+        OpenAI summaries are cached by thread content; pass force=True to
+        skip the lookup and regenerate (the fresh result replaces the cached one).
+        Rule-based summaries are cheaper to recompute than to look up; a
+        rule_state already computed for the thread's messages is reused.
+        """
         # Try OpenAI first if API key is available
         if self.openai_api_key:
+            cache_key = None
+            if self.cache:
+                cache_key = self._cache_key(thread_data)
+                cached = None if force else self.cache.get(cache_key)
+                if cached:
+                    NLP_SUMMARIES.inc('openai', 'cached')
+                    return cached
+            
             openai_summary = self._summarize_with_openai(thread_data)
             if openai_summary:
                 openai_summary['summary_type'] = 'openai'
+                if cache_key:
+                    self.cache.set(cache_key, openai_summary, self.model)
+                NLP_SUMMARIES.inc('openai', 'full')
                 return openai_summary
+            NLP_FALLBACKS.inc()
         
         # Fall back to rule-based
-        rule_summary = self._summarize_with_rules(thread_data)
+        rule_summary = self._summarize_with_rules(thread_data, rule_state)
         rule_summary['summary_type'] = 'rule_based'
+        NLP_SUMMARIES.inc('rule_based', 'full')
         return rule_summary
     
-    def _summarize_with_openai(self, thread_data: Dict) -> Optional[Dict]:
-        """Use OpenAI GPT for intelligent summarization"""
-        try:
-            # Format thread for summarization
-            messages_text = ""
-            for msg in thread_data['messages']:
-                sender = "Customer" if msg['sender'] == 'customer' else "Agent"
-                messages_text += f"{sender} ({msg['timestamp']}): {msg['body']}\n\n"
-            
-            prompt = f"""Analyze this customer service email thread and provide a structured summary.
+    def summarize_update(self, thread_data: Dict, previous_summary: Dict,
+                         new_messages: List[Dict], rule_state: Dict) -> tuple[Dict, Dict]:
+        """Update a summary with messages appended since it was made
+        
+        Only new_messages are read: OpenAI gets the previous summary plus
+        the new messages, and the rule counters in rule_state (covering the
+        earlier messages) are extended rather than recomputed. Returns the
+        new summary and the new rule state.
+        """
+        rule_state = self._rule_state(new_messages, rule_state)
+        
+        if self.openai_api_key:
+            openai_summary = self._update_with_openai(thread_data, previous_summary, new_messages)
+            if openai_summary:
+                openai_summary['summary_type'] = 'openai'
+                NLP_SUMMARIES.inc('openai', 'update')
+                return openai_summary, rule_state
+            NLP_FALLBACKS.inc()
+        
+        rule_summary = self._summarize_with_rules(thread_data, rule_state)
+        rule_summary['summary_type'] = 'rule_based'
+        NLP_SUMMARIES.inc('rule_based', 'update')
+        return rule_summary, rule_state
+    
+    def summarize_packed(self, threads: List[Dict], force: bool = False) -> List[Dict]:
+        """Summarize several threads with as few OpenAI requests as possible
+        
+        Returns what summarize would for each thread, in order. Cached
+        threads are answered from the cache; the rest are packed, up to
+        pack_max_threads and pack_token_budget estimated prompt tokens per
+        request, into one prompt asking for a keyed JSON array. Threads
+        whose prompt can't be built (e.g. a message without a timestamp),
+        whose entry is missing or invalid, or whose request failed are
+        retried on their own through summarize, rules fallback included.
+        """
+        if not self.openai_api_key or self.pack_max_threads == 1:
+            return [self.summarize(thread, force=force) for thread in threads]
+        
+        results: List[Optional[Dict]] = [None] * len(threads)
+        cache_keys = {}
+        todo = []
+        for i, thread in enumerate(threads):
+            if self.cache:
+                cache_keys[i] = self._cache_key(thread)
+                cached = None if force else self.cache.get(cache_keys[i])
+                if cached:
+                    NLP_SUMMARIES.inc('openai', 'cached')
+                    results[i] = cached
+                    continue
+            todo.append(i)
+        
+        prompts = []
+        for i in todo:
+            try:
+                prompts.append((i, self._thread_prompt(threads[i])))
+            except Exception as e:
+                # e.g. a message without a timestamp; summarized alone below
+                print(f"Cannot pack thread {threads[i].get('thread_id')}: {e!r}")
+        
+        for pack in self._packs(prompts):
+            if len(pack) == 1:
+                continue    # nothing to share a request with; summarized alone below
+            summaries = self._summarize_pack_with_openai(pack)
+            for i, summary in summaries.items():
+                summary['summary_type'] = 'openai'
+                if i in cache_keys:
+                    self.cache.set(cache_keys[i], summary, self.model)
+                results[i] = summary
+            NLP_SUMMARIES.inc('openai', 'packed', amount=len(summaries))
+            NLP_PACK_RETRIES.inc(amount=len(pack) - len(summaries))
+        
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = self.summarize(threads[i], force=True)
+        return results
+    
+    def _packs(self, prompts: List[tuple]) -> List[List[tuple]]:
+        """Group (index, thread prompt) pairs, in order, by thread count and token budget"""
+        packs = []
+        pack = []
+        tokens = 0
+        for index, prompt in prompts:
+            size = estimate_tokens(prompt)
+            if pack and (len(pack) == self.pack_max_threads
+                         or tokens + size > self.pack_token_budget):
+                packs.append(pack)
+                pack = []
+                tokens = 0
+            pack.append((index, prompt))
+            tokens += size
+        if pack:
+            packs.append(pack)
+        return packs
+    
+    def _summarize_pack_with_openai(self, pack: List[tuple]) -> Dict[int, Dict]:
+        """Summaries by thread index for the entries of a packed reply that validate"""
+        keys = {str(position + 1): index for position, (index, _) in enumerate(pack)}
+        threads_text = '\n'.join(
+            f"=== Thread key: {position + 1} ===\n{prompt}"
+            for position, (_, prompt) in enumerate(pack)
+        )
+        prompt = f"""Analyze each of these customer service email threads and provide a structured summary of each.
+
+{threads_text}
+Provide a JSON array with one object per thread. Each object has "thread_key" (the key of its thread above) and:
+{self._RESPONSE_FIELDS}
 
-Thread Information:
+Format as valid JSON: only the array."""
+        
+        try:
+            reply = self._chat(prompt, max_tokens=self.max_tokens * len(pack))
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            return {}
+        
+        # Tolerate prose or code fences around the array
+        start, end = reply.find('['), reply.rfind(']')
+        try:
+            entries = json.loads(reply[start:end + 1]) if 0 <= start < end else []
+        except json.JSONDecodeError:
+            entries = []
+        
+        summaries = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict) or not isinstance(entry.get('issue_summary'), str):
+                continue
+            index = keys.get(str(entry.pop('thread_key', '')))
+            if index is not None and index not in summaries:
+                summaries[index] = entry
+        return summaries
+    
+    def _cache_key(self, thread_data: Dict) -> str:
+        """Cache key for the current model and prompt settings"""
+        return SummaryCache.make_key(
+            thread_data,
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            prompt_version=self.PROMPT_VERSION,
+            input_budget=self._input_budget(),
+            # Summaries from another endpoint must not be served for the real one
+            **({'api_base': self.api_base} if self.api_base else {})
+        )
+    
+    # Fields requested from the model, shared by the full and update prompts
+    _RESPONSE_FIELDS = """1. issue_summary: Brief description of the customer's main issue
+2. key_actions: List of actions taken or needed
+3. resolution_status: Current status (resolved, pending, escalated)
+4. sentiment: Customer sentiment (positive, neutral, negative, frustrated)
+5. priority: Priority level (low, medium, high, urgent)
+6. next_steps: What needs to happen next
+7. tags: Relevant tags for categorization"""
+    # Instructions and response fields around the thread in a prompt
+    _FRAME_TOKENS = estimate_tokens(_RESPONSE_FIELDS) + 50
+    
+    def _input_budget(self) -> int:
+        """Prompt tokens available: the configured budget, within the context left for the reply"""
+        return min(self.input_token_budget, self.context_tokens - self.max_tokens)
+    
+    @staticmethod
+    def _thread_info(thread_data: Dict) -> str:
+        return f"""Thread Information:
 - Order ID: {thread_data['order_id']}
 - Product: {thread_data['product']}
 - Topic: {thread_data['topic']}
 - Subject: {thread_data['subject']}
+"""
+    
+    def _thread_prompt(self, thread_data: Dict) -> str:
+        """Thread details and compacted messages, as shown to the model"""
+        header = f"{self._thread_info(thread_data)}\nEmail Thread:\n"
+        budget = self._input_budget() - self._FRAME_TOKENS - estimate_tokens(header)
+        return header + self._messages_text(thread_data['messages'], budget)
+    
+    def _messages_text(self, messages: List[Dict], budget: int) -> str:
+        """Messages compacted to budget tokens, recording the tokens saved"""
+        built = self.prompt_builder.build(messages, max(budget, 0))
+        NLP_PROMPT_TOKENS.inc('original', amount=built.original_tokens)
+        NLP_PROMPT_TOKENS.inc('sent', amount=built.tokens)
+        NLP_PROMPT_TOKENS_SAVED.observe(built.saved_tokens)
+        return built.text
+    
+    def _summarize_with_openai(self, thread_data: Dict) -> Optional[Dict]:
+        """Use OpenAI GPT for intelligent summarization"""
+        try:
+            prompt = f"""Analyze this customer service email thread and provide a structured summary.
 
-Email Thread:
+{self._thread_prompt(thread_data)}
+Provide a JSON response with:
+{self._RESPONSE_FIELDS}
+
+Format as valid JSON."""
+
+            return self._complete(prompt)
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            return None
+    
+    def _update_with_openai(self, thread_data: Dict, previous_summary: Dict,
+                            new_messages: List[Dict]) -> Optional[Dict]:
+        """Ask OpenAI to revise an existing summary given only the new messages"""
+        try:
+            thread_info = self._thread_info(thread_data)
+            previous_text = json.dumps(previous_summary)
+            budget = (self._input_budget() - self._FRAME_TOKENS
+                      - estimate_tokens(thread_info) - estimate_tokens(previous_text))
+            messages_text = self._messages_text(new_messages, budget)
+            
+            prompt = f"""Update the structured summary of this customer service email thread with the new messages below.
+
+{thread_info}
+Current Summary (covers all earlier messages):
+{previous_text}
+
+New Messages:
 {messages_text}
 
-Provide a JSON response with:
-1. issue_summary: Brief description of the customer's main issue
-2. key_actions: List of actions taken or needed
-3. resolution_status: Current status (resolved, pending, escalated)
-4. sentiment: Customer sentiment (positive, neutral, negative, frustrated)
-5. priority: Priority level (low, medium, high, urgent)
-6. next_steps: What needs to happen next
-7. tags: Relevant tags for categorization
+Provide the updated summary of the whole thread as a JSON response with:
+{self._RESPONSE_FIELDS}
 
 Format as valid JSON."""
 
+            return self._complete(prompt)
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            return None
+    
+    def _complete(self, prompt: str) -> Dict:
+        """Send a prompt to OpenAI and parse the JSON reply"""
+        summary_text = self._chat(prompt)
+        
+        # Try to parse as JSON
+        try:
+            return json.loads(summary_text)
+        except json.JSONDecodeError:
+            return {"issue_summary": summary_text}
+    
+    def _chat(self, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """Send a prompt to OpenAI and return the reply text"""
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
             response = openai.ChatCompletion.create(
                 model=self.model,
                 messages=[
@@ -71,56 +368,147 @@ Format as valid JSON."""
                     {"role": "user", "content": prompt}
                 ],
                 temperature=self.temperature,
-                max_tokens=self.max_tokens
+                max_tokens=max_tokens or self.max_tokens,
+                api_base=self.api_base or None,
+                request_timeout=self.request_timeout
             )
-            
-            summary_text = response.choices[0].message.content
-            
-            # Try to parse as JSON
-            try:
-                return json.loads(summary_text)
-            except json.JSONDecodeError:
-                return {"issue_summary": summary_text}
-                
-        except Exception as e:
-            print(f"OpenAI API error: {e}")
-            return None
+            outcome = 'success'
+        finally:
+            NLP_OPENAI_DURATION.observe(time.perf_counter() - start, outcome)
+        
+        return response.choices[0].message.content
     
-    def _summarize_with_rules(self, thread_data: Dict) -> Dict:
-        """Rule-based summarization as fallback"""
-        messages = thread_data['messages']
+    def match_keywords(self, thread_data: Dict) -> KeywordMatches:
+        """Rule keywords found in a thread, with their spans in each message body"""
+        return self._rule_matcher.scan(m['body'] for m in thread_data['messages'])
+    
+    def summarize_batch_rules(self, threads: List[Dict]) -> List[Dict]:
+        """Rule-based summaries for many threads at once
         
-        # Extract key information
-        total_messages = len(messages)
-        customer_messages = [m for m in messages if m['sender'] == 'customer']
-        company_messages = [m for m in messages if m['sender'] == 'company']
+        Produces exactly what _summarize_with_rules (plus summary_type)
+        returns for each thread. Each thread is tokenized once in C and
+        intersected with the keyword vocabulary shared by the whole batch.
+        Keyword presence becomes a (threads x keywords) matrix; group counts,
+        message/sender counts, and status, sentiment and priority are then
+        computed for the whole batch with NumPy array operations.
+        """
+        n = len(threads)
+        if n == 0:
+            return []
         
-        # Analyze keywords
-        all_text = ' '.join([m['body'].lower() for m in messages])
-        
-        # Issue detection
-        issue_keywords = {
-            'damaged': ['damaged', 'broken', 'defective'],
-            'delivery': ['delayed', 'late', 'where', 'tracking', 'stuck'],
-            'wrong_item': ['wrong', 'color', 'size'],
-            'refund': ['refund', 'return', 'credit'],
-            'address': ['address', 'reroute']
+        keyword_ids, group_matrix, group_ids = self._rule_vocabulary()
+        
+        # Keyword presence (threads x keywords), one C-level pass per thread
+        present = self._rule_matcher.present
+        found = [present(m['body'] for m in thread['messages']) for thread in threads]
+        found_counts = np.fromiter(map(len, found), dtype=np.int64, count=n)
+        cols = np.fromiter(
+            map(keyword_ids.__getitem__, itertools.chain.from_iterable(found)),
+            dtype=np.int64, count=int(found_counts.sum())
+        )
+        presence = np.zeros((n, len(keyword_ids)), dtype=np.int32)
+        presence[np.repeat(np.arange(n), found_counts), cols] = 1
+        counts = presence @ group_matrix
+        
+        # Message and sender counts
+        total = np.fromiter((len(t['messages']) for t in threads), dtype=np.int64, count=n)
+        senders = np.array([m['sender'] for t in threads for m in t['messages']], dtype=object)
+        owner = np.repeat(np.arange(n), total)
+        customer = np.bincount(owner, weights=(senders == 'customer'), minlength=n).astype(np.int64)
+        company = np.bincount(owner, weights=(senders == 'company'), minlength=n).astype(np.int64)
+        
+        issue_hits = counts[:, [group_ids[f'issue:{issue}'] for issue in self.ISSUE_KEYWORDS]] > 0
+        neg_count = counts[:, group_ids['negative']]
+        pos_count = counts[:, group_ids['positive']]
+        resolved = counts[:, group_ids['resolved']] > 0
+        urgent = counts[:, group_ids['urgent']] > 0
+        
+        status = np.select([resolved, total > 5], ['resolved', 'escalated'], 'pending')
+        sentiment = np.select(
+            [neg_count > pos_count * 2, neg_count > pos_count, pos_count > neg_count],
+            ['frustrated', 'negative', 'positive'],
+            'neutral'
+        )
+        priority = np.select(
+            [urgent | (total > 6), (total > 4) | issue_hits.any(axis=1)],
+            ['urgent', 'high'],
+            'medium'
+        )
+        
+        # Only 2^issues tag combinations exist; build each list once
+        issue_names = [issue.replace('_', ' ') for issue in self.ISSUE_KEYWORDS]
+        issue_masks = issue_hits @ (1 << np.arange(len(issue_names)))
+        tag_lists = {
+            mask: [name for bit, name in enumerate(issue_names) if mask >> bit & 1]
+            for mask in np.unique(issue_masks).tolist()
         }
         
-        detected_issues = []
-        for issue_type, keywords in issue_keywords.items():
-            if any(keyword in all_text for keyword in keywords):
-                detected_issues.append(issue_type.replace('_', ' '))
+        summaries = []
+        for thread, t, cust, comp, mask, st, se, pr in zip(
+            threads, total.tolist(), customer.tolist(), company.tolist(),
+            issue_masks.tolist(), status.tolist(), sentiment.tolist(), priority.tolist()
+        ):
+            summary = self._build_rule_summary(
+                thread, t, cust, comp, list(tag_lists[mask]), st, se, pr
+            )
+            summary['summary_type'] = 'rule_based'
+            summaries.append(summary)
+        
+        NLP_SUMMARIES.inc('rule_based', 'batch', amount=n)
+        return summaries
+    
+    @classmethod
+    def _rule_vocabulary(cls):
+        """Keyword columns, keyword->group matrix and group columns (built once)"""
+        if cls._rule_vocab is None:
+            matcher = cls._rule_matcher
+            keywords = matcher.keywords
+            groups = matcher.group_names
+            keyword_ids = {keyword: i for i, keyword in enumerate(keywords)}
+            group_ids = {group: j for j, group in enumerate(groups)}
+            group_matrix = np.zeros((len(keywords), len(groups)), dtype=np.int32)
+            for keyword, i in keyword_ids.items():
+                for group in matcher.groups_for(keyword):
+                    group_matrix[i, group_ids[group]] = 1
+            cls._rule_vocab = (keyword_ids, group_matrix, group_ids)
+        return cls._rule_vocab
+    
+    def rule_state(self, messages: List[Dict], state: Optional[Dict] = None) -> Dict:
+        """Counters the rule-based summary is derived from, extended by messages
         
-        # Sentiment analysis (simple)
-        negative_words = ['broken', 'wrong', 'delayed', 'stuck', 'lost', 'issue', 'problem']
-        positive_words = ['resolved', 'thanks', 'appreciate', 'approve']
+        Keyword presence is a set union and the rest are counts, so the
+        state of a thread can be updated from its new messages alone.
+        """
+        return self._rule_state(messages, state)
+    
+    def _rule_state(self, messages: List[Dict], state: Optional[Dict] = None) -> Dict:
+        """rule_state without the per-call timing, for use inside summarization"""
+        state = state or {"total_messages": 0, "customer_messages": 0,
+                          "company_messages": 0, "keywords": []}
+        keywords = self._rule_matcher.present([m['body'] for m in messages])
+        senders = [m['sender'] for m in messages]
         
-        neg_count = sum(1 for word in negative_words if word in all_text)
-        pos_count = sum(1 for word in positive_words if word in all_text)
+        return {
+            "total_messages": state['total_messages'] + len(messages),
+            "customer_messages": state['customer_messages'] + senders.count('customer'),
+            "company_messages": state['company_messages'] + senders.count('company'),
+            "keywords": sorted(keywords.union(state['keywords']) if state['keywords'] else keywords)
+        }
+    
+    def _summarize_with_rules(self, thread_data: Dict, state: Optional[Dict] = None) -> Dict:
+        """Rule-based summarization as fallback"""
+        # Extract key information (single keyword pass over all message bodies)
+        state = state or self._rule_state(thread_data['messages'])
+        total_messages = state['total_messages']
+        
+        # Analyze keywords
+        detected_issues, neg_count, pos_count, resolved, urgent = self._keyword_signals(
+            tuple(state['keywords'])
+        )
+        detected_issues = list(detected_issues)
         
         # Status determination
-        if 'resolved' in all_text:
+        if resolved:
             status = 'resolved'
         elif total_messages > 5:
             status = 'escalated'
@@ -138,19 +526,46 @@ Format as valid JSON."""
             sentiment = 'neutral'
         
         # Priority
-        if 'urgent' in all_text or total_messages > 6:
+        if urgent or total_messages > 6:
             priority = 'urgent'
         elif total_messages > 4 or detected_issues:
             priority = 'high'
         else:
             priority = 'medium'
         
+        return self._build_rule_summary(
+            thread_data, total_messages, state['customer_messages'], state['company_messages'],
+            detected_issues, status, sentiment, priority
+        )
+    
+    @classmethod
+    @functools.lru_cache(maxsize=4096)
+    def _keyword_signals(cls, keywords: tuple) -> tuple:
+        """Issue tags, negative and positive counts, resolved and urgent for a keyword set
+        
+        These depend only on which keywords were found, and threads share
+        few distinct keyword sets, so they are cached.
+        """
+        matched = cls._rule_matcher.group(keywords)
+        detected_issues = tuple(
+            issue_type.replace('_', ' ')
+            for issue_type in cls.ISSUE_KEYWORDS
+            if matched[f'issue:{issue_type}']
+        )
+        return (detected_issues, len(matched['negative']), len(matched['positive']),
+                bool(matched['resolved']), bool(matched['urgent']))
+    
+    @staticmethod
+    def _build_rule_summary(thread_data: Dict, total_messages: int, customer_messages: int,
+                            company_messages: int, detected_issues: List[str], status: str,
+                            sentiment: str, priority: str) -> Dict:
+        """Assemble the rule-based summary dict (shared by scalar and batch paths)"""
         return {
             "issue_summary": f"Customer contacted regarding {thread_data['product']} (Order {thread_data['order_id']}). Issues: {', '.join(detected_issues) if detected_issues else thread_data['topic']}.",
             "key_actions": [
                 f"Total messages exchanged: {total_messages}",
-                f"Customer messages: {len(customer_messages)}",
-                f"Agent responses: {len(company_messages)}"
+                f"Customer messages: {customer_messages}",
+                f"Agent responses: {company_messages}"
             ],
             "resolution_status": status,
             "sentiment": sentiment,
@@ -158,4 +573,3 @@ Format as valid JSON."""
             "next_steps": "Review thread and take appropriate action" if status != 'resolved' else "Thread appears resolved",
             "tags": detected_issues
         }
-
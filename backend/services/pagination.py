@@ -0,0 +1,94 @@
+"""
+Keyset Pagination Helpers
+"""
+import base64
+import json
+from typing import Callable, Iterable, Iterator, List, Optional
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor can't be decoded"""
+
+
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values: List) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    encoded = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(encoded).decode('ascii')
+
+
+def decode_cursor(cursor: str, length: int) -> List:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise InvalidCursorError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursorError("Invalid cursor")
+    return values
+
+
+class KeysetPage:
+    """A keyset page whose items are fetched as it is iterated
+
+    Yields at most limit items (all matching items without a limit). Once
+    iteration ends, last_cursor is the cursor after the last item yielded
+    and next_cursor is set to it if more items remain. Stopping early closes
+    the underlying row iterator, so no further batches are read.
+    """
+
+    def __init__(self, items: Iterator, limit: Optional[int], sort_key: Callable[[object], List]):
+        self._items = items
+        self.limit = limit
+        self._sort_key = sort_key
+        self.next_cursor = None
+        self.last_cursor = None
+
+    def __iter__(self):
+        last = None
+        try:
+            for count, item in enumerate(self._items):
+                if self.limit and count == self.limit:
+                    self.next_cursor = encode_cursor(self._sort_key(last))
+                    break
+                yield item
+                last = item
+        finally:
+            if last is not None:
+                self.last_cursor = encode_cursor(self._sort_key(last))
+            close = getattr(self._items, 'close', None)
+            if close:
+                close()
+
+
+def split_args(values: Iterable[str]) -> List[str]:
+    """Flatten repeated and comma-separated query args (?status=a,b&status=c)"""
+    return [item.strip() for value in values for item in value.split(',') if item.strip()]
+
+
+def normalize_timestamp(value: Optional[str]) -> Optional[str]:
+    """Match SQLite CURRENT_TIMESTAMP formatting so ISO dates compare correctly"""
+    if not value:
+        return None
+    return value.replace('T', ' ').rstrip('Z')
+
+
+def select_fields(requested: Optional[List[str]], allowed: Iterable[str],
+                  required: Iterable[str]) -> tuple[Optional[List[str]], List[str]]:
+    """Validate a fields= selection
+
+    Returns the fields to output (None for all) and the columns to select,
+    which always include the sort-key columns needed for the cursor.
+    """
+    allowed = list(allowed)
+    if not requested:
+        return None, allowed
+
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    columns = list(dict.fromkeys(list(required) + requested))
+    return requested, columns
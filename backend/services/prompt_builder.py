@@ -0,0 +1,195 @@
+"""
+Token-Budgeted Prompt Builder
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Letters, up to three digits, or a single other symbol: roughly how
+# OpenAI's BPE tokenizers split English text
+_TOKEN_RE = re.compile(r'[^\W\d_]+|\d{1,3}|[^\w\s]|_')
+
+# Where a reply's copy of the mail it answers begins
+_REPLY_HEADER_RE = re.compile(
+    r'^(On\b.{0,200}\bwrote:|-{2,}\s*Original Message\s*-{2,}|From:.*\n(Sent|Date):.*)$',
+    re.IGNORECASE | re.MULTILINE
+)
+_SIGNATURE_DELIMITER_RE = re.compile(r'^--\s*$', re.MULTILINE)
+_SENT_FROM_RE = re.compile(r'^Sent from my .*$', re.IGNORECASE | re.MULTILINE)
+_SIGN_OFF_RE = re.compile(
+    r'^((best|kind|warm)\s+)?(regards|thanks|thank you|cheers|sincerely|best)[,.!]?$',
+    re.IGNORECASE
+)
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Sentences shorter than this are kept even when repeated ("Thanks.", "Yes.")
+MIN_DUPLICATE_CHARS = 20
+
+TRUNCATED = ' [...]'
+
+
+def estimate_tokens(text: str) -> int:
+    """Offline estimate of the tokens OpenAI models see for English text
+
+    Words count one token plus one per six further letters, numbers one
+    per three digits, and every other symbol one. An approximation (no
+    tokenizer dependency); leave some headroom in budgets.
+    """
+    count = 0
+    for piece in _TOKEN_RE.findall(text):
+        count += 1 + (len(piece) - 1) // 6 if piece[0].isalpha() else 1
+    return count
+
+
+def strip_quoted(body: str) -> str:
+    """Drop quoted replies, the signature and mobile footers from an email body"""
+    header = _REPLY_HEADER_RE.search(body)
+    if header:
+        body = body[:header.start()]
+    delimiter = _SIGNATURE_DELIMITER_RE.search(body)
+    if delimiter:
+        body = body[:delimiter.start()]
+    body = _SENT_FROM_RE.sub('', body)
+
+    lines = [line.strip() for line in body.splitlines()]
+    lines = [line for line in lines if not line.startswith('>')]
+    while lines and not lines[-1]:
+        lines.pop()
+    # A standalone sign-off followed by at most a few short lines (name, title),
+    # unless it is all the message says ("Thanks!")
+    for i in range(max(0, len(lines) - 5), len(lines)):
+        if (_SIGN_OFF_RE.match(lines[i]) and any(lines[:i])
+                and all(len(line) <= 60 for line in lines[i + 1:])):
+            lines = lines[:i]
+            break
+    return ' '.join(' '.join(lines).split())
+
+
+@dataclass
+class BuiltPrompt:
+    """Rendered messages and what compaction saved"""
+    text: str
+    tokens: int
+    original_tokens: int
+    omitted: int = 0
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.original_tokens - self.tokens)
+
+
+class PromptBuilder:
+    """Renders thread messages for a prompt within a token budget
+
+    Every message loses quoted replies, signatures and sentences already
+    said earlier in the thread. If the thread is still over budget, the
+    first keep_first and last keep_last messages are kept as they are and
+    the ones in between are cut to their first sentence, then left out
+    oldest first; as a last resort the longest kept messages are truncated.
+    """
+
+    def __init__(self, keep_first: int = 1, keep_last: int = 3, middle_tokens: int = 40):
+        self.keep_first = keep_first
+        self.keep_last = keep_last
+        self.middle_tokens = middle_tokens
+
+    @staticmethod
+    def render(messages: List[Dict]) -> str:
+        """Messages as-is, one paragraph each"""
+        return ''.join(PromptBuilder._render_one(msg['sender'], msg['timestamp'], msg['body'])
+                       for msg in messages)
+
+    @staticmethod
+    def _render_one(sender: str, timestamp: str, body: str) -> str:
+        label = "Customer" if sender == 'customer' else "Agent"
+        return f"{label} ({timestamp}): {body}\n\n"
+
+    def build(self, messages: List[Dict], budget: Optional[int] = None) -> BuiltPrompt:
+        """Compact messages and fit them into budget tokens (no limit if None)"""
+        original_tokens = estimate_tokens(self.render(messages))
+
+        bodies = self._deduplicate([strip_quoted(msg['body']) for msg in messages])
+        entries = [
+            self._render_one(msg['sender'], msg['timestamp'], body)
+            for msg, body in zip(messages, bodies)
+        ]
+        sizes = [estimate_tokens(entry) for entry in entries]
+
+        def built(omitted: int = 0) -> BuiltPrompt:
+            text = ''.join(entry for entry in entries if entry is not None)
+            return BuiltPrompt(text, estimate_tokens(text), original_tokens, omitted)
+
+        if budget is None or sum(sizes) <= budget:
+            return built()
+
+        middle = list(range(self.keep_first, len(entries) - self.keep_last))
+        for i in middle:
+            msg = messages[i]
+            entries[i] = self._render_one(msg['sender'], msg['timestamp'],
+                                          self._truncate(self._lead(bodies[i]), self.middle_tokens))
+            sizes[i] = estimate_tokens(entries[i])
+
+        omitted = 0
+        marker = None
+        for i in middle:
+            if sum(sizes) <= budget:
+                break
+            entries[i] = None
+            sizes[i] = 0
+            omitted += 1
+            marker = i
+        if omitted:
+            entries[marker] = f"[{omitted} earlier messages omitted]\n\n"
+            sizes[marker] = estimate_tokens(entries[marker])
+
+        # Still over: halve the longest kept message until it fits
+        kept = [i for i in range(len(entries)) if entries[i] is not None and i not in middle]
+        while sum(sizes) > budget:
+            longest = max(kept, key=lambda i: sizes[i])
+            if sizes[longest] <= self.middle_tokens:
+                break
+            msg = messages[longest]
+            bodies[longest] = self._truncate(bodies[longest], sizes[longest] // 2)
+            entries[longest] = self._render_one(msg['sender'], msg['timestamp'], bodies[longest])
+            size = estimate_tokens(entries[longest])
+            if size >= sizes[longest]:
+                break
+            sizes[longest] = size
+
+        return built(omitted)
+
+    @staticmethod
+    def _deduplicate(bodies: List[str]) -> List[str]:
+        """Remove sentences repeated from earlier messages (boilerplate, re-pasted text)"""
+        seen = set()
+        result = []
+        for body in bodies:
+            sentences = []
+            for sentence in _SENTENCE_RE.split(body):
+                key = ' '.join(sentence.lower().split())
+                if len(key) >= MIN_DUPLICATE_CHARS:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                sentences.append(sentence)
+            result.append(' '.join(sentences) if sentences or not body else '[repeats earlier text]')
+        return result
+
+    @staticmethod
+    def _lead(body: str) -> str:
+        """First sentence of a body"""
+        return _SENTENCE_RE.split(body, maxsplit=1)[0]
+
+    @staticmethod
+    def _truncate(body: str, max_tokens: int) -> str:
+        """Leading words of body within max_tokens"""
+        if estimate_tokens(body) <= max_tokens:
+            return body
+        words = []
+        tokens = estimate_tokens(TRUNCATED)
+        for word in body.split():
+            tokens += estimate_tokens(word)
+            if tokens > max_tokens:
+                break
+            words.append(word)
+        return ' '.join(words) + TRUNCATED
@@ -0,0 +1,240 @@
+"""
+Time-Bucketed Analytics Rollups
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from metrics import instrumented
+from models.database import Database
+from services.audit_writer import AuditWriter
+
+
+@instrumented('rollups')
+class RollupService:
+    """Folds audit_log events into hourly and daily analytics buckets
+
+    audit_log is append-only with increasing ids, so a watermark (the last
+    rolled-up id) is enough to process each event exactly once. Each batch
+    of events and the watermark move are committed together. Reads only
+    touch the buckets in the requested range, so their cost does not grow
+    with history.
+    """
+
+    WATERMARK = 'analytics_rollups'
+
+    GRANULARITIES = {
+        'hour': ("strftime('%Y-%m-%d %H:00:00', ts)", timedelta(hours=1), 24 * 31),
+        'day': ("date(ts)", timedelta(days=1), 366 * 2)
+    }
+
+    # audit_log action -> rolled-up count metric
+    EVENT_METRICS = {
+        'thread_created': 'threads_created',
+        'summary_generated': 'summaries_generated',
+        'summary_edited': 'summaries_edited',
+        'summary_approved': 'summaries_approved',
+        'summary_rejected': 'summaries_rejected'
+    }
+
+    # Summary audit details start with "Summary ID: <id>"
+    _SUMMARY_ID_SQL = "CAST(substr(b.details, 13) AS INTEGER)"
+
+    def __init__(self, db: Database, batch_size: int = 10000,
+                 audit: Optional[AuditWriter] = None):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.audit = audit
+
+    def _rollup_sql(self, bucket: str) -> str:
+        """Aggregate events in (low, high] into one granularity's buckets"""
+        counts = '\n            UNION ALL\n'.join(
+            f"SELECT timestamp, '{metric}', '', NULL FROM batch WHERE action = '{action}'"
+            for action, metric in self.EVENT_METRICS.items()
+        )
+        return f'''
+            WITH batch AS (
+                SELECT a.id, a.action, a.timestamp, a.details, t.topic, t.product
+                FROM audit_log a
+                LEFT JOIN threads t ON t.thread_id = a.thread_id
+                WHERE a.id > :low AND a.id <= :high
+            ),
+            events (ts, metric, dimension, seconds) AS (
+                {counts}
+                UNION ALL
+                SELECT timestamp, 'summaries_generated_by_topic', ifnull(topic, ''), NULL
+                FROM batch WHERE action = 'summary_generated'
+                UNION ALL
+                SELECT timestamp, 'summaries_generated_by_product', ifnull(product, ''), NULL
+                FROM batch WHERE action = 'summary_generated'
+                UNION ALL
+                SELECT b.timestamp, 'approval_latency', '',
+                       (julianday(b.timestamp) - julianday(s.created_at)) * 86400
+                FROM batch b
+                JOIN summaries s ON s.id = {self._SUMMARY_ID_SQL}
+                WHERE b.action = 'summary_approved' AND b.details LIKE 'Summary ID: %'
+            )
+            INSERT INTO analytics_rollups (granularity, bucket, metric, dimension, count, total_seconds)
+            SELECT :granularity, {bucket}, metric, dimension, COUNT(*), SUM(seconds)
+            FROM events
+            WHERE true
+            GROUP BY 2, 3, 4
+            ON CONFLICT (granularity, bucket, metric, dimension) DO UPDATE SET
+                count = count + excluded.count,
+                total_seconds = ifnull(total_seconds, 0) + excluded.total_seconds
+        '''
+
+    def get_watermark(self) -> Dict:
+        """Last rolled-up audit event"""
+        with self.db.get_db() as conn:
+            row = conn.execute('''
+                SELECT w.value AS event_id, w.updated_at, a.timestamp
+                FROM watermarks w
+                LEFT JOIN audit_log a ON a.id = w.value
+                WHERE w.name = ?
+            ''', (self.WATERMARK,)).fetchone()
+
+        if not row:
+            return {"event_id": 0, "event_timestamp": None, "updated_at": None}
+        return {"event_id": row['event_id'], "event_timestamp": row['timestamp'],
+                "updated_at": row['updated_at']}
+
+    def rollup(self, max_batches: Optional[int] = None) -> Dict:
+        """Fold audit events past the watermark into the buckets
+
+        Works in batches of batch_size events, each in its own write
+        transaction, until caught up (or after max_batches). Audit entries
+        this process still buffers are written first; other processes'
+        arrive within their flush interval and are folded in by a later run.
+        """
+        if self.audit:
+            self.audit.flush()
+        events = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            with self.db.get_db() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+
+                row = conn.execute('SELECT value FROM watermarks WHERE name = ?',
+                                   (self.WATERMARK,)).fetchone()
+                low = row['value'] if row else 0
+                row = conn.execute('''
+                    SELECT MAX(id) AS high, COUNT(*) AS events
+                    FROM (SELECT id FROM audit_log WHERE id > ? ORDER BY id LIMIT ?)
+                ''', (low, self.batch_size)).fetchone()
+                if row['high'] is None:
+                    break
+
+                for granularity, (bucket, _, _) in self.GRANULARITIES.items():
+                    conn.execute(self._rollup_sql(bucket), {
+                        "low": low, "high": row['high'], "granularity": granularity
+                    })
+                conn.execute('''
+                    INSERT INTO watermarks (name, value) VALUES (?, ?)
+                    ON CONFLICT (name) DO UPDATE SET
+                        value = excluded.value, updated_at = CURRENT_TIMESTAMP
+                ''', (self.WATERMARK, row['high']))
+
+            events += row['events']
+            batches += 1
+
+        return {"events": events, "batches": batches, "watermark": self.get_watermark()}
+
+    def get_timeseries(self, granularity: str = 'day', start: Optional[str] = None,
+                       end: Optional[str] = None) -> Dict:
+        """Bucketed counts, approval latency and topic/product volume for a range
+
+        start/end are ISO timestamps (UTC, like the audit log) and are
+        floored to the granularity; end is inclusive. Missing buckets are
+        filled with zeros.
+        """
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(self.GRANULARITIES)}")
+        _, step, max_buckets = self.GRANULARITIES[granularity]
+
+        end_at = self._floor(self._parse(end) if end else datetime.utcnow(), granularity)
+        start_at = self._floor(self._parse(start), granularity) if start else (
+            end_at - step * (6 if granularity == 'day' else 47)
+        )
+        if start_at > end_at:
+            raise ValueError("start must not be after end")
+        if (end_at - start_at) / step >= max_buckets:
+            raise ValueError(f"Range too large: at most {max_buckets} {granularity} buckets")
+
+        keys = []
+        at = start_at
+        while at <= end_at:
+            keys.append(self._bucket_key(at, granularity))
+            at += step
+
+        with self.db.get_db() as conn:
+            rows = conn.execute('''
+                SELECT bucket, metric, dimension, count, total_seconds
+                FROM analytics_rollups
+                WHERE granularity = ? AND bucket BETWEEN ? AND ?
+            ''', (granularity, keys[0], keys[-1])).fetchall()
+
+        buckets = {key: self._empty_bucket(key) for key in keys}
+        totals = self._empty_bucket(None)
+        for row in rows:
+            for target in (buckets[row['bucket']], totals):
+                self._add(target, row)
+
+        return {
+            "granularity": granularity,
+            "start": keys[0],
+            "end": keys[-1],
+            "buckets": [self._finish(bucket) for bucket in buckets.values()],
+            "totals": self._finish(totals),
+            "watermark": self.get_watermark()
+        }
+
+    def _empty_bucket(self, key: Optional[str]) -> Dict:
+        bucket = {"bucket": key} if key else {}
+        bucket.update({metric: 0 for metric in self.EVENT_METRICS.values()})
+        bucket.update({
+            "approval_latency": {"count": 0, "total_seconds": 0.0},
+            "by_topic": {},
+            "by_product": {}
+        })
+        return bucket
+
+    @staticmethod
+    def _add(bucket: Dict, row):
+        metric = row['metric']
+        if metric == 'approval_latency':
+            bucket['approval_latency']['count'] += row['count']
+            bucket['approval_latency']['total_seconds'] += row['total_seconds'] or 0
+        elif metric.startswith('summaries_generated_by_'):
+            breakdown = bucket['by_' + metric.rsplit('_', 1)[1]]
+            breakdown[row['dimension']] = breakdown.get(row['dimension'], 0) + row['count']
+        elif metric in bucket:
+            bucket[metric] += row['count']
+
+    @staticmethod
+    def _finish(bucket: Dict) -> Dict:
+        """Replace the latency sum with its average"""
+        latency = bucket.pop('approval_latency')
+        bucket['approvals_timed'] = latency['count']
+        bucket['avg_seconds_to_approval'] = (
+            round(latency['total_seconds'] / latency['count'], 1) if latency['count'] else None
+        )
+        return bucket
+
+    @staticmethod
+    def _parse(value: str) -> datetime:
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f"Invalid timestamp: {value}")
+        if parsed.tzinfo:
+            # Buckets are naive UTC, like CURRENT_TIMESTAMP
+            parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+        return parsed
+
+    @staticmethod
+    def _floor(at: datetime, granularity: str) -> datetime:
+        at = at.replace(minute=0, second=0, microsecond=0)
+        return at.replace(hour=0) if granularity == 'day' else at
+
+    @staticmethod
+    def _bucket_key(at: datetime, granularity: str) -> str:
+        return at.strftime('%Y-%m-%d' if granularity == 'day' else '%Y-%m-%d %H:00:00')
@@ -0,0 +1,142 @@
+"""
+Content-Addressed Summary Cache
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from metrics import SUMMARY_CACHE_LOOKUPS
+from models.database import Database
+
+
+class SummaryCache:
+    """Two-tier summary cache: in-process LRU backed by the summary_cache table"""
+
+    def __init__(self, db: Database, max_entries: int = 1024, ttl_seconds: int = 604800):
+        self.db = db
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._init_state()
+
+    def _init_state(self):
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getstate__(self):
+        # Locks can't be pickled (process pools); each process gets its own LRU
+        return {
+            'db': self.db,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    @staticmethod
+    def make_key(thread_data: Dict, **params) -> str:
+        """Hash normalized thread content together with model/prompt parameters"""
+        normalized = {
+            'order_id': thread_data.get('order_id'),
+            'product': thread_data.get('product'),
+            'topic': thread_data.get('topic'),
+            'subject': thread_data.get('subject'),
+            'messages': [
+                [msg.get('sender'), msg.get('timestamp'), ' '.join(msg.get('body', '').split())]
+                for msg in thread_data.get('messages', [])
+            ],
+            'params': params
+        }
+        encoded = json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up a summary, promoting persistent hits into memory"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                SUMMARY_CACHE_LOOKUPS.inc('memory_hit')
+                return json.loads(entry[0])
+            if entry:
+                del self._memory[key]
+
+        with self.db.get_db() as conn:
+            row = conn.execute(
+                'SELECT summary, expires_at FROM summary_cache WHERE cache_key = ? AND expires_at > ?',
+                (key, now)
+            ).fetchone()
+
+        with self._lock:
+            if not row:
+                self.misses += 1
+                SUMMARY_CACHE_LOOKUPS.inc('miss')
+                return None
+            self.db_hits += 1
+            SUMMARY_CACHE_LOOKUPS.inc('db_hit')
+            self._remember(key, row['summary'], row['expires_at'])
+
+        return json.loads(row['summary'])
+
+    def set(self, key: str, summary: Dict, model: str = ''):
+        """Store a summary in both tiers"""
+        encoded = json.dumps(summary)
+        expires_at = time.time() + self.ttl_seconds
+
+        with self.db.get_db() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO summary_cache (cache_key, summary, model, expires_at)
+                VALUES (?, ?, ?, ?)
+            ''', (key, encoded, model, expires_at))
+
+        with self._lock:
+            self._remember(key, encoded, expires_at)
+
+    def _remember(self, key: str, encoded: str, expires_at: float):
+        """Insert into the LRU, evicting the least recently used entries (lock held)"""
+        self._memory[key] = (encoded, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def purge_expired(self) -> int:
+        """Delete expired entries from the persistent tier"""
+        with self.db.get_db() as conn:
+            cursor = conn.execute(
+                'DELETE FROM summary_cache WHERE expires_at <= ?',
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def clear(self):
+        """Drop every cached summary"""
+        with self.db.get_db() as conn:
+            conn.execute('DELETE FROM summary_cache')
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self) -> Dict:
+        """Get hit/miss counters"""
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            hits = self.memory_hits + self.db_hits
+            return {
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(hits / lookups * 100, 2) if lookups else 0
+            }
@@ -2,18 +2,37 @@
 Summary Business Logic Service
 """
 import json
-from typing import List, Optional, Dict
+from typing import Iterable, List, Optional, Dict
 from datetime import datetime
+from metrics import instrumented
 from models.database import Database
 from models.summary import Summary
 from models.thread import Thread
+from services.audit_writer import AuditWriter
+from services.pagination import (
+    MAX_PAGE_SIZE, KeysetPage, decode_cursor, normalize_timestamp, select_fields
+)
 
 
+@instrumented('summaries')
 class SummaryService:
     """Business logic for summary operations"""
     
-    def __init__(self, db: Database):
+    LIST_FIELDS = ('id', 'thread_id', 'original_summary', 'edited_summary', 'status',
+                   'summary_type', 'crm_context', 'created_at', 'approved_at', 'approved_by',
+                   'message_count', 'stale')
+    
+    # Bulk transitions: action -> (new status, audit action, extra SET clause)
+    BULK_ACTIONS = {
+        'approve': ('approved', 'summary_approved', ', approved_at = :now, approved_by = :user'),
+        'reject': ('rejected', 'summary_rejected', '')
+    }
+    
+    def __init__(self, db: Database, bulk_max_summaries: int = 10000,
+                 audit: Optional[AuditWriter] = None):
         self.db = db
+        self.bulk_max_summaries = bulk_max_summaries
+        self.audit = audit or AuditWriter(db, mode='strict')
     
     def get_all_summaries(self, status: Optional[str] = None) -> List[Summary]:
         """Get all summaries, optionally filtered by status"""
@@ -30,6 +49,70 @@ class SummaryService:
             
             return [Summary.from_row(row) for row in rows]
     
+    def list_summaries(self, filters: Optional[Dict] = None, fields: Optional[List[str]] = None,
+                       limit: Optional[int] = None,
+                       cursor: Optional[str] = None) -> tuple[List[Summary], Optional[str]]:
+        """Get a page of summaries, newest first, using keyset pagination
+        
+        filters may hold lists for status/summary_type/thread_id, lists for
+        the thread's topic/product/order_id, created_after / created_before
+        timestamps, and stale (True/False). Returns the summaries and the cursor for
+        the next page (None on the last page).
+        """
+        page = self.iter_summaries(filters, fields, limit, cursor)
+        summaries = list(page)
+        return summaries, page.next_cursor
+    
+    def iter_summaries(self, filters: Optional[Dict] = None, fields: Optional[List[str]] = None,
+                       limit: Optional[int] = None, cursor: Optional[str] = None) -> KeysetPage:
+        """Like list_summaries, but rows are fetched and converted while iterating
+        
+        Filters, fields and the cursor are validated up front (ValueError).
+        """
+        _, columns = select_fields(fields, self.LIST_FIELDS, ('id', 'created_at'))
+        select = ', '.join(f's.{column}' for column in columns)
+        
+        join, conditions, params = self._filter_conditions(filters or {})
+        after = decode_cursor(cursor, 2) if cursor else None
+        if limit:
+            limit = min(limit, MAX_PAGE_SIZE)
+        
+        rows = self.db.iter_keyset(f'SELECT {select} FROM summaries s{join}', conditions, params,
+                                   ('s.created_at', 's.id'), after=after,
+                                   limit=limit + 1 if limit else None)
+        return KeysetPage((Summary.from_row(row) for row in rows), limit,
+                          lambda summary: [summary.created_at, summary.id])
+    
+    @staticmethod
+    def _filter_conditions(filters: Dict) -> tuple[str, List[str], List]:
+        """JOIN clause, WHERE conditions and parameters for list filters on summaries s"""
+        conditions = []
+        params = []
+        for column in ('status', 'summary_type', 'thread_id'):
+            values = filters.get(column)
+            if values:
+                conditions.append(f"s.{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        
+        join = ''
+        for column in ('topic', 'product', 'order_id'):
+            values = filters.get(column)
+            if values:
+                join = ' JOIN threads t ON t.thread_id = s.thread_id'
+                conditions.append(f"t.{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        
+        if filters.get('stale') is not None:
+            conditions.append('s.stale = ?')
+            params.append(1 if filters['stale'] else 0)
+        if filters.get('created_after'):
+            conditions.append('s.created_at >= ?')
+            params.append(normalize_timestamp(filters['created_after']))
+        if filters.get('created_before'):
+            conditions.append('s.created_at < ?')
+            params.append(normalize_timestamp(filters['created_before']))
+        return join, conditions, params
+    
     def get_summary_by_id(self, summary_id: int) -> Optional[Summary]:
         """Get summary by ID"""
         with self.db.get_db() as conn:
@@ -42,96 +125,196 @@ class SummaryService:
                 return Summary.from_row(row)
             return None
     
+    def get_latest_summary(self, thread_id: str) -> Optional[Summary]:
+        """Get the newest summary of a thread that wasn't rejected"""
+        with self.db.get_db() as conn:
+            row = conn.execute('''
+                SELECT * FROM summaries
+                WHERE thread_id = ? AND status != 'rejected'
+                ORDER BY id DESC
+                LIMIT 1
+            ''', (thread_id,)).fetchone()
+            
+            if row:
+                return Summary.from_row(row)
+            return None
+    
     def create_summary(self, summary: Summary) -> int:
         """Create new summary"""
         with self.db.get_db() as conn:
-            cursor = conn.execute('''
-                INSERT INTO summaries 
-                (thread_id, original_summary, edited_summary, status, summary_type, crm_context)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                summary.thread_id,
-                json.dumps(summary.original_summary),
-                json.dumps(summary.edited_summary),
-                summary.status,
-                summary.summary_type,
-                json.dumps(summary.crm_context)
-            ))
-            
-            summary_id = cursor.lastrowid
-            
-            # Log the action
-            self._log_action(conn, summary.thread_id, 'summary_generated', 'system',
-                           f"Summary ID: {summary_id}")
-            
-            return summary_id
+            return self._insert_summary(conn, summary)
+    
+    def create_summaries(self, summaries: List[Summary]) -> List[int]:
+        """Create several summaries in a single transaction"""
+        with self.db.get_db() as conn:
+            return [self._insert_summary(conn, summary) for summary in summaries]
+    
+    def _insert_summary(self, conn, summary: Summary) -> int:
+        """Insert a summary and its audit entry using an open connection"""
+        cursor = conn.execute('''
+            INSERT INTO summaries 
+            (thread_id, original_summary, edited_summary, status, summary_type, crm_context,
+             message_count, rule_state)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            summary.thread_id,
+            json.dumps(summary.original_summary),
+            json.dumps(summary.edited_summary),
+            summary.status,
+            summary.summary_type,
+            json.dumps(summary.crm_context),
+            summary.message_count,
+            json.dumps(summary.rule_state) if summary.rule_state else None
+        ))
+        
+        summary_id = cursor.lastrowid
+        
+        # Log the action
+        self._log_action(conn, summary.thread_id, 'summary_generated', 'system',
+                       f"Summary ID: {summary_id}")
+        
+        return summary_id
     
     def update_summary(self, summary_id: int, edited_summary: Dict, user: str) -> bool:
         """Update summary with edits"""
         with self.db.get_db() as conn:
-            cursor = conn.execute('''
+            row = conn.execute('''
                 UPDATE summaries 
                 SET edited_summary = ?, status = 'edited'
                 WHERE id = ?
-            ''', (json.dumps(edited_summary), summary_id))
+                RETURNING thread_id
+            ''', (json.dumps(edited_summary), summary_id)).fetchone()
             
-            if cursor.rowcount > 0:
-                # Get thread_id for audit
-                row = conn.execute(
-                    'SELECT thread_id FROM summaries WHERE id = ?',
-                    (summary_id,)
-                ).fetchone()
-                
-                if row:
-                    self._log_action(conn, row['thread_id'], 'summary_edited', user,
-                                   f"Summary ID: {summary_id}")
+            if row:
+                self._log_action(conn, row['thread_id'], 'summary_edited', user,
+                               f"Summary ID: {summary_id}")
                 return True
             return False
     
     def approve_summary(self, summary_id: int, user: str) -> bool:
         """Approve summary"""
         with self.db.get_db() as conn:
-            cursor = conn.execute('''
+            row = conn.execute('''
                 UPDATE summaries 
                 SET status = 'approved', approved_at = ?, approved_by = ?
                 WHERE id = ?
-            ''', (datetime.now().isoformat(), user, summary_id))
+                RETURNING thread_id
+            ''', (datetime.now().isoformat(), user, summary_id)).fetchone()
             
-            if cursor.rowcount > 0:
-                # Get thread_id for audit
-                row = conn.execute(
-                    'SELECT thread_id FROM summaries WHERE id = ?',
-                    (summary_id,)
-                ).fetchone()
-                
-                if row:
-                    self._log_action(conn, row['thread_id'], 'summary_approved', user,
-                                   f"Summary ID: {summary_id}")
+            if row:
+                self._log_action(conn, row['thread_id'], 'summary_approved', user,
+                               f"Summary ID: {summary_id}")
                 return True
             return False
     
     def reject_summary(self, summary_id: int, user: str, reason: str = '') -> bool:
         """Reject summary"""
         with self.db.get_db() as conn:
-            cursor = conn.execute('''
+            row = conn.execute('''
                 UPDATE summaries 
                 SET status = 'rejected'
                 WHERE id = ?
-            ''', (summary_id,))
+                RETURNING thread_id
+            ''', (summary_id,)).fetchone()
             
-            if cursor.rowcount > 0:
-                # Get thread_id for audit
-                row = conn.execute(
-                    'SELECT thread_id FROM summaries WHERE id = ?',
-                    (summary_id,)
-                ).fetchone()
-                
-                if row:
-                    self._log_action(conn, row['thread_id'], 'summary_rejected', user,
-                                   f"Summary ID: {summary_id}, Reason: {reason}")
+            if row:
+                self._log_action(conn, row['thread_id'], 'summary_rejected', user,
+                               f"Summary ID: {summary_id}, Reason: {reason}")
                 return True
             return False
     
+    def bulk_transition(self, action: str, user: str, summary_ids: Optional[List[int]] = None,
+                        filters: Optional[Dict] = None, reason: str = '') -> Dict:
+        """Approve or reject many summaries in one transaction
+        
+        Targets the given ids, or the summaries matching list_summaries-style
+        filters (at most bulk_max_summaries of them, lowest ids first; has_more
+        tells whether to call again). Summaries already in the target state
+        are skipped rather than re-stamped. Returns per-id outcomes: approved /
+        rejected, skipped or not_found.
+        """
+        if action not in self.BULK_ACTIONS:
+            raise ValueError(f"Unknown action: {action}")
+        status, audit_action, extra = self.BULK_ACTIONS[action]
+        
+        with self.db.get_db() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            targets, existing, has_more = self._bulk_targets(conn, summary_ids, filters)
+            
+            rows = conn.execute(f'''
+                UPDATE summaries
+                SET status = :status{extra}
+                WHERE id IN (SELECT value FROM json_each(:ids)) AND status != :status
+                RETURNING id, thread_id
+            ''', {"status": status, "ids": json.dumps(targets), "user": user,
+                  "now": datetime.now().isoformat()}).fetchall()
+            self._log_actions(conn, rows, audit_action, user,
+                              f', Reason: {reason}' if action == 'reject' else '')
+        
+        return self._bulk_result(targets, existing, rows, status, has_more)
+    
+    def bulk_edit(self, edits: Dict[int, Dict], user: str) -> Dict:
+        """Apply several edited summaries in one transaction (outcomes: edited / not_found)"""
+        edits = {int(summary_id): summary for summary_id, summary in edits.items()}
+        if any(not isinstance(summary, dict) for summary in edits.values()):
+            raise ValueError("Each edited summary must be an object")
+        
+        with self.db.get_db() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            targets, existing, _ = self._bulk_targets(conn, list(edits), None)
+            
+            rows = conn.execute('''
+                UPDATE summaries
+                SET edited_summary = e.value, status = 'edited'
+                FROM json_each(?) e
+                WHERE summaries.id = CAST(e.key AS INTEGER)
+                RETURNING summaries.id, summaries.thread_id
+            ''', (json.dumps(edits),)).fetchall()
+            self._log_actions(conn, rows, 'summary_edited', user)
+        
+        return self._bulk_result(targets, existing, rows, 'edited', False)
+    
+    def _bulk_targets(self, conn, summary_ids: Optional[List[int]],
+                      filters: Optional[Dict]) -> tuple[List[int], set, bool]:
+        """Ids a bulk call applies to, those of them that exist, and whether a filter matched more"""
+        if summary_ids:
+            targets = list(dict.fromkeys(int(summary_id) for summary_id in summary_ids))
+            if len(targets) > self.bulk_max_summaries:
+                raise ValueError(f"At most {self.bulk_max_summaries} summaries per call")
+            existing = {row['id'] for row in conn.execute(
+                'SELECT id FROM summaries WHERE id IN (SELECT value FROM json_each(?))',
+                (json.dumps(targets),)
+            )}
+            return targets, existing, False
+        
+        join, conditions, params = self._filter_conditions(filters or {})
+        if not conditions:
+            raise ValueError("Give summary_ids or at least one filter")
+        rows = conn.execute(f'''
+            SELECT s.id FROM summaries s{join}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY s.id
+            LIMIT ?
+        ''', params + [self.bulk_max_summaries + 1]).fetchall()
+        targets = [row['id'] for row in rows[:self.bulk_max_summaries]]
+        return targets, set(targets), len(rows) > self.bulk_max_summaries
+    
+    @staticmethod
+    def _bulk_result(targets: List[int], existing: set, updated: Iterable, status: str,
+                     has_more: bool) -> Dict:
+        """Per-id outcomes and their counts"""
+        updated = {row['id'] for row in updated}
+        results = [{
+            "id": summary_id,
+            "result": status if summary_id in updated
+                      else 'skipped' if summary_id in existing else 'not_found'
+        } for summary_id in targets]
+        
+        counts = {}
+        for result in results:
+            counts[result['result']] = counts.get(result['result'], 0) + 1
+        return {"results": results, "counts": counts, "has_more": has_more}
+    
     def get_export_data(self, summary_id: int) -> Optional[Dict]:
         """Get export data for approved summary"""
         with self.db.get_db() as conn:
@@ -162,8 +345,10 @@ class SummaryService:
     
     def _log_action(self, conn, thread_id: str, action: str, user: str, details: str):
         """Log action to audit log"""
-        conn.execute('''
-            INSERT INTO audit_log (thread_id, action, user, details)
-            VALUES (?, ?, ?, ?)
-        ''', (thread_id, action, user, details))
+        self.audit.log(conn, [(thread_id, action, user, details)])
+    
+    def _log_actions(self, conn, rows: Iterable, action: str, user: str, suffix: str = ''):
+        """Log one action per updated (id, thread_id) row, like _log_action"""
+        self.audit.log(conn, [(row['thread_id'], action, user, f"Summary ID: {row['id']}{suffix}")
+                              for row in rows])
 
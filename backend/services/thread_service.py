@@ -2,17 +2,42 @@
 Thread Business Logic Service
 """
 import json
-from typing import List, Optional
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional
+from metrics import instrumented
 from models.database import Database
 from models.thread import Thread
 from models.audit_log import AuditLog
+from services.audit_writer import AuditWriter
+from services.import_stream import StreamParseError
+from services.pagination import (
+    MAX_PAGE_SIZE, KeysetPage, decode_cursor, normalize_timestamp, select_fields
+)
 
 
+@instrumented('threads')
 class ThreadService:
     """Business logic for thread operations"""
     
-    def __init__(self, db: Database):
+    ID_CHUNK_SIZE = 500
+    
+    # Messages appended per json_insert() call (SQLite caps function arguments)
+    APPEND_CHUNK_SIZE = 50
+    
+    LIST_FIELDS = ('thread_id', 'topic', 'subject', 'initiated_by', 'order_id',
+                   'product', 'messages', 'message_count', 'created_at')
+    
+    INSERT_THREAD_SQL = '''
+        INSERT OR REPLACE INTO threads 
+        (thread_id, topic, subject, initiated_by, order_id, product, messages)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    def __init__(self, db: Database, import_chunk_size: int = 1000,
+                 audit: Optional[AuditWriter] = None):
         self.db = db
+        self.import_chunk_size = import_chunk_size
+        self.audit = audit or AuditWriter(db, mode='strict')
     
     def get_all_threads(self) -> List[Thread]:
         """Get all threads"""
@@ -20,11 +45,142 @@ class ThreadService:
             rows = conn.execute('SELECT * FROM threads ORDER BY created_at DESC').fetchall()
             return [Thread.from_row(row) for row in rows]
     
-    def get_thread_by_id(self, thread_id: str) -> Optional[Thread]:
-        """Get thread by ID"""
+    def list_threads(self, filters: Optional[Dict] = None, fields: Optional[List[str]] = None,
+                     limit: Optional[int] = None,
+                     cursor: Optional[str] = None) -> tuple[List[Thread], Optional[str]]:
+        """Get a page of threads, newest first, using keyset pagination
+        
+        filters may hold lists for topic/product/order_id and created_after /
+        created_before timestamps. Returns the threads and the cursor for the
+        next page (None on the last page).
+        """
+        page = self.iter_threads(filters, fields, limit, cursor)
+        threads = list(page)
+        return threads, page.next_cursor
+    
+    def iter_threads(self, filters: Optional[Dict] = None, fields: Optional[List[str]] = None,
+                     limit: Optional[int] = None, cursor: Optional[str] = None) -> KeysetPage:
+        """Like list_threads, but rows are fetched and converted while iterating
+        
+        Filters, fields and the cursor are validated up front (ValueError).
+        """
+        filters = filters or {}
+        _, columns = select_fields(fields, self.LIST_FIELDS, ('thread_id', 'created_at'))
+        select = ', '.join(
+            'json_array_length(messages) AS message_count' if column == 'message_count' else column
+            for column in columns
+        )
+        
+        conditions = []
+        params = []
+        for column in ('topic', 'product', 'order_id'):
+            values = filters.get(column)
+            if values:
+                conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if filters.get('created_after'):
+            conditions.append('created_at >= ?')
+            params.append(normalize_timestamp(filters['created_after']))
+        if filters.get('created_before'):
+            conditions.append('created_at < ?')
+            params.append(normalize_timestamp(filters['created_before']))
+        after = decode_cursor(cursor, 2) if cursor else None
+        if limit:
+            limit = min(limit, MAX_PAGE_SIZE)
+        
+        rows = self.db.iter_keyset(f'SELECT {select} FROM threads', conditions, params,
+                                   ('created_at', 'thread_id'), after=after,
+                                   limit=limit + 1 if limit else None)
+        return KeysetPage((Thread.from_row(row) for row in rows), limit,
+                          lambda thread: [thread.created_at, thread.thread_id])
+    
+    def search_messages(self, query: str, limit: int = 20, sender: Optional[str] = None,
+                        raw: bool = False) -> List[Dict]:
+        """Full-text search over message bodies, best matches first
+        
+        Each whitespace-separated term is matched as a quoted phrase (so
+        order numbers like 405467-683 work); raw=True passes FTS5 query
+        syntax (AND/OR/NEAR, prefix*) straight through.
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        limit = min(limit, MAX_PAGE_SIZE)
+        
+        if not self.db.fts_enabled:
+            return self._search_messages_like(terms, limit, sender)
+        
+        match = query if raw else ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+        params = [match]
+        sender_clause = ''
+        if sender:
+            sender_clause = 'AND m.sender = ?'
+            params.append(sender)
+        params.append(limit)
+        
+        with self.db.get_db() as conn:
+            try:
+                rows = conn.execute(f'''
+                    SELECT m.thread_id, m.message_id, m.sender, m.timestamp, t.subject,
+                           snippet(messages_fts, 0, '[', ']', '...', 16) AS snippet,
+                           bm25(messages_fts) AS score
+                    FROM messages_fts
+                    JOIN messages m ON m.id = messages_fts.rowid
+                    JOIN threads t ON t.thread_id = m.thread_id
+                    WHERE messages_fts MATCH ? {sender_clause}
+                    ORDER BY score
+                    LIMIT ?
+                ''', params).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Invalid search query: {e}")
+        
+        return [self._search_hit(row) for row in rows]
+    
+    def _search_messages_like(self, terms: List[str], limit: int,
+                              sender: Optional[str]) -> List[Dict]:
+        """Unranked substring search for SQLite builds without FTS5"""
+        conditions = ['m.body LIKE ?' for _ in terms]
+        params = [f'%{term}%' for term in terms]
+        if sender:
+            conditions.append('m.sender = ?')
+            params.append(sender)
+        params.append(limit)
+        
+        with self.db.get_db() as conn:
+            rows = conn.execute(f'''
+                SELECT m.thread_id, m.message_id, m.sender, m.timestamp, t.subject,
+                       m.body AS snippet, 0 AS score
+                FROM messages m
+                JOIN threads t ON t.thread_id = m.thread_id
+                WHERE {' AND '.join(conditions)}
+                ORDER BY m.timestamp DESC
+                LIMIT ?
+            ''', params).fetchall()
+        
+        return [self._search_hit(row) for row in rows]
+    
+    @staticmethod
+    def _search_hit(row) -> Dict:
+        return {
+            "thread_id": row['thread_id'],
+            "subject": row['subject'],
+            "message_id": row['message_id'],
+            "sender": row['sender'],
+            "timestamp": row['timestamp'],
+            "snippet": row['snippet'],
+            # bm25() is lower-is-better; flip it so higher scores rank higher
+            "score": round(-row['score'], 4)
+        }
+    
+    def get_thread_by_id(self, thread_id: str, with_messages: bool = True) -> Optional[Thread]:
+        """Get thread by ID (with_messages=False loads only metadata and message_count)"""
+        columns = '*' if with_messages else (
+            'thread_id, topic, subject, initiated_by, order_id, product, created_at, '
+            'json_array_length(messages) AS message_count'
+        )
         with self.db.get_db() as conn:
             row = conn.execute(
-                'SELECT * FROM threads WHERE thread_id = ?',
+                f'SELECT {columns} FROM threads WHERE thread_id = ?',
                 (thread_id,)
             ).fetchone()
             
@@ -32,22 +188,127 @@ class ThreadService:
                 return Thread.from_row(row)
             return None
     
+    def get_messages(self, thread_id: str, start: int = 0,
+                     stop: Optional[int] = None) -> List[Dict]:
+        """Get messages[start:stop] of a thread from the normalized messages table"""
+        query = '''
+            SELECT message_id, sender, timestamp, body FROM messages
+            WHERE thread_id = ? AND position >= ?
+        '''
+        params = [thread_id, start]
+        if stop is not None:
+            query += ' AND position < ?'
+            params.append(stop)
+        query += ' ORDER BY position'
+        
+        with self.db.get_db() as conn:
+            rows = conn.execute(query, params).fetchall()
+        
+        return [
+            {"id": row['message_id'], "sender": row['sender'],
+             "timestamp": row['timestamp'], "body": row['body']}
+            for row in rows
+        ]
+    
+    def append_messages(self, thread_id: str, messages: List[Dict]) -> Optional[Dict]:
+        """Append new messages to a thread and mark its summaries stale
+        
+        Only the new messages are written (and indexed); messages whose id
+        is already in the thread are skipped, so retried appends are safe.
+        Returns None if the thread doesn't exist.
+        """
+        self._validate_messages(messages)
+        
+        with self.db.get_db() as conn:
+            # Take the write lock first so concurrent appends can't interleave
+            conn.execute('BEGIN IMMEDIATE')
+            
+            row = conn.execute(
+                'SELECT json_array_length(messages) AS message_count FROM threads WHERE thread_id = ?',
+                (thread_id,)
+            ).fetchone()
+            if not row:
+                return None
+            
+            existing = {
+                r['message_id'] for r in conn.execute(
+                    'SELECT message_id FROM messages WHERE thread_id = ? AND message_id IS NOT NULL',
+                    (thread_id,)
+                )
+            }
+            new_messages = []
+            skipped = []
+            for msg in messages:
+                if msg.get('id') is not None:
+                    if msg['id'] in existing:
+                        skipped.append(msg['id'])
+                        continue
+                    existing.add(msg['id'])
+                new_messages.append(msg)
+            
+            for start in range(0, len(new_messages), self.APPEND_CHUNK_SIZE):
+                chunk = new_messages[start:start + self.APPEND_CHUNK_SIZE]
+                paths = ', '.join(["'$[#]', json(?)"] * len(chunk))
+                conn.execute(
+                    f'UPDATE threads SET messages = json_insert(messages, {paths}) WHERE thread_id = ?',
+                    [json.dumps(msg) for msg in chunk] + [thread_id]
+                )
+            
+            if new_messages:
+                conn.execute(
+                    'UPDATE summaries SET stale = 1 WHERE thread_id = ? AND stale = 0',
+                    (thread_id,)
+                )
+                self._log_action(conn, thread_id, 'messages_appended', 'system',
+                               f"{len(new_messages)} messages appended")
+        
+        return {
+            "thread_id": thread_id,
+            "appended": len(new_messages),
+            "skipped": skipped,
+            "message_count": row['message_count'] + len(new_messages)
+        }
+    
+    def find_threads(self, thread_ids: Optional[List[str]] = None,
+                     topic: Optional[str] = None, product: Optional[str] = None,
+                     order_id: Optional[str] = None) -> Iterator[Thread]:
+        """Yield threads matching an optional id list and column filters
+        
+        Rows are read in bounded batches while iterating (newest first, or
+        in thread_ids order), so memory stays flat however many match.
+        """
+        conditions = []
+        params = []
+        for column, value in (('topic', topic), ('product', product), ('order_id', order_id)):
+            if value:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        
+        if thread_ids is None:
+            rows = self.db.iter_keyset('SELECT * FROM threads', conditions, params,
+                                       ('created_at', 'thread_id'))
+            for row in rows:
+                yield Thread.from_row(row)
+            return
+        
+        # Look ids up in chunks to stay under SQLite's bound-parameter limit
+        ids = list(dict.fromkeys(thread_ids))
+        for start in range(0, len(ids), self.ID_CHUNK_SIZE):
+            chunk = ids[start:start + self.ID_CHUNK_SIZE]
+            placeholders = ', '.join('?' * len(chunk))
+            where = conditions + [f'thread_id IN ({placeholders})']
+            with self.db.get_db() as conn:
+                rows = conn.execute('SELECT * FROM threads WHERE ' + ' AND '.join(where),
+                                    params + chunk).fetchall()
+            threads = {row['thread_id']: Thread.from_row(row) for row in rows}
+            for thread_id in chunk:
+                if thread_id in threads:
+                    yield threads[thread_id]
+    
     def create_thread(self, thread: Thread) -> Thread:
         """Create new thread"""
         with self.db.get_db() as conn:
-            conn.execute('''
-                INSERT OR REPLACE INTO threads 
-                (thread_id, topic, subject, initiated_by, order_id, product, messages)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                thread.thread_id,
-                thread.topic,
-                thread.subject,
-                thread.initiated_by,
-                thread.order_id,
-                thread.product,
-                json.dumps(thread.messages)
-            ))
+            conn.execute(self.INSERT_THREAD_SQL, self._thread_row(thread))
             
             # Log the action
             self._log_action(conn, thread.thread_id, 'thread_created', 'system', 
@@ -57,18 +318,151 @@ class ThreadService:
     
     def import_threads(self, threads_data: List[dict]) -> tuple[int, int]:
         """Import multiple threads"""
-        imported = 0
-        total = len(threads_data)
+        result = self.bulk_import_threads(threads_data)
+        return result['imported'], result['total']
+    
+    def bulk_import_threads(self, threads_data: List[dict],
+                            chunk_size: Optional[int] = None) -> Dict:
+        """Validate all threads, then write them in chunked transactions
+        
+        Returns imported/total counts and a per-thread error report.
+        """
+        chunk_size = max(1, chunk_size or self.import_chunk_size)
+        errors = []
+        threads = []
         
-        for thread_data in threads_data:
+        for index, thread_data in enumerate(threads_data):
             try:
-                thread = Thread.from_dict(thread_data)
-                self.create_thread(thread)
-                imported += 1
-            except Exception as e:
-                print(f"Error importing thread {thread_data.get('thread_id')}: {e}")
+                threads.append(self._validate_thread(thread_data))
+            except (ValueError, TypeError) as e:
+                thread_id = thread_data.get('thread_id') if isinstance(thread_data, dict) else None
+                errors.append({"index": index, "thread_id": thread_id, "error": str(e)})
+        
+        imported = 0
+        for start in range(0, len(threads), chunk_size):
+            chunk = threads[start:start + chunk_size]
+            chunk_errors = self._write_chunk(chunk)
+            errors.extend(chunk_errors)
+            if not chunk_errors:
+                imported += len(chunk)
         
-        return imported, total
+        return {
+            "imported": imported,
+            "total": len(threads_data),
+            "errors": errors
+        }
+    
+    def stream_import_threads(self, threads_iter: Iterable, chunk_size: Optional[int] = None,
+                              max_errors: int = 1000) -> Dict:
+        """Import threads from an iterator and return the final report"""
+        result = None
+        for result in self.iter_stream_import(threads_iter, chunk_size, max_errors):
+            pass
+        return result
+    
+    def iter_stream_import(self, threads_iter: Iterable, chunk_size: Optional[int] = None,
+                           max_errors: int = 1000) -> Iterator[Dict]:
+        """Import threads from an iterator, yielding a progress report per chunk
+        
+        Each chunk is written as soon as it fills, so only one chunk is held
+        in memory at a time. The error report is capped at max_errors entries
+        (error_count still counts all of them). If the iterator raises
+        StreamParseError the import stops; chunks already written stay
+        committed and the message is reported as "aborted". The last report
+        yielded has "done" set.
+        """
+        chunk_size = max(1, chunk_size or self.import_chunk_size)
+        result = {"imported": 0, "total": 0, "error_count": 0, "errors": [],
+                  "aborted": None, "done": False}
+        chunk = []
+        
+        def record_errors(new_errors):
+            result["error_count"] += len(new_errors)
+            room = max_errors - len(result["errors"])
+            result["errors"].extend(new_errors[:max(0, room)])
+        
+        def flush():
+            chunk_errors = self._write_chunk(chunk)
+            record_errors(chunk_errors)
+            if not chunk_errors:
+                result["imported"] += len(chunk)
+            chunk.clear()
+        
+        try:
+            for index, thread_data in enumerate(threads_iter):
+                result["total"] += 1
+                try:
+                    chunk.append(self._validate_thread(thread_data))
+                except (ValueError, TypeError) as e:
+                    thread_id = thread_data.get('thread_id') if isinstance(thread_data, dict) else None
+                    record_errors([{"index": index, "thread_id": thread_id, "error": str(e)}])
+                if len(chunk) >= chunk_size:
+                    flush()
+                    yield {**result, "errors": list(result["errors"])}
+        except StreamParseError as e:
+            result["aborted"] = str(e)
+        
+        if chunk:
+            flush()
+        
+        result["done"] = True
+        yield result
+    
+    def _write_chunk(self, threads: List[Thread]) -> List[Dict]:
+        """Write threads and their audit rows in one transaction; returns errors"""
+        try:
+            with self.db.get_db() as conn:
+                conn.executemany(self.INSERT_THREAD_SQL,
+                                 [self._thread_row(thread) for thread in threads])
+                self._log_actions(conn, [
+                    (thread.thread_id, 'thread_created', 'system',
+                     f"Thread {thread.thread_id} created")
+                    for thread in threads
+                ])
+        except Exception as e:
+            return [
+                {"thread_id": thread.thread_id, "error": f"Write failed: {e}"}
+                for thread in threads
+            ]
+        return []
+    
+    @staticmethod
+    def _validate_thread(thread_data) -> Thread:
+        """Build a Thread from import data, raising ValueError if it is malformed"""
+        if not isinstance(thread_data, dict):
+            raise ValueError("Thread must be an object")
+        
+        missing = [field for field in Thread.REQUIRED_FIELDS if field not in thread_data]
+        if missing:
+            raise ValueError(f"Missing fields: {', '.join(missing)}")
+        if not thread_data['thread_id']:
+            raise ValueError("thread_id must not be empty")
+        
+        ThreadService._validate_messages(thread_data['messages'])
+        
+        return Thread.from_dict(thread_data)
+    
+    @staticmethod
+    def _validate_messages(messages):
+        """Raise ValueError unless messages is a list of dicts with sender and body"""
+        if not isinstance(messages, list):
+            raise ValueError("messages must be a list")
+        for position, msg in enumerate(messages):
+            if not isinstance(msg, dict) or 'sender' not in msg or 'body' not in msg:
+                raise ValueError(f"Message {position} must have sender and body")
+    
+    @staticmethod
+    def _thread_row(thread: Thread) -> tuple:
+        """Column values for INSERT_THREAD_SQL"""
+        return (
+            thread.thread_id,
+            thread.topic,
+            thread.subject,
+            thread.initiated_by,
+            thread.order_id,
+            thread.product,
+            json.dumps(thread.messages)
+        )
     
     def delete_thread(self, thread_id: str) -> bool:
         """Delete thread"""
@@ -86,8 +480,9 @@ class ThreadService:
     
     def _log_action(self, conn, thread_id: str, action: str, user: str, details: str):
         """Log action to audit log"""
-        conn.execute('''
-            INSERT INTO audit_log (thread_id, action, user, details)
-            VALUES (?, ?, ?, ?)
-        ''', (thread_id, action, user, details))
+        self.audit.log(conn, [(thread_id, action, user, details)])
+    
+    def _log_actions(self, conn, entries: List[tuple]):
+        """Log several (thread_id, action, user, details) entries at once"""
+        self.audit.log(conn, entries)
 
@@ -0,0 +1,20 @@
+"""
+Shared pytest setup: modules import relative to backend/, like the app
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """An app on a fresh database (the default relative paths land in tmp_path)"""
+    from app import create_app
+
+    monkeypatch.chdir(tmp_path)
+    app = create_app('development')
+    yield app
+    app.audit_writer.close()
@@ -0,0 +1,45 @@
+"""
+Tests for the buffered audit log writer
+"""
+import sqlite3
+
+from services.audit_writer import AuditWriter
+
+
+class LockedConnection:
+    """Stands in for the writer's connection while the database is locked"""
+
+    def __enter__(self):
+        raise sqlite3.OperationalError("database is locked")
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+
+def log_one(db, writer, n):
+    with db.get_db() as conn:
+        conn.execute("INSERT INTO watermarks (name, value) VALUES (?, 0)", (f'test-{n}',))
+        writer.log(conn, [(f'T-{n}', 'approve', 'tester', '')])
+
+
+def test_failed_backpressure_flush_does_not_fail_the_committed_write(app):
+    db = app.db
+    writer = AuditWriter(db, max_entries=2, flush_interval=60, max_buffered=5)
+    writer._conn = LockedConnection()
+
+    for n in range(8):
+        log_one(db, writer, n)    # must not raise although every flush fails
+
+    with db.get_db() as conn:
+        committed = conn.execute("SELECT COUNT(*) FROM watermarks WHERE name LIKE 'test-%'").fetchone()[0]
+    assert committed == 8
+    # Bounded: the oldest entries are kept, the newest beyond the limit dropped
+    assert writer.pending() == 5
+    assert [entry[0] for entry in writer._buffer] == [f'T-{n}' for n in range(5)]
+
+    writer._conn = None
+    assert writer.flush() == 5
+    writer.close()
@@ -0,0 +1,83 @@
+"""
+Tests for batch summarization
+"""
+import io
+import types
+
+import pytest
+
+from benchmarks.generate_dataset import DatasetGenerator
+
+
+def import_threads(client, count):
+    buf = io.StringIO()
+    DatasetGenerator().write(buf, count, fmt='ndjson')
+    response = client.post('/api/threads/import-stream', data=buf.getvalue().encode(),
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200, response.data
+
+
+@pytest.mark.parametrize('max_workers', ["4", "abc", 0, -1, 2.5, True, [2]])
+def test_invalid_max_workers_is_rejected(app, max_workers):
+    client = app.test_client()
+    response = client.post('/api/threads/summarize-batch', json={"max_workers": max_workers})
+
+    assert response.status_code == 400
+    assert "max_workers" in response.get_json()["error"]
+
+
+def test_batch_reads_threads_lazily(app):
+    client = app.test_client()
+    import_threads(client, 1200)
+
+    threads = app.thread_service.find_threads()
+    assert isinstance(threads, types.GeneratorType)
+    assert len({thread.thread_id for thread in threads}) == 1200
+
+    response = client.post('/api/threads/summarize-batch', json={"max_workers": 2})
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert body["total"] == body["succeeded"] == 1200
+    assert len({result["thread_id"] for result in body["results"]}) == 1200
+
+
+def test_batch_reports_missing_ids(app):
+    client = app.test_client()
+    import_threads(client, 3)
+    ids = [thread.thread_id for thread in app.thread_service.find_threads()]
+
+    response = client.post('/api/threads/summarize-batch',
+                           json={"thread_ids": [ids[0], "missing", ids[2], ids[0]]})
+    body = response.get_json()
+
+    assert response.status_code == 200, body
+    assert [(r["thread_id"], r["success"]) for r in body["results"]] == [
+        (ids[0], True), (ids[2], True), ("missing", False)
+    ]
+
+
+@pytest.mark.parametrize('body', [
+    {"filter": {"topic": ["a"]}},
+    {"filters": {"product": 3}},
+    {"filter": {"status": "open"}},
+    {"filter": "topic=a"},
+])
+def test_invalid_filters_are_rejected(app, body):
+    response = app.test_client().post('/api/threads/summarize-batch', json=body)
+
+    assert response.status_code == 400
+    assert "filter" in response.get_json()["error"].lower()
+
+
+@pytest.mark.parametrize('force, expected', [
+    ("false", False), ("0", False), (False, False), ("true", True), ("1", True), (True, True)
+])
+def test_force_is_parsed_like_the_single_thread_route(app, monkeypatch, force, expected):
+    calls = []
+    monkeypatch.setattr(app.batch_summary_service, 'summarize_batch',
+                        lambda **kwargs: calls.append(kwargs) or {"total": 0, "results": []})
+
+    response = app.test_client().post('/api/threads/summarize-batch', json={"force": force})
+
+    assert response.status_code == 200, response.get_json()
+    assert calls[0]["force"] is expected
@@ -0,0 +1,63 @@
+"""
+Tests for the trigger-maintained analytics counters
+"""
+from models.database import Database
+
+
+def add_summaries(db, rows):
+    with db.get_db() as conn:
+        conn.executemany('INSERT INTO summaries (status, summary_type) VALUES (?, ?)', rows)
+
+
+ROWS = [(None, None), ('', ''), ('approved', 'openai'), (None, 'rule_based'), ('', None)]
+
+
+def test_null_and_empty_status_share_a_counter(app):
+    add_summaries(app.db, ROWS)
+
+    result = app.analytics_service.check_counters()
+
+    assert result["consistent"], result["mismatches"]
+    with app.db.get_db() as conn:
+        counters = {
+            (row['metric'], row['dimension']): row['value']
+            for row in conn.execute('SELECT * FROM analytics_counters')
+        }
+    assert counters[('summaries_by_status', '')] == 4
+    assert counters[('summaries_by_type', '')] == 3
+
+
+def test_repair_rebuilds_counters_with_null_and_empty_values(app):
+    add_summaries(app.db, ROWS)
+    with app.db.get_db() as conn:
+        conn.execute("UPDATE analytics_counters SET value = value + 5")
+
+    result = app.analytics_service.check_counters(repair=True)
+
+    assert result["repaired"]
+    assert app.analytics_service.check_counters()["consistent"]
+
+
+def test_backfill_counts_null_and_empty_values(app):
+    add_summaries(app.db, ROWS)
+    with app.db.get_db() as conn:
+        conn.execute('DROP TABLE analytics_counters')
+
+    db = Database(app.db.database_path)    # recreates and backfills the counters
+    with db.get_db() as conn:
+        value = conn.execute(
+            "SELECT value FROM analytics_counters WHERE metric = 'summaries_by_status' AND dimension = ''"
+        ).fetchone()['value']
+    db.close_all()
+
+    assert value == 4
+    assert app.analytics_service.check_counters()["consistent"]
+
+
+def test_breakdowns_report_null_and_empty_values_under_none(app):
+    add_summaries(app.db, ROWS)
+
+    assert app.analytics_service.get_summary_stats_by_status() == {None: 4, 'approved': 1}
+    assert app.analytics_service.get_summary_stats_by_type() == {
+        None: 3, 'openai': 1, 'rule_based': 1
+    }
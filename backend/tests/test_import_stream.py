@@ -0,0 +1,31 @@
+"""
+Tests for streamed thread imports
+"""
+import pytest
+
+
+@pytest.mark.parametrize('content_type', ['application/x-ndjson', 'application/json'])
+def test_undecodable_body_is_a_parse_error(app, content_type):
+    client = app.test_client()
+    response = client.post('/api/threads/import-stream', data=b'\xff\xfe{"a":',
+                           content_type=content_type)
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body["success"] is False
+    assert body["aborted"]
+    assert body["imported"] == 0
+
+
+def test_invalid_utf8_after_valid_lines_keeps_earlier_threads(app):
+    client = app.test_client()
+    thread = (b'{"thread_id": "t-1", "subject": "Order", "topic": "Refund", "product": "Widget",'
+              b' "order_id": "o-1", "initiated_by": "customer", "status": "open",'
+              b' "created_at": "2024-01-01T00:00:00Z", "messages": []}\n')
+    response = client.post('/api/threads/import-stream?chunk_size=1',
+                           data=thread + b'{"thread_id": "t-\xc3("}\n',
+                           content_type='application/x-ndjson')
+
+    assert response.status_code == 400
+    assert response.get_json()["imported"] == 1
+    assert "encoding" in response.get_json()["error"]
@@ -0,0 +1,52 @@
+"""
+Tests that incremental summary updates match a full recompute
+"""
+import random
+
+import pytest
+
+from benchmarks.generate_dataset import DatasetGenerator
+from services.nlp_service import NLPService
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_summarize_update_matches_full_recompute(seed):
+    nlp = NLPService()
+    rng = random.Random(seed)
+
+    for thread in DatasetGenerator(seed=seed, min_messages=2, max_messages=12).threads(200):
+        split = rng.randint(1, len(thread['messages']) - 1)
+        earlier, appended = thread['messages'][:split], thread['messages'][split:]
+        previous_state = nlp.rule_state(earlier)
+        previous = nlp.summarize({**thread, "messages": earlier}, rule_state=previous_state)
+
+        summary, state = nlp.summarize_update(thread, previous, appended, previous_state)
+
+        assert state == nlp.rule_state(thread['messages'])
+        assert summary == nlp.summarize(thread)
+
+
+def test_appended_messages_update_the_stored_summary(app):
+    client = app.test_client()
+    thread = next(DatasetGenerator(seed=7, min_messages=8, max_messages=8).threads(1))
+    earlier, appended = thread['messages'][:3], thread['messages'][3:]
+    response = client.post('/api/threads/import', json={"threads": [{**thread, "messages": earlier}]})
+    assert response.status_code in (200, 201), response.data
+
+    first = client.post(f"/api/threads/{thread['thread_id']}/summarize").get_json()
+    for i in range(0, len(appended), 2):     # two appends, then one update over both
+        response = client.post(f"/api/threads/{thread['thread_id']}/messages",
+                               json={"messages": appended[i:i + 2]})
+        assert response.status_code == 200, response.data
+    updated = client.post(f"/api/threads/{thread['thread_id']}/summarize").get_json()
+
+    assert first["incremental"] is False
+    assert updated["incremental"] is True
+    assert updated["messages_summarized"] == len(appended)
+
+    nlp = app.nlp_service
+    latest = app.summary_service.get_latest_summary(thread['thread_id'])
+    stored = app.thread_service.get_thread_by_id(thread['thread_id']).to_dict()
+    assert latest.message_count == len(thread['messages'])
+    assert latest.rule_state == nlp.rule_state(thread['messages'])
+    assert updated["summary"] == nlp.summarize(stored)
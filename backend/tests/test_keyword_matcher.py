@@ -0,0 +1,117 @@
+"""
+Tests for the rule keyword matcher
+"""
+import pytest
+
+from benchmarks.generate_dataset import DatasetGenerator
+from services.keyword_matcher import KeywordMatcher, KeywordSpan
+from services.nlp_service import NLPService
+
+
+@pytest.fixture
+def matcher():
+    return KeywordMatcher({
+        'refund': ['refund', 'return'],
+        'delivery': ['late', 'where'],
+        'negative': ['late', 'broken']
+    }, forms={'refund': ['refunded'], 'return': ['returned', 'returns']})
+
+
+@pytest.mark.parametrize('text, keyword', [
+    ("The parcel was returned to sender", 'return'),
+    ("I was REFUNDED twice", 'refund'),
+    ("Returns: none", 'return'),
+    ("It's late.", 'late'),
+    ("\u201cBroken\u201d\u2014again", 'broken'),
+])
+def test_keywords_and_their_forms_match_whole_words(matcher, text, keyword):
+    assert keyword in matcher.present([text])
+    assert keyword in {span.keyword for span in matcher.scan([text]).spans}
+
+
+@pytest.mark.parametrize('text', [
+    "Can it come later?",       # not a listed form of "late"
+    "UNBROKEN seal",
+    "nowhere to be found",
+    "refunding",                # forms are explicit, not prefixes
+])
+def test_longer_words_do_not_match(matcher, text):
+    assert matcher.present([text]) == frozenset()
+    assert matcher.scan([text]).spans == []
+
+
+def test_find_groups_in_rule_order(matcher):
+    found = matcher.find(["Broken and late, where is my refund or return?"])
+
+    assert found == {'refund': ['refund', 'return'], 'delivery': ['late', 'where'],
+                     'negative': ['late', 'broken']}
+    assert matcher.find([]) == {'refund': [], 'delivery': [], 'negative': []}
+
+
+def test_keywords_do_not_match_across_messages(matcher):
+    assert matcher.present(["it came la", "te"]) == frozenset()
+
+
+def test_scan_reports_every_occurrence(matcher):
+    spans = matcher.scan(["late, later, late.", "Refunded"]).spans
+
+    assert spans == [
+        KeywordSpan(0, 0, 4, 'late'), KeywordSpan(0, 13, 17, 'late'),
+        KeywordSpan(1, 0, 8, 'refund')
+    ]
+
+
+@pytest.mark.parametrize('texts', [
+    ["Ça été RETOURNÉ, refund späť"],
+    ["Straße late", "ÉLATE", "naïve returnée"],
+    ["İstanbul: broken \U0001F4E6 where?"],
+    ["Ｌａｔｅ fullwidth", "ΣLATEΣ"],
+    ["réfund", "lаte"],     # accented e, Cyrillic a: not the keywords
+])
+def test_find_and_scan_agree_on_non_ascii(matcher, texts):
+    scanned = matcher.scan(texts)
+
+    assert scanned.groups == matcher.find(texts)
+    for span in scanned.spans:
+        word = texts[span.message].lower()[span.start:span.end]
+        assert matcher.present([word]) == {span.keyword}
+
+
+def test_keywords_must_be_single_words():
+    with pytest.raises(ValueError):
+        KeywordMatcher({'g': ['two words']})
+    with pytest.raises(ValueError):
+        KeywordMatcher({'g': ['']})
+    with pytest.raises(ValueError):
+        KeywordMatcher({'g': ['late']}, forms={'late': ["late-ish"]})
+    with pytest.raises(ValueError):
+        KeywordMatcher({'g': ['late']}, forms={'early': ['earlier']})
+
+
+def test_rule_keywords_match_stems_but_not_false_positives():
+    nlp = NLPService()
+    thread = {"product": "Webcam", "order_id": "o-1", "topic": "Other", "messages": [
+        {"sender": 'customer', "body": "I returned it and was refunded. Thanks!"},
+        {"sender": 'company', "body": "Your question was addressed; the case is unresolved."},
+    ]}
+
+    matched = nlp.match_keywords(thread).groups
+    summary = nlp._summarize_with_rules(thread)
+
+    assert matched['issue:refund'] == ['refund', 'return']
+    assert matched['issue:address'] == []
+    assert matched['resolved'] == []
+    assert summary['tags'] == ['refund']
+    assert summary['resolution_status'] == 'pending'
+    assert summary['sentiment'] == 'positive'
+
+
+def test_generated_threads_match_the_substring_rules_they_were_built_for():
+    """Generated text uses bare keywords, where word and substring matching agree"""
+    nlp = NLPService()
+    keywords = nlp._rule_matcher.keywords
+    for thread in DatasetGenerator(seed=5, vocabulary=keywords + ['hello', 'order']).threads(200):
+        all_text = ' '.join(m['body'].lower() for m in thread['messages'])
+        assert nlp._rule_matcher.present(m['body'] for m in thread['messages']) == {
+            keyword for keyword in keywords if keyword in all_text
+        }
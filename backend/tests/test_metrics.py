@@ -0,0 +1,53 @@
+"""
+Tests for the in-process metrics registry
+"""
+import json
+import os
+import threading
+
+from metrics import Counter, Registry
+
+
+def test_concurrent_flushes_write_one_complete_snapshot(tmp_path):
+    registry = Registry()
+    registry.configure(directory=str(tmp_path))
+    counter = Counter('test_events_total', 'Test events', registry=registry)
+    errors = []
+
+    def work():
+        for _ in range(200):
+            counter.inc()
+            try:
+                registry.maybe_flush(force=True)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.maybe_flush(force=True)
+
+    assert errors == []
+    assert os.listdir(tmp_path) == [f'metrics-{os.getpid()}.json']
+    with open(tmp_path / f'metrics-{os.getpid()}.json') as f:
+        assert json.load(f)['counters'] == [['test_events_total', [], 1600.0]]
+
+
+def test_failed_flush_keeps_values_dirty(tmp_path):
+    registry = Registry()
+    registry.configure(directory=str(tmp_path / 'metrics'))
+    Counter('test_events_total', 'Test events', registry=registry).inc()
+    os.rmdir(tmp_path / 'metrics')
+
+    try:
+        registry.maybe_flush(force=True)
+    except OSError:
+        pass
+    else:
+        raise AssertionError("expected OSError")
+
+    os.mkdir(tmp_path / 'metrics')
+    registry.maybe_flush(force=True)
+    assert os.listdir(tmp_path / 'metrics') == [f'metrics-{os.getpid()}.json']
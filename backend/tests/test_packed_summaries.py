@@ -0,0 +1,44 @@
+"""
+Tests for packed OpenAI summarization
+"""
+from benchmarks.fake_openai import FakeOpenAI, THREAD_KEY_RE
+from benchmarks.generate_dataset import DatasetGenerator
+from services.nlp_service import NLPService
+
+
+def fake_service(monkeypatch):
+    nlp = NLPService(openai_api_key='test-key')
+    prompts = []
+
+    def chat(prompt, max_tokens=None):
+        prompts.append(prompt)
+        return FakeOpenAI.reply(prompt)
+
+    monkeypatch.setattr(nlp, '_chat', chat)
+    return nlp, prompts
+
+
+def test_packs_threads_into_one_request(monkeypatch):
+    nlp, prompts = fake_service(monkeypatch)
+    threads = list(DatasetGenerator(seed=2, max_messages=3).threads(3))
+
+    summaries = nlp.summarize_packed(threads)
+
+    assert [s['summary_type'] for s in summaries] == ['openai'] * 3
+    assert len(prompts) == 1
+    assert len(THREAD_KEY_RE.findall(prompts[0])) == 3
+
+
+def test_thread_without_timestamp_does_not_fail_its_pack(monkeypatch):
+    nlp, prompts = fake_service(monkeypatch)
+    threads = list(DatasetGenerator(seed=2, max_messages=3).threads(3))
+    del threads[1]['messages'][0]['timestamp']
+
+    summaries = nlp.summarize_packed(threads)
+
+    assert len(summaries) == 3
+    assert summaries[0]['summary_type'] == summaries[2]['summary_type'] == 'openai'
+    # Summarized alone, as summarize() would: its prompt fails too, so rules
+    assert summaries[1] == nlp.summarize(threads[1])
+    assert summaries[1]['summary_type'] == 'rule_based'
+    assert len(THREAD_KEY_RE.findall(prompts[0])) == 2
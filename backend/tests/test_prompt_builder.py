@@ -0,0 +1,114 @@
+"""
+Tests for prompt compaction
+"""
+import random
+
+import pytest
+
+from benchmarks.bench_prompt import as_email
+from benchmarks.generate_dataset import DatasetGenerator
+from services.prompt_builder import PromptBuilder, TRUNCATED, estimate_tokens, strip_quoted
+
+
+@pytest.mark.parametrize('body, expected', [
+    ("Where is my order?", "Where is my order?"),
+    ("Where is my order?\n\nOn Mon, Jan 6, 2025 Sam wrote:\n> We shipped it.\n> Regards",
+     "Where is my order?"),
+    ("Still broken.\n\n-----Original Message-----\nFrom: support\nIt works now.", "Still broken."),
+    ("Still broken.\nFrom: Support <support@example.com>\nSent: Monday\nIt works now.",
+     "Still broken."),
+    ("Please reroute it.\n--\nJordan Lee\nACME", "Please reroute it."),
+    ("Please reroute it.\n\nSent from my iPhone", "Please reroute it."),
+    ("> quoted first\nMy answer\n> quoted again", "My answer"),
+    ("Where is it?\n\nThanks,\nJordan", "Where is it?"),
+    ("Where is it?\n\nBest regards,\nSam\nCustomer Experience Team", "Where is it?"),
+    ("Refund issued.\n\nKind regards", "Refund issued."),
+])
+def test_strip_quoted_removes_replies_and_signatures(body, expected):
+    assert strip_quoted(body) == expected
+
+
+@pytest.mark.parametrize('body', ["Thanks", "Thank you!", "Cheers.", "  Thanks!  \n\n",
+                                  "Thanks\n\nOn Monday Sam wrote:\n> Your refund is on its way"])
+def test_strip_quoted_keeps_a_lone_sign_off(body):
+    assert strip_quoted(body) == body.split('\n\nOn')[0].strip()
+
+
+def test_strip_quoted_keeps_a_sign_off_followed_by_text():
+    body = ("Thanks\nThe replacement arrived but the box was crushed again and the stand is "
+            "scratched, so I would like a refund instead.")
+    assert strip_quoted(body) == ' '.join(body.split())
+
+
+def email_thread(count, seed=3):
+    generator = DatasetGenerator(seed=seed, min_messages=count, max_messages=count,
+                                 min_words=20, max_words=40)
+    return as_email(next(generator.threads(1)), random.Random(seed))['messages']
+
+
+def test_build_without_budget_only_compacts():
+    messages = email_thread(6)
+
+    built = PromptBuilder().build(messages)
+
+    assert built.omitted == 0
+    assert built.tokens < built.original_tokens
+    assert built.saved_tokens == built.original_tokens - built.tokens
+    assert "Sent from my iPhone" not in built.text
+    assert " wrote:" not in built.text
+    assert built.text.count("Customer (") + built.text.count("Agent (") == 6
+
+
+def test_build_drops_repeated_boilerplate():
+    messages = email_thread(6)
+
+    built = PromptBuilder().build(messages)
+
+    assert built.text.count("Your satisfaction is our top priority") <= 1
+
+
+@pytest.mark.parametrize('count, budget', [(20, 1500), (20, 600), (20, 350), (40, 400)])
+def test_build_fits_budget(count, budget):
+    messages = email_thread(count)
+    builder = PromptBuilder()
+
+    built = builder.build(messages, budget)
+
+    assert built.tokens <= budget
+    assert built.tokens == estimate_tokens(built.text)
+    # The first message and the last keep_last always appear, in order
+    kept = [msg for i, msg in enumerate(messages)
+            if i < builder.keep_first or i >= len(messages) - builder.keep_last]
+    positions = [built.text.index(f"({msg['timestamp']})") for msg in kept]
+    assert positions == sorted(positions)
+
+
+def test_build_omits_oldest_middle_messages_first():
+    messages = email_thread(20)
+
+    built = PromptBuilder().build(messages, 350)
+
+    assert built.omitted > 0
+    assert f"[{built.omitted} earlier messages omitted]" in built.text
+    # Omitted messages are the earliest middle ones; the message after them survives
+    assert f"({messages[built.omitted + 1]['timestamp']})" in built.text
+    assert f"({messages[1]['timestamp']})" not in built.text
+
+
+def test_build_truncates_kept_messages_as_a_last_resort():
+    messages = email_thread(4)
+    messages[-1] = {**messages[-1], "body": "word " * 600}
+
+    built = PromptBuilder().build(messages, 200)
+
+    assert built.tokens <= 200
+    assert TRUNCATED.strip() in built.text
+
+
+def test_build_leaves_short_threads_alone():
+    messages = [{"sender": "customer", "timestamp": "t1", "body": "Thanks!"}]
+
+    built = PromptBuilder().build(messages, 100)
+
+    assert built.text == "Customer (t1): Thanks!\n\n"
+    assert built.omitted == 0
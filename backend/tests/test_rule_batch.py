@@ -0,0 +1,84 @@
+"""
+Tests that batch rule-based summaries match the per-thread ones
+"""
+import pytest
+
+from benchmarks.generate_dataset import DatasetGenerator
+from services.nlp_service import NLPService
+
+
+def scalar(nlp, thread):
+    summary = nlp._summarize_with_rules(thread)
+    summary['summary_type'] = 'rule_based'
+    return summary
+
+
+def make_thread(bodies, senders=None, thread_id='t-1'):
+    senders = senders or ['customer'] * len(bodies)
+    return {
+        "thread_id": thread_id, "subject": "Order 1", "topic": "Refund request",
+        "product": "Webcam", "order_id": "o-1", "initiated_by": "customer",
+        "status": "open", "created_at": "2025-01-01T00:00:00Z",
+        "messages": [
+            {"message_id": f"{thread_id}-m{i}", "timestamp": "2025-01-01T00:00:00Z",
+             "sender": sender, "body": body}
+            for i, (sender, body) in enumerate(zip(senders, bodies))
+        ]
+    }
+
+
+@pytest.mark.parametrize('seed, min_messages, max_messages', [
+    (1, 1, 10), (2, 1, 3), (3, 5, 8)     # around the escalation/priority thresholds
+])
+def test_batch_matches_scalar_on_generated_threads(seed, min_messages, max_messages):
+    nlp = NLPService()
+    threads = list(DatasetGenerator(seed=seed, min_messages=min_messages,
+                                    max_messages=max_messages).threads(300))
+
+    assert nlp.summarize_batch_rules(threads) == [scalar(nlp, t) for t in threads]
+
+
+EDGE_CASES = {
+    "no messages": make_thread([]),
+    "all agent": make_thread(["Your refund is delayed, sorry.", "Tracking shows it stuck."],
+                             senders=['company', 'company']),
+    "tie one each": make_thread(["It is broken.", "Thanks!"]),
+    "tie none": make_thread(["Hello there.", "Any update?"]),
+    "double negative": make_thread(["Wrong item and delayed.", "Thanks."]),
+    "more than double": make_thread(["Broken, wrong, lost and stuck.", "Thanks."]),
+    "repeated keyword": make_thread(["broken broken broken", "thanks thanks"]),
+    "resolved and urgent": make_thread(["URGENT: resolved?"] * 7),
+}
+
+
+@pytest.mark.parametrize('name', list(EDGE_CASES))
+def test_batch_matches_scalar_on_edge_cases(name):
+    nlp = NLPService()
+    thread = EDGE_CASES[name]
+
+    assert nlp.summarize_batch_rules([thread]) == [scalar(nlp, thread)]
+
+
+def test_batch_of_edge_cases_together():
+    nlp = NLPService()
+    threads = [dict(thread, thread_id=name) for name, thread in EDGE_CASES.items()]
+
+    assert nlp.summarize_batch_rules(threads) == [scalar(nlp, t) for t in threads]
+    assert nlp.summarize_batch_rules([]) == []
+
+
+def test_edge_case_outcomes():
+    nlp = NLPService()
+    summaries = dict(zip(EDGE_CASES, nlp.summarize_batch_rules(list(EDGE_CASES.values()))))
+
+    assert summaries["no messages"]["key_actions"][0] == "Total messages exchanged: 0"
+    assert summaries["no messages"]["priority"] == 'medium'
+    assert summaries["all agent"]["key_actions"][1:] == ["Customer messages: 0",
+                                                         "Agent responses: 2"]
+    assert summaries["tie one each"]["sentiment"] == 'neutral'
+    assert summaries["tie none"]["sentiment"] == 'neutral'
+    assert summaries["double negative"]["sentiment"] == 'negative'
+    assert summaries["more than double"]["sentiment"] == 'frustrated'
+    assert summaries["repeated keyword"]["sentiment"] == 'neutral'
+    assert summaries["resolved and urgent"]["resolution_status"] == 'resolved'
+    assert summaries["resolved and urgent"]["priority"] == 'urgent'
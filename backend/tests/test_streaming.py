@@ -0,0 +1,62 @@
+"""
+Tests for streamed list responses
+"""
+import io
+import json
+import threading
+
+from benchmarks.generate_dataset import DatasetGenerator
+
+
+def import_threads(client, count):
+    buf = io.StringIO()
+    DatasetGenerator().write(buf, count, fmt='ndjson')
+    response = client.post('/api/threads/import-stream', data=buf.getvalue().encode(),
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200, response.data
+
+
+def checked_out(db):
+    return db._created - db._idle.qsize()
+
+
+def test_unpaged_stream_holds_no_connection_between_batches(app):
+    client = app.test_client()
+    import_threads(client, 1200)    # several 500-row batches and 64 KiB chunks
+
+    # Slow clients, each on its own thread like a server worker: the first
+    # chunk read, the rest pending until released
+    count = app.db.pool_size + 2
+    started = threading.Barrier(count + 1)
+    release = threading.Event()
+    bodies = [None] * count
+
+    def slow_client(i):
+        response = client.get('/api/threads', buffered=False)
+        try:
+            chunks = [next(response.response)]
+            started.wait()
+            release.wait()
+            chunks.extend(response.response)
+            bodies[i] = b''.join(chunks)
+        finally:
+            response.close()
+
+    clients = [threading.Thread(target=slow_client, args=(i,)) for i in range(count)]
+    for thread in clients:
+        thread.start()
+    started.wait(timeout=30)
+    try:
+        assert checked_out(app.db) == 0
+        # Other requests still get a connection
+        assert client.get('/api/threads?limit=1').status_code == 200
+    finally:
+        release.set()
+        for thread in clients:
+            thread.join()
+
+    assert checked_out(app.db) == 0
+    for body in bodies:
+        threads = json.loads(body)
+        assert len(threads) == 1200
+        assert len({thread['thread_id'] for thread in threads}) == 1200
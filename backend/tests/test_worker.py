@@ -0,0 +1,46 @@
+"""
+Tests for the background job worker
+"""
+import threading
+import time
+
+import worker
+
+
+def test_long_job_keeps_its_lease(app, monkeypatch):
+    app.job_service.lease_seconds = 3
+    job_worker = worker.JobWorker(app)
+
+    def slow_job(app, payload):
+        time.sleep(5)    # longer than the lease; renewed every second
+        # Another worker can't take the job over meanwhile
+        assert app.job_service.claim('other-worker') is None
+        return {"done": True}
+
+    monkeypatch.setitem(worker.JOB_HANDLERS, 'slow', slow_job)
+    job_id = app.job_service.enqueue('slow', {}).id
+
+    assert job_worker.run_once('worker-1')
+    job = app.job_service.get_job(job_id)
+    assert job.status == 'succeeded'
+    assert job.attempts == 1
+
+
+def test_failed_metrics_write_keeps_worker_running(app, monkeypatch):
+    job_worker = worker.JobWorker(app, poll_interval=0.01)
+    flushes = []
+
+    def failing_flush(force=False):
+        flushes.append(force)
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(worker.REGISTRY, 'maybe_flush', failing_flush)
+    runner = threading.Thread(target=job_worker.run)
+    runner.start()
+    time.sleep(0.2)
+    assert runner.is_alive()
+
+    job_worker.stop()
+    runner.join(timeout=5)
+    assert not runner.is_alive()
+    assert flushes[-1] is True      # the final flush on shutdown was attempted
@@ -0,0 +1,174 @@
+"""
+Background Job Worker
+
+Claims jobs from the durable queue and runs them outside the web tier:
+
+    python worker.py                 # uses JOB_WORKER_CONCURRENCY threads
+    python worker.py --concurrency 8
+
+It also folds new audit events into the analytics rollups every
+ROLLUP_INTERVAL_SECONDS (--rollup-interval 0 disables that).
+"""
+import argparse
+import contextlib
+import os
+import signal
+import socket
+import threading
+import uuid
+from app import create_app
+from config import get_config
+from metrics import REGISTRY
+
+
+def summarize_thread_job(app, payload):
+    """Generate and store a summary for payload['thread_id']"""
+    result = app.batch_summary_service.summarize_thread(
+        payload['thread_id'], force=payload.get('force', False)
+    )
+    if result is None:
+        raise ValueError(f"Thread {payload['thread_id']} not found")
+
+    return {
+        "summary_id": result['summary_id'],
+        "summary_type": result['summary_type'],
+        "incremental": result['incremental']
+    }
+
+
+JOB_HANDLERS = {
+    'summarize_thread': summarize_thread_job
+}
+
+
+class JobWorker:
+    """Polls the job queue and executes claimed jobs"""
+
+    def __init__(self, app, poll_interval: float = 1.0, rollup_interval: float = 0):
+        self.app = app
+        self.job_service = app.job_service
+        self.poll_interval = poll_interval
+        self.rollup_interval = rollup_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+
+    def stop(self, *_):
+        """Finish the current job and exit"""
+        self._stop.set()
+
+    def run_once(self, worker_id: str) -> bool:
+        """Claim and run a single job; returns False when the queue is empty"""
+        job = self.job_service.claim(worker_id)
+        if not job:
+            return False
+
+        handler = JOB_HANDLERS.get(job.job_type)
+        try:
+            if not handler:
+                raise ValueError(f"No handler for job type '{job.job_type}'")
+            with self._renewing_lease(job.id, worker_id):
+                result = handler(self.app, job.payload)
+        except Exception as e:
+            self.app.logger.warning(f"Job {job.id} attempt {job.attempts} failed: {e}")
+            self.job_service.fail(job.id, worker_id, str(e))
+        else:
+            if not self.job_service.complete(job.id, worker_id, result):
+                self.app.logger.warning(f"Job {job.id} lease lost before completion")
+        return True
+
+    @contextlib.contextmanager
+    def _renewing_lease(self, job_id: int, worker_id: str):
+        """Heartbeat the job's lease every third of JOB_LEASE_SECONDS while the handler runs
+
+        Handlers can take longer than one lease (a large batch, slow OpenAI
+        calls); without renewal another worker would reclaim and rerun the
+        job while it is still running.
+        """
+        done = threading.Event()
+        interval = max(1.0, self.job_service.lease_seconds / 3)
+
+        def renew():
+            while not done.wait(interval):
+                try:
+                    if not self.job_service.heartbeat(job_id, worker_id):
+                        self.app.logger.warning(f"Job {job_id} lease lost while running")
+                        return
+                except Exception as e:
+                    # e.g. database busy; the lease still has two intervals left
+                    self.app.logger.error(f"Job {job_id} lease renewal failed: {e}")
+
+        renewer = threading.Thread(target=renew, name=f'lease-{job_id}', daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            done.set()
+            renewer.join()
+
+    def _loop(self, slot: int):
+        worker_id = f"{self.worker_id}-{slot}"
+        while not self._stop.is_set():
+            try:
+                if not self.run_once(worker_id):
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                # e.g. database busy; back off and keep the worker alive
+                self.app.logger.error(f"Worker {worker_id} error: {e}")
+                self._stop.wait(self.poll_interval)
+            self._flush_metrics()
+
+    def _flush_metrics(self, force: bool = False):
+        """Write the metrics snapshot; a failed write is logged, never fatal"""
+        try:
+            REGISTRY.maybe_flush(force=force)
+        except OSError as e:
+            # e.g. disk full; the snapshot is retried on the next flush
+            self.app.logger.error(f"Metrics snapshot write failed: {e}")
+
+    def _rollup_loop(self):
+        while not self._stop.wait(self.rollup_interval):
+            try:
+                self.app.rollup_service.rollup()
+            except Exception as e:
+                self.app.logger.error(f"Analytics rollup failed: {e}")
+
+    def run(self, concurrency: int = 1):
+        """Run worker threads (and the rollup loop) until stopped"""
+        threads = [
+            threading.Thread(target=self._loop, args=(slot,), daemon=True)
+            for slot in range(max(1, concurrency))
+        ]
+        if self.rollup_interval > 0:
+            threads.append(threading.Thread(target=self._rollup_loop, daemon=True))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.app.audit_writer.close()
+        self._flush_metrics(force=True)
+
+
+def main():
+    """Main entry point"""
+    env = os.environ.get('FLASK_ENV', 'development')
+    config = get_config(env)
+
+    parser = argparse.ArgumentParser(description='Run background job worker')
+    parser.add_argument('--concurrency', type=int, default=config.JOB_WORKER_CONCURRENCY)
+    parser.add_argument('--poll-interval', type=float, default=config.JOB_POLL_INTERVAL)
+    parser.add_argument('--rollup-interval', type=float, default=config.ROLLUP_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    app = create_app(env)
+    worker = JobWorker(app, poll_interval=args.poll_interval,
+                       rollup_interval=args.rollup_interval)
+
+    signal.signal(signal.SIGINT, worker.stop)
+    signal.signal(signal.SIGTERM, worker.stop)
+
+    print(f"Worker {worker.worker_id} started with {args.concurrency} thread(s)")
+    worker.run(args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
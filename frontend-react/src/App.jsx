@@ -12,6 +12,42 @@ import ProgressBar from './components/ProgressBar'
 import './App.css'
 
 const API_BASE_URL = '/api'
+const BATCH_SIZE = 25
+const PAGE_SIZE = 500
+// List views never show message bodies or CRM context, so don't fetch them
+const THREAD_LIST_FIELDS = 'thread_id,topic,subject,initiated_by,order_id,product,message_count'
+const SUMMARY_LIST_FIELDS = 'id,thread_id,edited_summary,status,summary_type,created_at'
+
+const api = axios.create({
+  baseURL: API_BASE_URL,
+  validateStatus: (status) => (status >= 200 && status < 300) || status === 304
+})
+
+// Last ETag and body per GET URL. Sending the ETag back lets the server
+// answer 304 without querying anything while the data is unchanged, so
+// reloading a tab whose data didn't change is nearly free.
+const validators = new Map()
+
+api.interceptors.request.use((config) => {
+  if (config.method === 'get') {
+    const cached = validators.get(api.getUri(config))
+    if (cached) {
+      config.headers['If-None-Match'] = cached.etag
+    }
+  }
+  return config
+})
+
+api.interceptors.response.use((response) => {
+  const key = api.getUri(response.config)
+  if (response.status === 304) {
+    return { ...response, status: 200, data: validators.get(key).data }
+  }
+  if (response.config.method === 'get' && response.headers.etag) {
+    validators.set(key, { etag: response.headers.etag, data: response.data })
+  }
+  return response
+})
 
 function App() {
   const [activeTab, setActiveTab] = useState('dashboard')
@@ -39,10 +75,6 @@ function App() {
     }
   }, [activeTab])
 
-  const api = axios.create({
-    baseURL: API_BASE_URL,
-  })
-
   const showSuccess = (message) => {
     setStatusMessage({ type: 'success', text: message })
     setTimeout(() => setStatusMessage({ type: '', text: '' }), 5000)
@@ -62,10 +94,23 @@ function App() {
     }
   }
 
+  // Walk every keyset page of a list endpoint
+  const fetchAllPages = async (path, params) => {
+    const items = []
+    let cursor = null
+    do {
+      const response = await api.get(path, {
+        params: { ...params, limit: PAGE_SIZE, ...(cursor && { cursor }) }
+      })
+      items.push(...response.data.items)
+      cursor = response.data.next_cursor
+    } while (cursor)
+    return items
+  }
+
   const loadThreads = async () => {
     try {
-      const response = await api.get('/threads')
-      setThreads(response.data)
+      setThreads(await fetchAllPages('/threads', { fields: THREAD_LIST_FIELDS }))
     } catch (error) {
       console.error('Failed to load threads:', error)
     }
@@ -73,8 +118,7 @@ function App() {
 
   const loadSummaries = async () => {
     try {
-      const response = await api.get('/summaries')
-      setSummaries(response.data)
+      setSummaries(await fetchAllPages('/summaries', { fields: SUMMARY_LIST_FIELDS }))
     } catch (error) {
       console.error('Failed to load summaries:', error)
     }
@@ -82,11 +126,10 @@ function App() {
 
   const loadPendingSummaries = async () => {
     try {
-      const [pendingRes, editedRes] = await Promise.all([
-        api.get('/summaries?status=pending'),
-        api.get('/summaries?status=edited')
-      ])
-      setSummaries([...pendingRes.data, ...editedRes.data])
+      setSummaries(await fetchAllPages('/summaries', {
+        status: 'pending,edited',
+        fields: SUMMARY_LIST_FIELDS
+      }))
     } catch (error) {
       console.error('Failed to load pending summaries:', error)
     }
@@ -94,8 +137,10 @@ function App() {
 
   const loadApprovedSummaries = async () => {
     try {
-      const response = await api.get('/summaries?status=approved')
-      setSummaries(response.data)
+      setSummaries(await fetchAllPages('/summaries', {
+        status: 'approved',
+        fields: SUMMARY_LIST_FIELDS
+      }))
     } catch (error) {
       console.error('Failed to load approved summaries:', error)
     }
@@ -108,22 +153,18 @@ function App() {
         return
       }
 
-      // Read the file
-      const fileText = await file.text()
-      const data = JSON.parse(fileText)
-      
-      // Validate the data structure
-      if (!data.threads || !Array.isArray(data.threads)) {
-        throw new Error('Invalid file format. Expected JSON with "threads" array.')
-      }
-      
-      const result = await api.post('/threads/import', data)
+      // Send the file as-is; the server parses it as a stream so large
+      // exports never have to be loaded into memory on either side
+      const isNdjson = /\.(ndjson|jsonl)$/i.test(file.name)
+      const result = await api.post('/threads/import-stream', file, {
+        headers: { 'Content-Type': isNdjson ? 'application/x-ndjson' : 'application/json' }
+      })
       showSuccess(`Successfully imported ${result.data.imported} of ${result.data.total} threads`)
       loadAnalytics()
       loadThreads()
     } catch (error) {
-      if (error instanceof SyntaxError) {
-        showError('Invalid JSON file. Please check the file format.')
+      if (error.response?.status === 400) {
+        showError('Invalid file format: ' + error.response.data.error)
       } else {
         showError('Failed to import threads: ' + error.message)
       }
@@ -146,22 +187,30 @@ function App() {
         message: 'Processing threads...'
       })
 
+      // Summarize in server-side batches so the backend can work on
+      // several threads concurrently
       let processed = 0
-      for (const thread of threadsToProcess) {
+      let attempted = 0
+      for (let i = 0; i < threadsToProcess.length; i += BATCH_SIZE) {
+        const threadIds = threadsToProcess.slice(i, i + BATCH_SIZE).map(t => t.thread_id)
         try {
-          await api.post(`/threads/${thread.thread_id}/summarize`)
-          processed++
-          
-          // Update progress
-          setProcessing({
-            active: true,
-            current: processed,
-            total: threadsToProcess.length,
-            message: `Processing thread ${processed} of ${threadsToProcess.length}...`
-          })
+          const response = await api.post('/threads/summarize-batch', { thread_ids: threadIds })
+          processed += response.data.succeeded
+          response.data.results
+            .filter(result => !result.success)
+            .forEach(result => console.error(`Failed to process thread ${result.thread_id}:`, result.error))
         } catch (error) {
-          console.error(`Failed to process thread ${thread.thread_id}:`, error)
+          console.error('Failed to process batch:', error)
         }
+        attempted += threadIds.length
+
+        // Update progress
+        setProcessing({
+          active: true,
+          current: attempted,
+          total: threadsToProcess.length,
+          message: `Processing thread ${attempted} of ${threadsToProcess.length}...`
+        })
       }
 
       // Complete
@@ -39,7 +39,7 @@ function ThreadsList({ threads, onRefresh, onViewThread, onSummarizeThread }) {
                   <span className="meta-item">📧 {thread.thread_id}</span>
                   <span className="meta-item">📦 {thread.order_id}</span>
                   <span className="meta-item">🛍️ {thread.product}</span>
-                  <span className="meta-item">💬 {thread.messages.length} messages</span>
+                  <span className="meta-item">💬 {thread.message_count} messages</span>
                 </div>
               </div>
               <div>